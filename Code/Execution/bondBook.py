@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+
+from Market.rate import Rate
+from Products.bond import BondCashFlows
+from RisksAnalysis.risks import BondBookRisk
+
+BOND_COLUMNS = ["coupon_rate", "maturity", "nominal", "nb_coupon"]
+CURVE_COLUMN = "curve_id"
+RESULT_COLUMNS = ["price", "ytm", "duration", "convexity"]
+
+
+class BondBook:
+    """
+    A class pricing a book of fixed-rate bonds stored in columns, such as loaded from a CSV or Parquet file.
+    The bonds sharing a curve are priced together on their stacked cash flows, with the same conventions
+    as Run.fixed_bond (maturity in years, nb_coupon coupon payments).
+
+    Attributes:
+        __bonds (pd.DataFrame): The bond definitions, with the columns coupon_rate, maturity, nominal, nb_coupon
+            and optionally curve_id.
+        __curves (dict): The rate objects by curve id.
+        __results (pd.DataFrame): The bond definitions with their price, ytm, duration and convexity.
+    """
+
+    def __init__(self, bonds: pd.DataFrame, curves) -> None:
+        """
+        Initialize a BondBook object.
+
+        Args:
+            bonds (pd.DataFrame): The bond definitions.
+            curves (Rate or dict): A single rate object, or the rate objects by curve id.
+
+        Raises:
+            Exception: If a column or a curve is missing.
+        """
+
+        for column in BOND_COLUMNS:
+            if column not in bonds.columns:
+                raise Exception("Missing inputs : " + column)
+        self.__bonds = bonds.reset_index(drop=True)
+        self.__curves = {None: curves} if isinstance(curves, Rate) else dict(curves)
+
+        if CURVE_COLUMN in self.__bonds.columns:
+            for curve_id in self.__bonds[CURVE_COLUMN].unique():
+                if curve_id not in self.__curves:
+                    raise Exception("Missing inputs : curve " + str(curve_id))
+        elif None not in self.__curves:
+            raise Exception("Missing inputs : " + CURVE_COLUMN)
+        self.__results = None
+
+    @classmethod
+    def from_file(cls, path: str, curves):
+        """
+        Load a bond book from a CSV or Parquet file.
+
+        Args:
+            path (str): The path of the file.
+            curves (Rate or dict): A single rate object, or the rate objects by curve id.
+
+        Returns:
+            BondBook: The bond book.
+        """
+
+        if path.endswith(".parquet"):
+            bonds = pd.read_parquet(path)
+        else:
+            bonds = pd.read_csv(path)
+        return cls(bonds, curves)
+
+    def _groups(self) -> list:
+        """ Positions of the bonds priced on each curve. """
+        if CURVE_COLUMN not in self.__bonds.columns:
+            return [(None, np.arange(len(self.__bonds)))]
+        codes, ids = pd.factorize(self.__bonds[CURVE_COLUMN])
+        return [(curve_id, np.nonzero(codes == code)[0]) for code, curve_id in enumerate(ids)]
+
+    def run(self) -> pd.DataFrame:
+        """
+        Price the bonds and compute their yield, duration and convexity.
+
+        Returns:
+            pd.DataFrame: The bond definitions with the columns price, ytm, duration and convexity.
+        """
+
+        if self.__results is None:
+            results = np.full((len(self.__bonds), len(RESULT_COLUMNS)), np.nan)
+            for curve_id, positions in self._groups():
+                bonds = self.__bonds.iloc[positions]
+                cash_flows = BondCashFlows.from_columns(*[bonds[column].to_numpy() for column in BOND_COLUMNS],
+                                                        rate=self.__curves[curve_id])
+                risk = BondBookRisk(cash_flows)
+                results[positions] = np.column_stack((risk.prices(), risk.ytms(), risk.duration(), risk.convexity()))
+            self.__results = self.__bonds.assign(**dict(zip(RESULT_COLUMNS, results.T)))
+        return self.__results
+
+    def to_file(self, path: str) -> None:
+        """
+        Write the results to a CSV or Parquet file.
+
+        Args:
+            path (str): The path of the file.
+        """
+
+        results = self.run()
+        if path.endswith(".parquet"):
+            results.to_parquet(path, index=False)
+        else:
+            results.to_csv(path, index=False)
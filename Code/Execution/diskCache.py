@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class DiskCache:
+    """
+    A persistent cache of results, surviving restarts : an SQLite index of the entries, with their scalar
+    values, size and last access time, and one .npy file per array (e.g. simulated paths). The least recently
+    used entries are removed beyond a disk budget. Keys are stable across processes.
+
+    Several processes may share a cache : the arrays of each put are written under names of their own,
+    recorded in the index row, and the index is read and updated in immediate transactions, so that an
+    entry never pairs the scalars of a put with the arrays of another one.
+
+    Attributes:
+        __directory (str): The directory of the cache.
+        __max_bytes (int): The disk budget in bytes.
+        __index (str): The path of the SQLite index.
+        __lock (threading.Lock): The lock serializing the accesses of the threads of this process.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 2 ** 30) -> None:
+        """
+        Initialize a DiskCache object.
+
+        Args:
+            directory (str): The directory of the cache, created if needed.
+            max_bytes (int, optional): The disk budget in bytes. Defaults to 1 GB.
+        """
+
+        self.__directory = directory
+        self.__max_bytes = max_bytes
+        self.__index = os.path.join(directory, "index.sqlite")
+        self.__lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, scalars TEXT, "
+                               "arrays TEXT, size INTEGER, last_access REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_access ON entries (last_access)")
+
+    @contextmanager
+    def _connect(self, write: bool = False):
+        """ Connection to the index, committed and closed on exit (in an immediate transaction to write). """
+        connection = sqlite3.connect(self.__index, timeout=30)
+        try:
+            with connection:
+                if write:
+                    # Serializes the writers (and the readers updating the access times) across processes
+                    connection.execute("BEGIN IMMEDIATE")
+                yield connection
+        finally:
+            connection.close()
+
+    def _path(self, file: str) -> str:
+        """ Path of the file of an array. """
+        return os.path.join(self.__directory, file)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Key of an entry, stable across processes.
+
+        Args:
+            *parts: Hashable values with a deterministic repr (strings, numbers, bytes, tuples of them).
+
+        Returns:
+            str: The key.
+        """
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> dict:
+        """
+        Values of an entry.
+
+        Args:
+            key (str): The key of the entry.
+
+        Returns:
+            dict: The values (None if the entry is missing).
+        """
+
+        with self.__lock, self._connect(write=True) as connection:
+            row = connection.execute("SELECT scalars, arrays FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            values = json.loads(row[0])
+            try:
+                for name, file in json.loads(row[1]).items():
+                    values[name] = np.load(self._path(file))
+            except OSError:
+                # Array removed outside of the cache
+                self._delete(connection, key)
+                return None
+            connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return values
+
+    def put(self, key: str, values: dict) -> bool:
+        """
+        Store the values of an entry, removing the least recently used entries beyond the disk budget.
+
+        Args:
+            key (str): The key of the entry.
+            values (dict): The values : arrays, and numbers, strings or None.
+
+        Returns:
+            bool: If the values were stored (not if a value cannot be stored).
+        """
+
+        scalars, arrays = {}, {}
+        for name, value in values.items():
+            if isinstance(value, np.ndarray):
+                arrays[name] = value
+            elif isinstance(value, np.generic):
+                scalars[name] = value.item()
+            elif isinstance(value, (str, int, float, bool, type(None))):
+                scalars[name] = value
+            else:
+                return False
+        size = len(json.dumps(scalars)) + sum(array.nbytes for array in arrays.values())
+        if size > self.__max_bytes:
+            return False
+
+        # Arrays written under names of this put, only visible to readers once recorded in the index
+        token = uuid.uuid4().hex
+        files = {name: key + "_" + token + "_" + name + ".npy" for name in arrays}
+        try:
+            for name, array in arrays.items():
+                np.save(self._path(files[name]), array)
+            with self.__lock, self._connect(write=True) as connection:
+                self._delete(connection, key)
+                connection.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+                                   (key, json.dumps(scalars), json.dumps(files), size, time.time()))
+
+                total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                for old_key, old_size in connection.execute("SELECT key, size FROM entries ORDER BY last_access").fetchall():
+                    if total <= self.__max_bytes:
+                        break
+                    self._delete(connection, old_key)
+                    total -= old_size
+        except BaseException:
+            for file in files.values():
+                self._remove_file(file)
+            raise
+        return True
+
+    def update(self, key: str, values: dict) -> bool:
+        """
+        Add values to an entry (created if missing), keeping its other values.
+
+        Args:
+            key (str): The key of the entry.
+            values (dict): The new values : arrays, and numbers, strings or None.
+
+        Returns:
+            bool: If the values were stored.
+        """
+        return self.put(key, {**(self.get(key) or {}), **values})
+
+    def _delete(self, connection: sqlite3.Connection, key: str) -> None:
+        """ Remove an entry and its arrays (the lock being held). """
+        row = connection.execute("SELECT arrays FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return
+        for file in json.loads(row[0]).values():
+            self._remove_file(file)
+        connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _remove_file(self, file: str) -> None:
+        """ Remove the file of an array, if it still exists. """
+        try:
+            os.remove(self._path(file))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """ Remove every entry. """
+        with self.__lock, self._connect(write=True) as connection:
+            for (key,) in connection.execute("SELECT key FROM entries").fetchall():
+                self._delete(connection, key)
+
+    def size(self) -> int:
+        """ Total size of the entries in bytes. """
+        with self.__lock, self._connect() as connection:
+            return connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
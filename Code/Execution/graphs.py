@@ -19,6 +19,7 @@ class GraphsOptions:
         _maturity (Maturity): maturity of the financial product.
         _product (VanillaOption, Spread, ButterflySpread or OptionProducts) : the financial product.
         _product_price (float): product price.
+        _process (BrownianMotion): process the product is priced with.
     """
 
     def __init__(self, graph_type: str, 
@@ -72,6 +73,7 @@ class GraphsOptions:
             "volatility":self._vol,
             "maturity":self._maturity
         })
+        self._process = process
         
         # Product creation
         if self._opt_type in ["call", "put"]:
@@ -180,14 +182,7 @@ class GraphsOptions:
         greeks = []
 
         for i in range(1, 200):
-            process = BrownianMotion({
-                "nb_simulations":1000,
-                "nb_steps":1000,
-                "spot": i,
-                "rates":self._rate,
-                "volatility":self._vol,
-                "maturity":self._maturity
-            })
+            process = self._process.with_spot(i)
             if self._opt_type in ["call", "put"]:
                 opt_greeks = OptionRisk(self._product, process)
             elif self._opt_type in ["call spread", "put spread"]:
@@ -254,6 +249,7 @@ class GraphsStructuredProducts:
         _maturity (Maturity): maturity of the financial product.
         _product (ReverseConvertible or CertificatOutperformance): structured product to graph.
         _product_price (float): price of the structured product.
+        _process (BrownianMotion): process the product is priced with.
     """
 
     def __init__(self, graph_type: str, 
@@ -298,6 +294,7 @@ class GraphsStructuredProducts:
             "volatility":self._vol,
             "maturity":self._maturity
         })
+        self._process = process
 
         # Product creation
         if self._prod_type == "reverse convertible":
@@ -346,14 +343,7 @@ class GraphsStructuredProducts:
         greeks = []
 
         for i in range(1, 200):
-            process = BrownianMotion({
-                "nb_simulations":1000,
-                "nb_steps":1000,
-                "spot": i,
-                "rates":self._rate,
-                "volatility":self._vol,
-                "maturity":self._maturity
-            })
+            process = self._process.with_spot(i)
 
             if self._prod_type == "reverse convertible":
                 opt_greeks = StructuredProductsRisk(self._prod_type, process, 
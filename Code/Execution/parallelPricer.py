@@ -0,0 +1,214 @@
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from Market.brownianMotion import BrownianMotion
+
+
+def _evaluate(paths: np.ndarray, products: list, discount_factor: float, monte_carlo: bool) -> list:
+    """
+    Price products on simulated paths.
+
+    Args:
+        paths (np.ndarray): The simulated prices, with one column per date (or the terminal prices only).
+        products (list): The products.
+        discount_factor (float): The discount factor at the maturity.
+        monte_carlo (bool): If the payoffs are computed on the full paths, or on the terminal prices.
+
+    Returns:
+        list: Dictionaries containing the price and probability of each product.
+    """
+    values = paths if monte_carlo or paths.ndim == 1 else paths[:, -1]
+    results = []
+    for product in products:
+        payoffs = np.asarray(product.payoff(values))
+        results.append({"price": discount_factor * np.mean(payoffs), "proba": np.mean(payoffs > 0)})
+    return results
+
+
+def _price_chunk(name: str, shape: tuple, dtype: str, products: list, discount_factor: float, monte_carlo: bool) -> list:
+    """
+    Price products in a worker process, on a view of the simulation in shared memory.
+
+    Args:
+        name (str): The name of the shared memory block.
+        shape (tuple): The shape of the simulation.
+        dtype (str): The type of the simulation.
+        products (list): The products.
+        discount_factor (float): The discount factor at the maturity.
+        monte_carlo (bool): If the payoffs are computed on the full paths, or on the terminal prices.
+
+    Returns:
+        list: Dictionaries containing the price and probability of each product.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        # The view is released when _evaluate returns, before the block is closed
+        return _evaluate(np.ndarray(shape, dtype=dtype, buffer=memory.buf), products, discount_factor, monte_carlo)
+    finally:
+        memory.close()
+
+
+def _release(memory: shared_memory.SharedMemory) -> None:
+    """ Close and remove a shared memory block. """
+    memory.close()
+    memory.unlink()
+
+
+class ParallelPricer:
+    """
+    A class pricing many products of one underlying on a single simulation, in a pool of worker processes.
+    The simulation is copied once into shared memory (only its terminal prices when the products are not
+    priced on full paths) : the workers receive only its name and shape (and their products), and read it
+    through zero-copy views. Products with a piecewise linear payoff are priced in closed form on the sorted
+    terminal prices of the simulation, without the workers.
+
+    The simulation (with its copy in shared memory) and the pool are created on the first pricing and reused
+    by the next ones (the simulation until its drifts or volatilities change), until close (or the end of a
+    with block). A pool can also be shared by several pricers.
+
+    Attributes:
+        __process (BrownianMotion): The process simulating the underlying.
+        __nb_workers (int): The number of worker processes.
+        __chunk_size (int): The number of products priced by a worker at once.
+        __executor (ProcessPoolExecutor): The pool of worker processes (None until needed).
+        __own_executor (bool): If the pool was created by this pricer (and is shut down by close).
+        __simulation (tuple): The drifts and volatilities of the last simulation, and its prices (None until needed).
+        __shared (tuple): The name of the shared memory block, the shape and type of the simulation copied
+            in it, the prices it was copied from and the finalizer removing the block (None until needed).
+    """
+
+    def __init__(self, process: BrownianMotion, nb_workers: int = None, chunk_size: int = None,
+                 executor: ProcessPoolExecutor = None) -> None:
+        """
+        Initialize a ParallelPricer object.
+
+        Args:
+            process (BrownianMotion): The process simulating the underlying.
+            nb_workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+            chunk_size (int, optional): The number of products priced by a worker at once.
+                Defaults to an even split in four chunks per worker.
+            executor (ProcessPoolExecutor, optional): A pool of worker processes to use, left open by close.
+                Defaults to None (a pool is created when needed).
+        """
+
+        self.__process = process
+        self.__nb_workers = nb_workers if nb_workers is not None else os.cpu_count() or 1
+        self.__chunk_size = chunk_size
+        self.__executor = executor
+        self.__own_executor = False
+        self.__simulation = None
+        self.__shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """ Remove the shared simulation, and shut down the pool of worker processes if created by this pricer. """
+        self._release_shared()
+        if self.__own_executor:
+            self.__executor.shutdown()
+            self.__executor, self.__own_executor = None, False
+
+    def _executor(self) -> ProcessPoolExecutor:
+        """ Pool of worker processes, created on the first use. """
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.__nb_workers)
+            self.__own_executor = True
+        return self.__executor
+
+    def _simulate(self, product, monte_carlo: bool) -> np.ndarray:
+        """ Simulated prices for the product, simulated again only when its drifts or volatilities change. """
+        spot, drifts, volatilities = self.__process._step_parameters(product, monte_carlo)
+        key = (float(spot), drifts.tobytes(), volatilities.tobytes())
+        if self.__simulation is None or self.__simulation[0] != key or self.__process._prices is not self.__simulation[1]:
+            self.__simulation = (key, self.__process._simulate(product, monte_carlo))
+        return self.__simulation[1]
+
+    def _release_shared(self) -> None:
+        """ Remove the simulation from shared memory. """
+        if self.__shared is not None:
+            self.__shared[-1]()
+            self.__shared = None
+
+    def _shared(self, paths: np.ndarray, monte_carlo: bool) -> tuple:
+        """
+        Shared memory block holding the simulation read by the workers, copied once for each simulation.
+
+        Args:
+            paths (np.ndarray): The simulated prices, with one column per date.
+            monte_carlo (bool): If the products are priced on full paths (or on the terminal prices only).
+
+        Returns:
+            tuple: The name of the block, and the shape and type of the shared simulation (full paths,
+                or terminal prices).
+        """
+        if self.__shared is not None:
+            name, shape, dtype, source, _ = self.__shared
+            # Full paths hold the terminal prices as well
+            if source is paths and (len(shape) == 2 or not monte_carlo):
+                return name, shape, dtype
+            self._release_shared()
+
+        values = paths if monte_carlo else paths[:, -1]
+        memory = shared_memory.SharedMemory(create=True, size=values.nbytes)
+        np.ndarray(values.shape, dtype=values.dtype, buffer=memory.buf)[:] = values
+        # The block is removed by close, or when the pricer is garbage collected
+        self.__shared = (memory.name, values.shape, values.dtype.str, paths, weakref.finalize(self, _release, memory))
+        return self.__shared[:3]
+
+    def pricing(self, products: list, monte_carlo: bool = False) -> list:
+        """
+        Price the products on one simulation, simulated with the inputs (underlying adjustment,
+        volatility) of the first product.
+
+        Args:
+            products (list): The products.
+            monte_carlo (bool, optional): If the products are priced on full paths. Defaults to False.
+
+        Returns:
+            list: Dictionaries containing the price and probability of each product.
+        """
+
+        if not products:
+            return []
+        paths = self._simulate(products[0], monte_carlo)
+        discount_factor = self.__process.input("rates").discount_factor(self.__process.input("maturity"))
+
+        results = [None] * len(products)
+        remaining = []
+        for position, product in enumerate(products):
+            payoff_function = None if monte_carlo else product.piecewise_linear()
+            if payoff_function is None:
+                remaining.append(position)
+                continue
+            # Closed form on the terminal index of the simulation, built once
+            payoff, proba = payoff_function.expectation(*self.__process._terminal_index())
+            results[position] = {"price": discount_factor * payoff, "proba": proba}
+
+        others = [products[position] for position in remaining]
+        for position, result in zip(remaining, self._evaluate(paths, others, discount_factor, monte_carlo)):
+            results[position] = result
+        return results
+
+    def _evaluate(self, paths: np.ndarray, products: list, discount_factor: float, monte_carlo: bool) -> list:
+        """ Price products on their payoffs, in the pool of worker processes. """
+        if not products:
+            return []
+        if self.__nb_workers <= 1:
+            return _evaluate(paths, products, discount_factor, monte_carlo)
+
+        chunk_size = self.__chunk_size or max(1, -(-len(products) // (4 * self.__nb_workers)))
+        chunks = [products[i:i + chunk_size] for i in range(0, len(products), chunk_size)]
+
+        name, shape, dtype = self._shared(paths, monte_carlo)
+        executor = self._executor()
+        futures = [executor.submit(_price_chunk, name, shape, dtype, chunk, discount_factor, monte_carlo)
+                   for chunk in chunks]
+        return [result for future in futures for result in future.result()]
@@ -0,0 +1,202 @@
+import numpy as np
+
+from Market.brownianMotion import BrownianMotion
+from Execution.pricingRequests import PricingRequest
+from Execution.run import _canonical
+from Products.bond import FixedBond
+from Products.optionalProducts import VanillaOption, Spread, ButterflySpread, OptionProducts
+from Products.structuredProducts import CertificatOutperformance, ReverseConvertible
+
+FOREX = "forex rate"
+VANILLA_OPTION, SPREAD, BUTTERFLY, OPTION_STRATEGY = "vanilla_option", "spread", "butterfly", "option_strategy"
+REVERSE_CONVERTIBLE, CERTIFICAT_OUTPERFORMANCE = "reverse_convertible", "certificat_outperformance"
+# Inputs of the simulation, which products may set to override the market snapshot
+SIMULATION_INPUTS = ["spot", "volatility", "rates", "dividend", "dividend_date", "forward_rate",
+                     "nb_simulations", "nb_steps", "seed"]
+
+
+class Portfolio:
+    """
+    A class pricing a portfolio of products on a market snapshot. Every product is decomposed into
+    vanilla option and fixed bond legs, identified by their characteristics : each distinct leg is priced
+    once (the vanilla legs of an underlying and maturity on a single simulation), and the leg prices
+    are kept until the market changes. Products may override the market inputs (e.g. their own spot or
+    volatility) : the legs and simulations are then identified by these inputs too.
+
+    Products are (product type, inputs) pairs, the product types being the names of the Run methods
+    (vanilla_option, spread, butterfly, option_strategy, reverse_convertible, certificat_outperformance)
+    and the inputs the product inputs of these methods.
+
+    Attributes:
+        __market (dict): The market inputs (spot, rates, volatility, nb_simulations, nb_steps, and dividend,
+            forward_rate or domestic_rate depending on the underlyings).
+        __legs (dict): The priced legs and their prices, by leg key.
+        __processes (dict): The simulation of each underlying, maturity and simulation inputs.
+    """
+
+    def __init__(self, market: dict) -> None:
+        """
+        Initialize a Portfolio object.
+
+        Args:
+            market (dict): The market inputs.
+        """
+
+        self.__market = dict(market)
+        self.__legs = {}
+        self.__processes = {}
+
+    def set_market(self, market: dict) -> None:
+        """
+        Change the market snapshot, dropping the leg prices if it changed.
+
+        Args:
+            market (dict): The market inputs.
+        """
+
+        if market != self.__market:
+            self.__market = dict(market)
+            self.__legs = {}
+            self.__processes = {}
+
+    def nb_legs(self) -> int:
+        """ Number of distinct legs priced on the current market snapshot. """
+        return len(self.__legs)
+
+    def _input(self, code, inputs):
+        """ Product or market input, raising if it is missing. """
+        if code in inputs:
+            return inputs[code]
+        if code in self.__market:
+            return self.__market[code]
+        raise Exception("Missing inputs : " + code)
+
+    def _simulation_key(self, inputs) -> tuple:
+        """ Simulation inputs of a product (its own, or the market ones), in canonical form. """
+        return tuple((code, _canonical(self._input(code, inputs))) for code in SIMULATION_INPUTS
+                     if code in inputs or code in self.__market)
+
+    def _vanilla(self, inputs: dict, option_type: str, strike: float) -> tuple:
+        """
+        Vanilla option leg and its price, priced on the first request.
+
+        Args:
+            inputs (dict): The product inputs.
+            option_type (str): call or put.
+            strike (float): The strike.
+
+        Returns:
+            tuple: The option and its price.
+        """
+
+        underlying = self._input("underlying", inputs)
+        maturity = self._input("maturity", inputs)
+        domestic_rate = self._input("domestic_rate", inputs) if underlying == FOREX else None
+        simulation_key = self._simulation_key(inputs)
+        key = (VANILLA_OPTION, underlying, option_type, float(strike), maturity.maturity(), domestic_rate, simulation_key)
+
+        if key not in self.__legs:
+            option_inputs = {"option_type": option_type, "strike": strike}
+            if underlying == FOREX:
+                option_inputs.update({"domestic_rate": domestic_rate, "maturity": maturity})
+            option = VanillaOption(underlying=underlying, inputs=option_inputs)
+
+            # One simulation per underlying, maturity and simulation inputs, shared by every strike
+            process_key = (underlying, maturity.maturity(), simulation_key)
+            if process_key not in self.__processes:
+                self.__processes[process_key] = BrownianMotion({**self.__market, **inputs})
+            self.__legs[key] = (option, self.__processes[process_key].pricing(option)["price"])
+        return self.__legs[key]
+
+    def _fixed_bond(self, inputs: dict) -> tuple:
+        """
+        Fixed bond leg and its price, priced on the first request.
+
+        Args:
+            inputs (dict): The product inputs.
+
+        Returns:
+            tuple: The bond and its price.
+        """
+
+        coupon_rate = self._input("coupon_rate", inputs)
+        maturity = self._input("maturity", inputs)
+        nominal = self._input("nominal", inputs)
+        nb_coupon = self._input("nb_coupon", inputs)
+        rates = self._input("rates", inputs)
+        key = ("fixed_bond", float(coupon_rate), maturity.maturity(), float(nominal), int(nb_coupon), _canonical(rates))
+
+        if key not in self.__legs:
+            bond = FixedBond(coupon_rate=coupon_rate, maturity=maturity, nominal=nominal,
+                             nb_coupon=nb_coupon, rate=rates)
+            self.__legs[key] = (bond, bond.price())
+        return self.__legs[key]
+
+    def price(self, product_type: str, inputs: dict) -> float:
+        """
+        Price a product from its (possibly shared) legs.
+
+        Args:
+            product_type (str): The product type (name of the Run method).
+            inputs (dict): The product inputs.
+
+        Returns:
+            float: The price of the product.
+
+        Raises:
+            Exception: If the product type is unknown.
+        """
+
+        if product_type == VANILLA_OPTION:
+            return self._vanilla(inputs, self._input("option_type", inputs), self._input("strike", inputs))[1]
+
+        if product_type == SPREAD:
+            option_type = self._input("option_type", inputs)
+            short_leg, short_price = self._vanilla(inputs, option_type, self._input("short_strike", inputs))
+            long_leg, long_price = self._vanilla(inputs, option_type, self._input("long_strike", inputs))
+            return Spread(option_type + " spread", {"long leg": long_leg, "long leg price": long_price,
+                                                    "short leg": short_leg, "short leg price": short_price}).price()
+
+        if product_type == BUTTERFLY:
+            short_call, short_call_price = self._vanilla(inputs, "call", self._input("strike_2", inputs))
+            long_call, long_call_price = self._vanilla(inputs, "call", self._input("strike_1", inputs))
+            short_put, short_put_price = self._vanilla(inputs, "put", self._input("strike_2", inputs))
+            long_put, long_put_price = self._vanilla(inputs, "put", self._input("strike_3", inputs))
+            call_spread = Spread("call spread", {"long leg": long_call, "long leg price": long_call_price,
+                                                 "short leg": short_call, "short leg price": short_call_price})
+            put_spread = Spread("put spread", {"long leg": long_put, "long leg price": long_put_price,
+                                               "short leg": short_put, "short leg price": short_put_price})
+            return ButterflySpread({"put spread": put_spread, "call spread": call_spread}).price()
+
+        if product_type == OPTION_STRATEGY:
+            call, call_price = self._vanilla(inputs, "call", self._input("call_strike", inputs))
+            put, put_price = self._vanilla(inputs, "put", self._input("put_strike", inputs))
+            return OptionProducts(self._input("option_type", inputs).lower(), self._input("option_position", inputs).lower(),
+                                  {"call": call, "call price": call_price, "put": put, "put price": put_price}).price()
+
+        if product_type == REVERSE_CONVERTIBLE:
+            put, put_price = self._vanilla(inputs, "put", self._input("strike", inputs))
+            bond, bond_price = self._fixed_bond(inputs)
+            return ReverseConvertible({"put": put, "put price": put_price, "bond": bond, "bond price": bond_price}).price()
+
+        if product_type == CERTIFICAT_OUTPERFORMANCE:
+            call, call_price = self._vanilla(inputs, "call", self._input("strike", inputs))
+            zero_call, zero_price = self._vanilla(inputs, "call", 0)
+            return CertificatOutperformance({"zero strike call": zero_call, "zero strike call price": zero_price,
+                                             "call": call, "call price": call_price}).price()
+
+        raise Exception("Unknown product type : " + product_type)
+
+    def prices(self, products: list) -> np.ndarray:
+        """
+        Price the products of the portfolio.
+
+        Args:
+            products (list): The (product type, inputs) pairs, or pricing requests.
+
+        Returns:
+            np.ndarray: The price of each product.
+        """
+
+        return np.array([self.price(product.product_type, product) if isinstance(product, PricingRequest)
+                         else self.price(*product) for product in products], dtype=float)
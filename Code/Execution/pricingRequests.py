@@ -0,0 +1,281 @@
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields, replace
+from functools import lru_cache
+from typing import ClassVar
+
+from Market.maturity import Maturity
+
+SHARE_NO_DIV, SHARE_DIV = "no dividend share", "dividend share"
+FOREX = "forex rate"
+CAPITALIZED_INDEX, NON_CAPITALIZED_INDEX = "capitalized index", "non capitalized index"
+UNDERLYINGS = [SHARE_NO_DIV, SHARE_DIV, FOREX, CAPITALIZED_INDEX, NON_CAPITALIZED_INDEX]
+CALL, PUT = "call", "put"
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls) -> tuple:
+    """ Names of the input fields of a request class. """
+    return tuple(item.name for item in fields(cls) if item.init)
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class PricingRequest(Mapping):
+    """
+    Base class of the pricing requests : immutable, validated once at construction, and hashable
+    on their values (maturities by their length in years, market objects by identity), the hash being
+    computed once. Requests are read-only mappings of their set fields, so that they are accepted
+    wherever an input dictionary is read (Run, BrownianMotion), without copies.
+
+    Attributes:
+        product_type (str): The name of the Run method pricing the request.
+        _hash (int): The hash of the request.
+    """
+    product_type: ClassVar[str] = None
+    _hash: int = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._validate()
+        object.__setattr__(self, "_hash", hash(self.key()))
+
+    def _validate(self) -> None:
+        """ Check the inputs of the request. """
+        for item in fields(self):
+            if item.init and getattr(self, item.name) is None and item.default is not None:
+                raise Exception("Missing inputs : " + item.name)
+
+    def key(self) -> tuple:
+        """
+        Values identifying the request.
+
+        Returns:
+            tuple: The product type and the values of the fields.
+        """
+        values = [self.product_type]
+        for name in _field_names(type(self)):
+            value = getattr(self, name)
+            values.append(value.maturity() if isinstance(value, Maturity) else value)
+        return tuple(values)
+
+    def replace(self, **changes):
+        """
+        Request with some fields replaced (e.g. a stressed spot), validated again.
+
+        Args:
+            **changes: The new values of the fields.
+
+        Returns:
+            PricingRequest: The new request.
+        """
+        return replace(self, **changes)
+
+    def to_inputs(self) -> dict:
+        """ Input dictionary of the request, as expected by Run. """
+        return dict(self)
+
+    @classmethod
+    def from_inputs(cls, inputs: dict):
+        """
+        Build a request from an input dictionary, ignoring the keys which are not fields of the request.
+
+        Args:
+            inputs (dict): The inputs.
+
+        Returns:
+            PricingRequest: The request.
+        """
+        return cls(**{name: inputs[name] for name in _field_names(cls) if name in inputs})
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PricingRequest):
+            return NotImplemented
+        return self._hash == other._hash and self.key() == other.key()
+
+    def __getitem__(self, code):
+        if code in _field_names(type(self)):
+            value = getattr(self, code)
+            if value is not None:
+                return value
+        raise KeyError(code)
+
+    def __iter__(self):
+        return (name for name in _field_names(type(self)) if getattr(self, name) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class ZcBondRequest(PricingRequest):
+    """ Request for a zero-coupon bond. """
+    product_type: ClassVar[str] = "zc_bond"
+    rate: object
+    maturity: Maturity
+    nominal: float
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class FixedBondRequest(PricingRequest):
+    """ Request for a fixed-rate bond. """
+    product_type: ClassVar[str] = "fixed_bond"
+    coupon_rate: float
+    maturity: Maturity
+    nominal: float
+    nb_coupon: int
+    rate: object
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class OptionRequest(PricingRequest):
+    """
+    Base class of the requests priced on simulations of the underlying.
+
+    Attributes:
+        underlying (str): The type of underlying.
+        spot (float): The spot of the underlying.
+        rates (Rate): The rate object.
+        volatility (float or VolSurface): The volatility.
+        maturity (Maturity): The maturity.
+        nb_simulations (int): The number of simulations.
+        nb_steps (int): The number of steps of each simulation.
+        dividend (float, optional): The dividend yield (or amount with dividend_date).
+        dividend_date (float, optional): The date of a discrete dividend in years.
+        forward_rate (float, optional): The foreign rate of a forex underlying.
+        domestic_rate (float, optional): The domestic rate of a forex underlying.
+        seed (int, optional): The seed of the simulations.
+    """
+    underlying: str = SHARE_NO_DIV
+    spot: float
+    rates: object
+    volatility: object
+    maturity: Maturity
+    nb_simulations: int
+    nb_steps: int
+    dividend: float = None
+    dividend_date: float = None
+    forward_rate: float = None
+    domestic_rate: float = None
+    seed: int = None
+
+    def _validate(self) -> None:
+        """ Check the inputs of the request. """
+        super(OptionRequest, self)._validate()
+        if self.underlying not in UNDERLYINGS:
+            raise Exception("Unknown underlying.")
+        if self.underlying in [SHARE_DIV, CAPITALIZED_INDEX] and self.dividend is None:
+            raise Exception("Missing inputs : dividend")
+        if self.underlying == FOREX:
+            for code in ["forward_rate", "domestic_rate"]:
+                if getattr(self, code) is None:
+                    raise Exception("Missing inputs : " + code)
+        if self.nb_simulations <= 0 or self.nb_steps <= 0:
+            raise Exception("Input error : the numbers of simulations and steps should be positive.")
+
+
+def _check_option_type(option_type: str, option_types: list) -> None:
+    """ Raise if an option type is not one of the expected ones. """
+    if option_type.lower() not in option_types:
+        raise Exception("Unknown option type, should be " + ", ".join(option_types) + ".")
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class VanillaOptionRequest(OptionRequest):
+    """ Request for a vanilla option. """
+    product_type: ClassVar[str] = "vanilla_option"
+    option_type: str
+    strike: float
+
+    def _validate(self) -> None:
+        super(VanillaOptionRequest, self)._validate()
+        _check_option_type(self.option_type, [CALL, PUT])
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class SpreadRequest(OptionRequest):
+    """ Request for a call or put spread. """
+    product_type: ClassVar[str] = "spread"
+    option_type: str
+    short_strike: float
+    long_strike: float
+
+    def _validate(self) -> None:
+        super(SpreadRequest, self)._validate()
+        _check_option_type(self.option_type, [CALL, PUT])
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class ButterflyRequest(OptionRequest):
+    """ Request for a butterfly spread. """
+    product_type: ClassVar[str] = "butterfly"
+    strike_1: float
+    strike_2: float
+    strike_3: float
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class OptionStrategyRequest(OptionRequest):
+    """ Request for a straddle, strangle, strip or strap. """
+    product_type: ClassVar[str] = "option_strategy"
+    option_type: str
+    option_position: str
+    call_strike: float
+    put_strike: float
+
+    def _validate(self) -> None:
+        super(OptionStrategyRequest, self)._validate()
+        _check_option_type(self.option_type, ["straddle", "strangle", "strip", "strap"])
+        _check_option_type(self.option_position, ["long", "short"])
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class BinaryOptionRequest(OptionRequest):
+    """ Request for a binary option. """
+    product_type: ClassVar[str] = "binary_option"
+    option_type: str
+    strike: float
+    payoff_amount: float
+    barrier: float = None
+    upper_barrier: float = None
+    lower_barrier: float = None
+
+    def _validate(self) -> None:
+        super(BinaryOptionRequest, self)._validate()
+        _check_option_type(self.option_type, ["binary_call", "binary_put", "one_touch", "no_touch",
+                                              "double_one_touch", "double_no_touch"])
+        if self.option_type.lower() in ["one_touch", "no_touch"] and self.barrier is None:
+            raise Exception("Missing inputs : barrier")
+        if self.option_type.lower() in ["double_one_touch", "double_no_touch"] \
+                and (self.upper_barrier is None or self.lower_barrier is None):
+            raise Exception("Missing inputs : upper_barrier, lower_barrier")
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class BarrierOptionRequest(OptionRequest):
+    """ Request for a knock-out or knock-in option. """
+    product_type: ClassVar[str] = "barrier_option"
+    option_type: str
+    strike: float
+    barrier: float
+
+    def _validate(self) -> None:
+        super(BarrierOptionRequest, self)._validate()
+        _check_option_type(self.option_type, ["knock_out", "knock_in"])
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class ReverseConvertibleRequest(OptionRequest):
+    """ Request for a reverse convertible. """
+    product_type: ClassVar[str] = "reverse_convertible"
+    strike: float
+    coupon_rate: float
+    nominal: float
+    nb_coupon: int
+
+
+@dataclass(frozen=True, slots=True, eq=False, kw_only=True)
+class CertificatOutperformanceRequest(OptionRequest):
+    """ Request for a certificat outperformance. """
+    product_type: ClassVar[str] = "certificat_outperformance"
+    strike: float
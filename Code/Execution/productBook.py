@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+from Market.brownianMotion import BrownianMotion
+from Market.maturity import Maturity
+from Market.volSurface import VolSurface
+from Products.optionalProducts import VanillaOption
+
+TRADE_COLUMNS = ["underlying", "option_type", "strike", "maturity"]
+TRADE_ID_COLUMN, NOTIONAL_COLUMN, POSITION_COLUMN = "trade_id", "notional", "position"
+RESULT_COLUMNS = ["price", "proba", "value"]
+FOREX = "forex rate"
+CALL, PUT = "call", "put"
+LONG, SHORT = "long", "short"
+
+
+class ProductBook:
+    """
+    A class pricing a book of vanilla options stored in columns (struct of arrays), such as loaded from a CSV
+    or Parquet file. The options sharing an underlying and a maturity are priced on a single simulation :
+    the calls and the puts of the group are each priced at once, from the sorted terminal prices of the simulation.
+    With a VolSurface, the options are also grouped by strike, the surface being read at each strike.
+
+    Attributes:
+        __trades (pd.DataFrame): The trade definitions, with the columns underlying, option_type, strike,
+            maturity (in years) and optionally trade_id, notional and position (long or short).
+        __market (dict): The market inputs of the simulations (spot, rates, volatility, nb_simulations, nb_steps,
+            and dividend, forward_rate or domestic_rate depending on the underlyings).
+        __strikes (np.array): The strike of each trade.
+        __calls (np.array): If each trade is a call.
+        __quantities (np.array): The signed notional of each trade.
+        __results (pd.DataFrame): The trade definitions with their unit price, exercise probability and value.
+    """
+
+    def __init__(self, trades: pd.DataFrame, market: dict) -> None:
+        """
+        Initialize a ProductBook object.
+
+        Args:
+            trades (pd.DataFrame): The trade definitions.
+            market (dict): The market inputs of the simulations.
+
+        Raises:
+            Exception: If a column is missing, or an option type or a position is unknown.
+        """
+
+        for column in TRADE_COLUMNS:
+            if column not in trades.columns:
+                raise Exception("Missing inputs : " + column)
+        self.__trades = trades.reset_index(drop=True)
+        self.__market = market
+
+        option_types = self.__trades["option_type"].str.lower().to_numpy()
+        if not np.isin(option_types, [CALL, PUT]).all():
+            raise Exception("Unknown option type, should be call or put.")
+        self.__strikes = self.__trades["strike"].to_numpy(dtype=float)
+        self.__calls = option_types == CALL
+
+        notionals = self.__trades[NOTIONAL_COLUMN].to_numpy(dtype=float) if NOTIONAL_COLUMN in self.__trades.columns \
+            else np.ones(len(self.__trades))
+        positions = self.__trades[POSITION_COLUMN].str.lower().to_numpy() if POSITION_COLUMN in self.__trades.columns \
+            else np.full(len(self.__trades), LONG)
+        if not np.isin(positions, [LONG, SHORT]).all():
+            raise Exception("Input Error : Please select if product is long or short.")
+        self.__quantities = np.where(positions == SHORT, -notionals, notionals)
+        self.__results = None
+
+    @classmethod
+    def from_file(cls, path: str, market: dict):
+        """
+        Load a product book from a CSV or Parquet file.
+
+        Args:
+            path (str): The path of the file.
+            market (dict): The market inputs of the simulations.
+
+        Returns:
+            ProductBook: The product book.
+        """
+
+        if path.endswith(".parquet"):
+            trades = pd.read_parquet(path)
+        else:
+            trades = pd.read_csv(path)
+        return cls(trades, market)
+
+    def _input(self, code):
+        """ Market input, raising if it is missing. """
+        if code in self.__market:
+            return self.__market[code]
+        raise Exception("Missing inputs : " + code)
+
+    def _groups(self) -> list:
+        """ Positions of the trades priced on each simulation. """
+        keys = ["underlying", "maturity"]
+        if isinstance(self._input("volatility"), VolSurface):
+            keys.append("strike")
+        return list(self.__trades.groupby(keys, sort=False).indices.items())
+
+    def _price_group(self, underlying: str, maturity: Maturity, positions: np.ndarray) -> tuple:
+        """
+        Price the trades of one underlying and maturity on a single simulation.
+
+        Args:
+            underlying (str): The underlying of the trades.
+            maturity (Maturity): The maturity of the trades.
+            positions (np.array): The positions of the trades in the book.
+
+        Returns:
+            tuple: The unit prices and the exercise probabilities of the trades.
+        """
+
+        strikes = self.__strikes[positions]
+        inputs = {"option_type": CALL, "strike": strikes[0]}
+        if underlying == FOREX:
+            # Strikes compared to the simulated prices, as in VanillaOption
+            domestic_rate = self._input("domestic_rate")
+            inputs.update({"domestic_rate": domestic_rate, "maturity": maturity})
+            strikes = strikes * np.exp(domestic_rate * maturity.maturity())
+        # Product giving the underlying adjustment and the strike a volatility surface is read at
+        template = VanillaOption(underlying=underlying, inputs=inputs)
+        process = BrownianMotion({**self.__market, "maturity": maturity})
+
+        prices, probas = np.empty(len(positions)), np.empty(len(positions))
+        calls = self.__calls[positions]
+        for option_type, mask in [(CALL, calls), (PUT, ~calls)]:
+            if mask.any():
+                strip = process.strike_strip(strikes[mask], option_type, template)
+                prices[mask], probas[mask] = strip["price"], strip["proba"]
+        return prices, probas
+
+    def run(self) -> pd.DataFrame:
+        """
+        Price the trades.
+
+        Returns:
+            pd.DataFrame: The trade definitions with the columns price (of one option), proba and value
+                (price times signed notional), aligned with the trades.
+        """
+
+        if self.__results is None:
+            results = np.full((len(self.__trades), len(RESULT_COLUMNS)), np.nan)
+            for key, positions in self._groups():
+                underlying, maturity = key[0], key[1]
+                prices, probas = self._price_group(underlying.lower(), Maturity(maturity_in_years=maturity), positions)
+                results[positions, 0], results[positions, 1] = prices, probas
+            results[:, 2] = results[:, 0] * self.__quantities
+            self.__results = self.__trades.assign(**dict(zip(RESULT_COLUMNS, results.T)))
+        return self.__results
+
+    def values(self) -> pd.Series:
+        """
+        Value of each trade.
+
+        Returns:
+            pd.Series: The values, indexed by trade id (by position if the book has no trade_id column).
+        """
+
+        results = self.run()
+        index = results[TRADE_ID_COLUMN] if TRADE_ID_COLUMN in results.columns else results.index
+        return pd.Series(results["value"].to_numpy(), index=index, name="value")
+
+    def to_file(self, path: str) -> None:
+        """
+        Write the results to a CSV or Parquet file.
+
+        Args:
+            path (str): The path of the file.
+        """
+
+        results = self.run()
+        if path.endswith(".parquet"):
+            results.to_parquet(path, index=False)
+        else:
+            results.to_csv(path, index=False)
@@ -1,8 +1,23 @@
+import functools
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
 from Products.bond import FixedBond, ZcBond
+from Market.maturity import Maturity
 from Market.brownianMotion import BrownianMotion
 from Products.optionalProducts import VanillaOption, Spread, ButterflySpread, OptionProducts, BinaryOption, KnockOutOption, KnockInOption
 from Products.structuredProducts import CertificatOutperformance, ReverseConvertible
 from RisksAnalysis.risks import BondRisk, OptionRisk, SpreadRisk, ButterflySpreadRisk, OptionProductsRisk, StructuredProductsRisk
+from RisksAnalysis.monteCarloRisks import MonteCarloRisk, BumpRisk
+from Execution.pricingRequests import PricingRequest
+from Execution.diskCache import DiskCache
 
 ### Option type : 
 SHARE_NO_DIV, SHARE_DIV  = "no dividend share", "dividend share"
@@ -14,11 +29,390 @@ KNOCKOUT, KNOCKIN = "knock_out", "knock_in"
 STRADDLE, STRANGLE, STRIP, STRAP = "straddle", "strangle", "strip", "strap"
 
 
+def _canonical(value):
+    """
+    Hashable value identifying an input : maturities by their length in years, objects with a key method
+    (Rate, VolSurface) by their key, and containers element by element.
+
+    Raises:
+        TypeError: If the value cannot be made hashable.
+    """
+    if isinstance(value, (str, int, float, bool, type(None))):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Maturity):
+        return ("maturity", value.maturity())
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, _canonical(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonical(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return ("array", value.shape, value.dtype.str, value.tobytes())
+    if callable(getattr(value, "key", None)):
+        return (type(value).__name__, value.key())
+    hash(value)
+    return value
+
+
+def _size(result: Mapping) -> int:
+    """ Approximate memory size of a result in bytes (with the memory it retains for a Result). """
+    if isinstance(result, Result):
+        return result.nbytes()
+    return sys.getsizeof(result) + sum(item.nbytes if isinstance(item, np.ndarray) else sys.getsizeof(item)
+                                       for item in result.values())
+
+
+def _lazy(function, *dependencies):
+    """
+    Zero-argument function computing its value once, after its dependencies (e.g. a risk object
+    built on a process only once the product has been priced on it).
+    """
+    @functools.cache
+    def value():
+        for dependency in dependencies:
+            dependency()
+        return function()
+    return value
+
+
+class Result(Mapping):
+    """
+    A lazy result of a pricing : each measure (price, proba, greeks...) is computed on its first access,
+    at full precision, and kept. Only the measures read by the caller are computed ; they are rounded
+    only for display.
+
+    Measures are read as items (result["delta"]) or attributes (result.delta).
+
+    Until every measure is computed, the functions computing them keep their inputs (simulations, risk
+    objects) alive : these are charged to the memory size of the result, and released with the functions
+    once the last measure is computed.
+
+    Attributes:
+        __measures (dict): The functions computing the measures not computed yet, by name.
+        __values (dict): The computed measures, by name.
+        __names (tuple): The names of the measures, in order.
+        __retained (tuple): The objects kept alive by the functions (processes, arrays).
+        __decimals (int): The number of decimals of the displayed measures.
+        __save (callable): The function saving each new measure (e.g. to a disk cache), None if not persisted.
+        __lock (threading.RLock): The lock computing each measure once across threads.
+    """
+
+    def __init__(self, measures: dict, decimals: int = 2, retained: tuple = ()) -> None:
+        """
+        Initialize a Result object.
+
+        Args:
+            measures (dict): The zero-argument functions computing the measures, or their values, by name.
+            decimals (int, optional): The number of decimals of the displayed measures. Defaults to 2.
+            retained (tuple, optional): The objects kept alive by the functions : arrays, or objects listing
+                their arrays with an _arrays method (e.g. BrownianMotion). Defaults to none.
+        """
+        self.__measures = {name: measure for name, measure in measures.items() if callable(measure)}
+        self.__values = {name: measure for name, measure in measures.items() if not callable(measure)}
+        self.__names = tuple(measures)
+        self.__retained = tuple(retained) if self.__measures else ()
+        self.__decimals = decimals
+        self.__save = None
+        self.__lock = threading.RLock()
+
+    def __getitem__(self, name: str):
+        if name in self.__values:
+            return self.__values[name]
+        with self.__lock:
+            if name not in self.__values:
+                if name not in self.__measures:
+                    raise KeyError(name)
+                self.__values[name] = self.__measures.pop(name)()
+                if not self.__measures:
+                    # Every measure is computed : release the inputs of the functions
+                    self.__retained = ()
+                if self.__save is not None:
+                    self.__save({name: self.__values[name]})
+            return self.__values[name]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __iter__(self):
+        return iter(self.__names)
+
+    def __len__(self) -> int:
+        return len(self.__names)
+
+    def persist(self, stored: dict, save) -> None:
+        """
+        Take the measures stored by an earlier pricing instead of computing them, and save each measure
+        computed from now on.
+
+        Args:
+            stored (dict): The stored measures, by name (the unknown ones are ignored).
+            save (callable): The function saving a dictionary of new measures.
+        """
+        with self.__lock:
+            for name in list(self.__measures):
+                if name in stored:
+                    del self.__measures[name]
+                    self.__values[name] = stored[name]
+            if not self.__measures:
+                self.__retained = ()
+            self.__save = save
+
+    def computed(self) -> dict:
+        """ Measures computed so far, by name. """
+        with self.__lock:
+            return dict(self.__values)
+
+    def complete(self) -> bool:
+        """ If every measure is computed. """
+        return not self.__measures
+
+    def nbytes(self) -> int:
+        """ Approximate memory size in bytes of the computed measures and of the retained objects. """
+        arrays, size = {}, sys.getsizeof(self.__values)
+        for value in list(self.__values.values()):
+            if isinstance(value, np.ndarray):
+                arrays[id(value)] = value
+            else:
+                size += sys.getsizeof(value)
+        for retained in self.__retained:
+            for array in (retained._arrays() if hasattr(retained, "_arrays") else [retained]):
+                arrays[id(array)] = array
+        # Arrays shared by measures and retained objects (e.g. simulated paths) are counted once
+        return size + sum(array.nbytes for array in arrays.values())
+
+    def evaluate(self) -> dict:
+        """ Every measure, by name (computing the missing ones). """
+        return {name: self[name] for name in self.__names}
+
+    def rounded(self, decimals: int = None) -> dict:
+        """
+        Every measure, numbers being rounded for display.
+
+        Args:
+            decimals (int, optional): The number of decimals. Defaults to the one of the result.
+
+        Returns:
+            dict: The measures, by name.
+        """
+        decimals = self.__decimals if decimals is None else decimals
+        return {name: round(value, decimals) if isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+                else value for name, value in self.evaluate().items()}
+
+    def __repr__(self) -> str:
+        return repr(self.rounded())
+
+
+class ResultCache:
+    """
+    A thread-safe cache of pricing results, keyed on the product type and the canonical form of its inputs
+    (product terms, market data and simulation settings). The least recently used results are evicted
+    beyond a number of entries or a total size, and results expire after a time to live.
+
+    The size of a lazy Result grows as its measures are computed (and the simulation behind them is run) :
+    the sizes of the incomplete results are measured again on every access to the cache.
+
+    Attributes:
+        __max_entries (int): The maximum number of results.
+        __max_bytes (int): The maximum total size of the results in bytes.
+        __ttl (float): The time to live of a result in seconds (None for no expiry).
+        __entries (OrderedDict): The results, their size, expiry time and if the size is final, by key,
+            least recently used first.
+        __bytes (int): The total size of the results.
+        __lock (threading.Lock): The lock protecting the entries and the counters.
+        hits (int): The number of results found in the cache.
+        misses (int): The number of results computed.
+        evictions (int): The number of results evicted or expired.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 2 ** 20, ttl: float = None) -> None:
+        """
+        Initialize a ResultCache object.
+
+        Args:
+            max_entries (int, optional): The maximum number of results. Defaults to 256.
+            max_bytes (int, optional): The maximum total size of the results in bytes. Defaults to 256 MB.
+            ttl (float, optional): The time to live of a result in seconds. Defaults to None (no expiry).
+        """
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+        self.hits, self.misses, self.evictions = 0, 0, 0
+
+    @staticmethod
+    def key(product_type: str, inputs) -> tuple:
+        """
+        Cache key of a pricing.
+
+        Args:
+            product_type (str): The product type (name of the Run method).
+            inputs (dict or PricingRequest): The inputs.
+
+        Returns:
+            tuple: The key (None if the inputs cannot be made hashable).
+        """
+        try:
+            return (product_type, _canonical(inputs))
+        except TypeError:
+            return None
+
+    def _remove(self, key) -> None:
+        """ Remove an entry (the lock being held). """
+        _, size, _, _ = self.__entries.pop(key)
+        self.__bytes -= size
+        self.evictions += 1
+
+    def _refresh(self) -> None:
+        """ Measure again the size of the incomplete results, then evict the least recently used ones if needed (the lock being held). """
+        for key in [key for key, entry in self.__entries.items() if not entry[3]]:
+            result, size, expiry, _ = self.__entries[key]
+            new_size = _size(result)
+            self.__entries[key] = (result, new_size, expiry, result.complete())
+            self.__bytes += new_size - size
+        while len(self.__entries) > self.__max_entries or self.__bytes > self.__max_bytes:
+            self._remove(next(iter(self.__entries)))
+
+    def get(self, key):
+        """
+        Result of a key, if cached and not expired.
+
+        Args:
+            key (tuple): The cache key.
+
+        Returns:
+            dict: The result (None if missing).
+        """
+        with self.__lock:
+            self._refresh()
+            entry = self.__entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, result: dict) -> None:
+        """
+        Cache a result, evicting the least recently used ones if needed.
+
+        Args:
+            key (tuple): The cache key.
+            result (dict): The result.
+        """
+        size = _size(result)
+        expiry = None if self.__ttl is None else time.monotonic() + self.__ttl
+        with self.__lock:
+            if key in self.__entries:
+                self._remove(key)
+                self.evictions -= 1
+            if size > self.__max_bytes:
+                return
+            self.__entries[key] = (result, size, expiry, not isinstance(result, Result) or result.complete())
+            self.__bytes += size
+            self._refresh()
+
+    def clear(self) -> None:
+        """ Remove every result (e.g. on a new market snapshot). """
+        with self.__lock:
+            self.__entries.clear()
+            self.__bytes = 0
+
+    def stats(self) -> dict:
+        """ Numbers of hits, misses, evictions and cached results, and total size of the results. """
+        with self.__lock:
+            self._refresh()
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self.__entries), "bytes": self.__bytes}
+
+
+# Results shared by every Run object
+RESULT_CACHE = ResultCache()
+
+PRICER_PACKAGES = ["Market", "Products", "RisksAnalysis"]
+
+
+def _pricer_version() -> str:
+    """
+    Version of the pricers, hashed from their sources (the pricing packages and this module) : part of the keys
+    of the disk cache, so that results stored by another version of the pricers are not served after a restart.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    files = [os.path.join(package, name) for package in PRICER_PACKAGES
+             for name in sorted(os.listdir(os.path.join(root, package)))
+             if name.endswith(".py") and not name.startswith("test_")]
+    digest = hashlib.sha256()
+    for file in files + [os.path.relpath(os.path.abspath(__file__), root)]:
+        digest.update(file.encode())
+        with open(os.path.join(root, file), "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()[:16]
+
+
+PRICER_VERSION = _pricer_version()
+
+
+def _cached(method):
+    """ Serve the results of a Run method from the caches of the Run object (in memory, then on disk). """
+    @functools.wraps(method)
+    def wrapper(self, inputs):
+        if not isinstance(inputs, PricingRequest):
+            # The measures are computed lazily : snapshot the inputs, so that the result (and its key) do not
+            # change with the dictionary of the caller
+            inputs = dict(inputs)
+        if self._cache is None and self._disk_cache is None:
+            return method(self, inputs)
+        key = ResultCache.key(method.__name__, inputs)
+        if key is None:
+            return method(self, inputs)
+        result = None if self._cache is None else self._cache.get(key)
+        if result is None:
+            result = method(self, inputs)
+            if self._disk_cache is not None:
+                # Measures stored by earlier runs are read from disk, the others are still computed on their
+                # first access, and added to the stored ones
+                disk_key = self._disk_cache.key(PRICER_VERSION, *key)
+                result.persist(self._disk_cache.get(disk_key) or {},
+                               functools.partial(self._disk_cache.update, disk_key))
+            if self._cache is not None:
+                self._cache.put(key, result)
+        # Results are read-only : the cached one is shared, with the measures computed so far
+        return result
+    return wrapper
+
 
 class Run :
+    """
+    A class computing the data (price and greeks) of each type of product.
+
+    Attributes:
+        _cache (ResultCache): The cache of the results in memory (None to disable it).
+        _disk_cache (DiskCache): The persistent cache of the results (None to disable it).
+    """
     
-    def __init__(self) :
-        pass 
+    def __init__(self, cache: ResultCache = RESULT_CACHE, disk_cache: DiskCache = None) :
+        """
+        Initialize a Run object.
+
+        Args:
+            cache (ResultCache, optional): The cache of the results in memory. Defaults to the cache shared
+                by every Run object, None to disable it.
+            disk_cache (DiskCache, optional): The persistent cache of the results, kept across restarts.
+                Defaults to None.
+        """
+        self._cache = cache
+        self._disk_cache = disk_cache
         
     def _input(self, code, inputs):
         """
@@ -38,16 +432,30 @@ class Run :
             return inputs[code]
         raise Exception("Missing inputs : " + code)
 
-    def zc_bond(self, inputs: dict) -> dict:
+    def run(self, request: PricingRequest) -> Result:
+        """
+        Price a request with the method of its product type.
+
+        Args:
+            request (PricingRequest): The pricing request.
+
+        Returns:
+            Result: The data of the product.
+        """
+        return getattr(self, request.product_type)(request)
+
+    @_cached
+    def zc_bond(self, inputs: dict) -> Result:
         """ Returns data for a zero-coupon bond. """
         rate = self._input("rate", inputs)
         maturity = self._input("maturity", inputs)
         nominal = self._input("nominal", inputs)
 
         zc_bond = ZcBond(rate=rate, maturity=maturity, nominal=nominal)
-        return {"price": round(zc_bond.price(), 2)}
+        return Result({"price": zc_bond.price})
 
-    def fixed_bond(self, inputs: dict) -> dict:
+    @_cached
+    def fixed_bond(self, inputs: dict) -> Result:
         """ Returns data for a a fixed-rate bond. """
         coupon_rate = self._input("coupon_rate", inputs)
         maturity = self._input("maturity", inputs)
@@ -57,16 +465,15 @@ class Run :
 
         fixed_bond = FixedBond(coupon_rate=coupon_rate, maturity=maturity, nominal=nominal,
                                nb_coupon=nb_coupon, rate=rate)
-        price, ytm = fixed_bond.price(), fixed_bond.ytm()
-        risk = BondRisk(bond=fixed_bond)
-        duration, convexity = risk.duration(), risk.convexity()
-        return {"price": round(price, 2),
-                "ytm": round(ytm, 2),
-                "duration": round(duration, 2),
-                "convexity": round(convexity, 2)}
+        risk = _lazy(lambda: BondRisk(bond=fixed_bond))
+        return Result({"price": fixed_bond.price,
+                       "ytm": fixed_bond.ytm,
+                       "duration": lambda: risk().duration(),
+                       "convexity": lambda: risk().convexity()})
                 
         
-    def vanilla_option(self, inputs:dict) -> dict : 
+    @_cached
+    def vanilla_option(self, inputs:dict) -> Result : 
         """ Returns data for a vanilla option product."""
         underlying = self._input("underlying", inputs)
         strike = self._input("strike", inputs)
@@ -84,19 +491,26 @@ class Run :
             # For every others option type :
             option = VanillaOption(underlying=underlying, inputs={"option_type":option_type, "strike":strike})
             
-        option_process = process.pricing(option)
-        risks = OptionRisk(option, process)
-        
-        return {"price":round(option_process['price'], 2), 
-                "proba":round(option_process['proba'], 2), 
-                "payoff":round(option.payoff(option_process['price']), 2),
-                "delta":round(risks.delta(), 2), 
-                "gamma":round(risks.gamma(), 2), 
-                "vega":round(risks.vega(), 2), 
-                "theta":round(risks.theta(), 2), 
-                "rho":round(risks.rho(), 2)}
-        
-    def spread(self, inputs:dict) -> dict :
+        option_process = _lazy(lambda: process.pricing(option))
+        risks = _lazy(lambda: OptionRisk(option, process), option_process)
+        
+        if underlying in [SHARE_DIV, CAPITALIZED_INDEX, FOREX] :
+            # Greeks consistent with the simulated (adjusted) underlying :
+            greeks = _lazy(lambda: MonteCarloRisk(option, process), option_process)
+        else :
+            greeks = risks
+        
+        return Result({"price":lambda: option_process()['price'], 
+                       "proba":lambda: option_process()['proba'], 
+                       "payoff":lambda: option.payoff(option_process()['price']),
+                       "delta":lambda: greeks().delta(), 
+                       "gamma":lambda: risks().gamma(), 
+                       "vega":lambda: greeks().vega(), 
+                       "theta":lambda: risks().theta(), 
+                       "rho":lambda: greeks().rho()}, retained=(process,))
+        
+    @_cached
+    def spread(self, inputs:dict) -> Result :
         option_type = self._input("option_type", inputs)
         short_strike = self._input("short_strike", inputs)
         long_strike = self._input("long_strike", inputs)
@@ -115,21 +529,25 @@ class Run :
             long_option = VanillaOption(underlying=underlying, inputs={"option_type":option_type, "strike":long_strike}) 
         
         process = BrownianMotion(inputs=inputs)
-        short_process = process.pricing(short_option)
-        long_process = process.pricing(long_option)
-        
-        spread_type = option_type + " spread"
-        spread = Spread(spread_type, {"long leg": long_option, "long leg price":long_process['price'], "short leg": short_option, "short leg price": short_process['price']})
-        risks = SpreadRisk(spread, process)
-        
-        return {"price":round(spread.price(), 2), 
-                "delta":round(risks.delta(), 2), 
-                "gamma":round(risks.gamma(), 2), 
-                "vega":round(risks.vega(), 2), 
-                "theta":round(risks.theta(), 2), 
-                "rho":round(risks.rho(), 2)}
+        
+        def build_spread():
+            short_process = process.pricing(short_option)
+            long_process = process.pricing(long_option)
+            spread_type = option_type + " spread"
+            return Spread(spread_type, {"long leg": long_option, "long leg price":long_process['price'], "short leg": short_option, "short leg price": short_process['price']})
+        
+        spread = _lazy(build_spread)
+        risks = _lazy(lambda: SpreadRisk(spread(), process))
+        
+        return Result({"price":lambda: spread().price(), 
+                       "delta":lambda: risks().delta(), 
+                       "gamma":lambda: risks().gamma(), 
+                       "vega":lambda: risks().vega(), 
+                       "theta":lambda: risks().theta(), 
+                       "rho":lambda: risks().rho()}, retained=(process,))
     
-    def butterfly(self, inputs:dict) -> dict :
+    @_cached
+    def butterfly(self, inputs:dict) -> Result :
         """ Returns data for a butterfly product."""
         strike_1 = self._input("strike_1", inputs)
         strike_2 = self._input("strike_2", inputs)
@@ -152,21 +570,26 @@ class Run :
             long_put = VanillaOption(underlying=underlying, inputs={"option_type":"put", "strike":strike_3}) 
         
         process = BrownianMotion(inputs=inputs)
-        short_call_process, long_call_process = process.pricing(short_call), process.pricing(long_call)
-        short_put_process, long_put_process = process.pricing(short_put), process.pricing(long_put)
-        call_spread = Spread("call spread", {"long leg": long_call, "long leg price":long_call_process['price'], "short leg": short_call, "short leg price": short_call_process['price']})
-        put_spread = Spread("put spread", {"long leg": long_put, "long leg price":long_put_process['price'], "short leg": short_put, "short leg price": short_put_process['price']})
-        butterfly = ButterflySpread({"put spread":put_spread, "call spread":call_spread})
-        risks = ButterflySpreadRisk(butterfly, process)
-        
-        return {"price":round(butterfly.price(), 2), 
-                "delta":round(risks.delta(), 2), 
-                "gamma":round(risks.gamma(), 2), 
-                "vega":round(risks.vega(), 2), 
-                "theta":round(risks.theta(), 2), 
-                "rho":round(risks.rho(), 2)}
-        
-    def option_strategy(self, inputs:dict) -> dict :
+        
+        def build_butterfly():
+            short_call_process, long_call_process = process.pricing(short_call), process.pricing(long_call)
+            short_put_process, long_put_process = process.pricing(short_put), process.pricing(long_put)
+            call_spread = Spread("call spread", {"long leg": long_call, "long leg price":long_call_process['price'], "short leg": short_call, "short leg price": short_call_process['price']})
+            put_spread = Spread("put spread", {"long leg": long_put, "long leg price":long_put_process['price'], "short leg": short_put, "short leg price": short_put_process['price']})
+            return ButterflySpread({"put spread":put_spread, "call spread":call_spread})
+        
+        butterfly = _lazy(build_butterfly)
+        risks = _lazy(lambda: ButterflySpreadRisk(butterfly(), process))
+        
+        return Result({"price":lambda: butterfly().price(), 
+                       "delta":lambda: risks().delta(), 
+                       "gamma":lambda: risks().gamma(), 
+                       "vega":lambda: risks().vega(), 
+                       "theta":lambda: risks().theta(), 
+                       "rho":lambda: risks().rho()}, retained=(process,))
+        
+    @_cached
+    def option_strategy(self, inputs:dict) -> Result :
         """ Returns data for a option strategy product."""
         call_strike = self._input("call_strike", inputs)
         put_strike = self._input("put_strike", inputs)
@@ -187,21 +610,25 @@ class Run :
             put = VanillaOption(underlying=underlying, inputs={"option_type":"put", "strike":put_strike}) 
         
         process = BrownianMotion(inputs=inputs)
-        call_process = process.pricing(call)
-        put_process = process.pricing(put)
         
-        strategy = OptionProducts(option_type, option_position, {"call":call,"call price": call_process['price'],"put":put,"put price":put_process['price']})
-        risks = OptionProductsRisk(strategy, process)
+        def build_strategy():
+            call_process = process.pricing(call)
+            put_process = process.pricing(put)
+            return OptionProducts(option_type, option_position, {"call":call,"call price": call_process['price'],"put":put,"put price":put_process['price']})
+        
+        strategy = _lazy(build_strategy)
+        risks = _lazy(lambda: OptionProductsRisk(strategy(), process))
         
-        return {"price":round(strategy.price(), 2), 
-                "delta":round(risks.delta(), 2), 
-                "gamma":round(risks.gamma(), 2), 
-                "vega":round(risks.vega(), 2), 
-                "theta":round(risks.theta(), 2), 
-                "rho":round(risks.rho(), 2)}
+        return Result({"price":lambda: strategy().price(), 
+                       "delta":lambda: risks().delta(), 
+                       "gamma":lambda: risks().gamma(), 
+                       "vega":lambda: risks().vega(), 
+                       "theta":lambda: risks().theta(), 
+                       "rho":lambda: risks().rho()}, retained=(process,))
         
     
-    def binary_option(self, inputs:dict) -> dict :
+    @_cached
+    def binary_option(self, inputs:dict) -> Result :
         """ Returns data for a binary option product."""
         strike = self._input("strike", inputs)
         option_type = self._input("option_type", inputs).lower()
@@ -221,12 +648,20 @@ class Run :
             lower_barrier = self._input("lower_barrier", inputs)
             option = BinaryOption({"strike":strike, "option_type":option_type, "payoff_amount": payoff_amount, "upper_barrier":upper_barrier, "lower_barrier":lower_barrier})
         
-        option_process = process.pricing(option)
+        option_process = _lazy(lambda: process.pricing(option))
+        risks = _lazy(lambda: MonteCarloRisk(option, process), option_process)
+        bump_risks = _lazy(lambda: BumpRisk(option, process), option_process)
         
-        return {"price":round(option_process['price'], 2), 
-                "proba":round(option_process['proba'], 2)}
+        return Result({"price":lambda: option_process()['price'], 
+                       "proba":lambda: option_process()['proba'], 
+                       "delta":lambda: risks().delta(), 
+                       "gamma":lambda: bump_risks().gamma(), 
+                       "vega":lambda: risks().vega(), 
+                       "theta":lambda: bump_risks().theta(), 
+                       "rho":lambda: risks().rho()}, retained=(process,))
         
-    def barrier_option(self, inputs) -> dict :
+    @_cached
+    def barrier_option(self, inputs) -> Result :
         """ Returns data for a barrier option product."""
         strike = self._input("strike", inputs)
         barrier = self._input("barrier", inputs)
@@ -238,13 +673,22 @@ class Run :
             option = KnockInOption({"barrier":barrier, "strike":strike})
             
         process = BrownianMotion(inputs=inputs)
-        option_process = process.pricing(option, monte_carlo=True)
-        price_paths = process.paths_plot        
-        return {"price":round(option_process['price'], 2), 
-                "proba":round(option_process['proba'], 2), 
-                "paths": price_paths}
-        
-    def reverse_convertible(self, inputs) -> dict :
+        option_process = _lazy(lambda: process.pricing(option, monte_carlo=True))
+        # Paths of the pricing simulation, kept before any risk computation
+        price_paths = _lazy(lambda: process.paths_plot, option_process)
+        risks = _lazy(lambda: MonteCarloRisk(option, process, monte_carlo=True), price_paths)
+        bump_risks = _lazy(lambda: BumpRisk(option, process, monte_carlo=True), price_paths)
+        return Result({"price":lambda: option_process()['price'], 
+                       "proba":lambda: option_process()['proba'], 
+                       "delta":lambda: risks().delta(), 
+                       "gamma":lambda: bump_risks().gamma(), 
+                       "vega":lambda: risks().vega(), 
+                       "theta":lambda: bump_risks().theta(), 
+                       "rho":lambda: risks().rho(), 
+                       "paths": price_paths}, retained=(process,))
+        
+    @_cached
+    def reverse_convertible(self, inputs) -> Result :
         """ Returns data for a reverse convertible product."""
         underlying = self._input("underlying", inputs)
         strike = self._input("strike", inputs)
@@ -266,21 +710,25 @@ class Run :
         bond = FixedBond(coupon_rate=coupon_rate, maturity=maturity, nominal=nominal, nb_coupon=nb_coupon, rate=rate)
         
         process = BrownianMotion(inputs=inputs)
-        put_process = process.pricing(put)
         
-        product = ReverseConvertible({"put":put, "put price": put_process["price"], 
-                         "bond":bond, "bond price": bond.price()})
-        risks = StructuredProductsRisk(type="reverse convertible", process=process, convertible=product)
+        def build_product():
+            put_process = process.pricing(put)
+            return ReverseConvertible({"put":put, "put price": put_process["price"], 
+                                       "bond":bond, "bond price": bond.price()})
         
-        return {"price":round(product.price(), 2), 
-                "delta":round(risks.delta(), 2), 
-                "gamma":round(risks.gamma(), 2), 
-                "vega":round(risks.vega(), 2), 
-                "theta":round(risks.theta(), 2), 
-                "rho":round(risks.rho(), 2)}
+        product = _lazy(build_product)
+        risks = _lazy(lambda: StructuredProductsRisk(type="reverse convertible", process=process, convertible=product()))
+        
+        return Result({"price":lambda: product().price(), 
+                       "delta":lambda: risks().delta(), 
+                       "gamma":lambda: risks().gamma(), 
+                       "vega":lambda: risks().vega(), 
+                       "theta":lambda: risks().theta(), 
+                       "rho":lambda: risks().rho()}, retained=(process,))
         
     
-    def certificat_outperformance(self, inputs) -> dict :
+    @_cached
+    def certificat_outperformance(self, inputs) -> Result :
         """ Returns data for a certificat out performance product."""
         underlying = self._input("underlying", inputs)
         strike = self._input("strike", inputs)
@@ -297,17 +745,19 @@ class Run :
             zero_call = VanillaOption(underlying=underlying, inputs={"option_type":"call", "strike":0})  
         
         process = BrownianMotion(inputs=inputs)
-        call_process = process.pricing(call)
-        zero_process = process.pricing(zero_call)
-        
-        product = CertificatOutperformance({"zero strike call": zero_call, "zero strike call price": zero_process["price"],
-                               "call":call, "call price":call_process["price"]})
-        
-        risks = StructuredProductsRisk(type="certificat outperformance", process=process, certificat=product)
         
-        return {"price":round(product.price(), 2), 
-                "delta":round(risks.delta(), 2), 
-                "gamma":round(risks.gamma(), 2), 
-                "vega":round(risks.vega(), 2), 
-                "theta":round(risks.theta(), 2), 
-                "rho":round(risks.rho(), 2)}
\ No newline at end of file
+        def build_product():
+            call_process = process.pricing(call)
+            zero_process = process.pricing(zero_call)
+            return CertificatOutperformance({"zero strike call": zero_call, "zero strike call price": zero_process["price"],
+                                             "call":call, "call price":call_process["price"]})
+        
+        product = _lazy(build_product)
+        risks = _lazy(lambda: StructuredProductsRisk(type="certificat outperformance", process=process, certificat=product()))
+        
+        return Result({"price":lambda: product().price(), 
+                       "delta":lambda: risks().delta(), 
+                       "gamma":lambda: risks().gamma(), 
+                       "vega":lambda: risks().vega(), 
+                       "theta":lambda: risks().theta(), 
+                       "rho":lambda: risks().rho()}, retained=(process,))
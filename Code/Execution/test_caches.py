@@ -0,0 +1,186 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from Market.maturity import Maturity
+from Market.rate import Rate
+from Execution import run
+from Execution.diskCache import DiskCache
+from Execution.run import Run, Result, ResultCache
+
+BARRIER_INPUTS = {"nb_simulations": 200, "nb_steps": 50, "spot": 100, "rates": Rate(0.03, rate_type="compounded"),
+                  "volatility": 0.2, "maturity": Maturity(0.5), "option_type": "knock_out", "barrier": 120,
+                  "strike": 100}
+BOND_INPUTS = {"rate": Rate(0.03, rate_type="compounded"), "maturity": Maturity(1.0), "nominal": 100}
+
+
+######################################### RESULT CACHE (IN MEMORY) : #########################################
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", {"price": 1.0})
+    cache.put("b", {"price": 2.0})
+    assert cache.get("a") == {"price": 1.0}
+    cache.put("c", {"price": 3.0})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_result_cache_evicts_beyond_max_bytes():
+    cache = ResultCache(max_bytes=3 * 8000)
+    for key in range(3):
+        cache.put(key, {"paths": np.zeros(1000)})
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] <= 3 * 8000
+    assert cache.get(0) is None
+
+
+def test_result_cache_expires_results():
+    cache = ResultCache(ttl=0.05)
+    cache.put("a", {"price": 1.0})
+    assert cache.get("a") is not None
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_run_serves_cached_results():
+    cache = ResultCache()
+    first = Run(cache=cache).barrier_option(BARRIER_INPUTS)
+    second = Run(cache=cache).barrier_option(dict(BARRIER_INPUTS))
+    assert second is first
+    assert cache.stats()["hits"] == 1
+
+
+def test_result_cache_charges_lazy_results():
+    cache = ResultCache()
+    result = Run(cache=cache).barrier_option(BARRIER_INPUTS)
+    paths_size = BARRIER_INPUTS["nb_simulations"] * (BARRIER_INPUTS["nb_steps"] + 1) * 8
+
+    # Price only : the simulation retained by the other measures is charged
+    result["price"]
+    assert not result.complete()
+    assert cache.stats()["bytes"] >= paths_size
+
+    # Every measure : the paths are charged once, the simulation being released
+    str(result)
+    assert result.complete()
+    assert paths_size <= cache.stats()["bytes"] < 2 * paths_size
+
+
+def test_result_cache_bounds_lazy_results():
+    paths_size = BARRIER_INPUTS["nb_simulations"] * (BARRIER_INPUTS["nb_steps"] + 1) * 8
+    cache = ResultCache(max_bytes=int(2.5 * paths_size))
+    for strike in [90, 95, 100, 105]:
+        str(Run(cache=cache).barrier_option({**BARRIER_INPUTS, "strike": strike}))
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] <= 2.5 * paths_size
+
+
+def test_result_snapshots_the_inputs():
+    inputs = {**BARRIER_INPUTS, "underlying": "no dividend share", "option_type": "call", "nb_steps": 1}
+    cache = ResultCache()
+    result = Run(cache=cache).vanilla_option(inputs)
+    inputs["spot"] = 150
+    price = Run(cache=None).vanilla_option({**inputs, "spot": 100})["price"]
+    assert result["price"] == price
+    assert Run(cache=cache).vanilla_option({**inputs, "spot": 100})["price"] == price
+
+
+def test_result_computes_measures_once():
+    calls = []
+    result = Result({"price": lambda: calls.append("price") or 1.5, "delta": lambda: calls.append("delta") or 0.5})
+    assert result.price == 1.5 and result["price"] == 1.5
+    assert calls == ["price"] and result.computed() == {"price": 1.5}
+    assert dict(result) == {"price": 1.5, "delta": 0.5} and result.complete()
+
+
+def test_run_is_safe_across_threads():
+    # More simulation grids than cached increments : increments are drawn and evicted concurrently
+    inputs = [{**BARRIER_INPUTS, "nb_simulations": 50 + simulations % 12, "nb_steps": 10} for simulations in range(48)]
+    expected = [Run(cache=None).barrier_option(item)["price"] for item in inputs]
+    cache = ResultCache()
+    with ThreadPoolExecutor(8) as executor:
+        prices = list(executor.map(lambda item: Run(cache=cache).barrier_option(item)["price"], inputs))
+    assert prices == expected
+
+
+########################################### DISK CACHE : ###########################################
+
+def test_disk_cache_survives_restart(tmp_path):
+    DiskCache(str(tmp_path)).put("key", {"price": np.float64(1.5), "proba": 0.25, "paths": np.arange(10.0)})
+    values = DiskCache(str(tmp_path)).get("key")
+    assert values["price"] == 1.5 and values["proba"] == 0.25
+    assert np.array_equal(values["paths"], np.arange(10.0))
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=2 * 8000 + 100)
+    for key in ["a", "b"]:
+        cache.put(key, {"paths": np.zeros(1000)})
+    assert cache.get("a") is not None
+    cache.put("c", {"paths": np.zeros(1000)})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".npy")]) == 2
+
+
+def test_disk_cache_rejects_values_beyond_budget(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    assert not cache.put("key", {"paths": np.zeros(1000)})
+    assert cache.get("key") is None
+
+
+def _put_and_get(directory: str, writer: int) -> int:
+    """ Put and get one key many times, returning the number of inconsistent reads. """
+    cache = DiskCache(directory)
+    inconsistent = 0
+    for _ in range(20):
+        cache.put("key", {"writer": writer, "paths": np.full(50000, float(writer))})
+        values = cache.get("key")
+        if values is not None and not np.all(values["paths"] == values["writer"]):
+            inconsistent += 1
+    return inconsistent
+
+
+def test_disk_cache_concurrent_puts_across_processes(tmp_path):
+    with multiprocessing.Pool(4) as pool:
+        assert pool.starmap(_put_and_get, [(str(tmp_path), writer) for writer in range(4)]) == [0, 0, 0, 0]
+    values = DiskCache(str(tmp_path)).get("key")
+    assert np.all(values["paths"] == values["writer"])
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".npy")]) == 1
+
+
+def test_disk_cache_shared_across_processes(tmp_path):
+    writer = multiprocessing.Process(target=_put_and_get, args=(str(tmp_path), 7))
+    writer.start()
+    writer.join()
+    assert writer.exitcode == 0
+    assert DiskCache(str(tmp_path)).get("key")["writer"] == 7
+
+
+def test_disk_cache_serves_the_results_of_the_same_pricers(tmp_path, monkeypatch):
+    disk_cache = DiskCache(str(tmp_path))
+    key = ResultCache.key("zc_bond", BOND_INPUTS)
+    disk_cache.put(disk_cache.key(run.PRICER_VERSION, *key), {"price": -1.0})
+    assert Run(cache=None, disk_cache=disk_cache).zc_bond(BOND_INPUTS)["price"] == -1.0
+
+    monkeypatch.setattr(run, "PRICER_VERSION", "another version")
+    assert Run(cache=None, disk_cache=disk_cache).zc_bond(BOND_INPUTS)["price"] == Run(cache=None).zc_bond(BOND_INPUTS)["price"]
+
+
+def test_disk_cache_keeps_results_lazy(tmp_path):
+    disk_cache = DiskCache(str(tmp_path))
+    disk_key = disk_cache.key(run.PRICER_VERSION, *ResultCache.key("barrier_option", BARRIER_INPUTS))
+    price = Run(cache=None, disk_cache=disk_cache).barrier_option(BARRIER_INPUTS)["price"]
+    assert disk_cache.get(disk_key) == {"price": price}
+
+    # Stored measures are read from disk, the other ones computed on their first access and added
+    result = Run(cache=None, disk_cache=disk_cache).barrier_option(BARRIER_INPUTS)
+    assert result.computed() == {"price": price} and not result.complete()
+    delta = result["delta"]
+    assert disk_cache.get(disk_key) == {"price": price, "delta": delta}
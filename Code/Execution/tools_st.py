@@ -6,15 +6,15 @@ def display_greeks(greeks_dict):
     Function to display sensitivity (Greeks) values in a consistent format.
     
     Parameters:
-    - greeks_dict (dict): A dictionary containing sensitivity values (e.g., delta, gamma, vega, rho, theta).
+    - greeks_dict (dict): A dictionary containing sensitivity values (e.g., delta, gamma, vega, rho, theta), rounded for display.
     """
     st.expander("Sensitivities")
     cols = st.columns(5)
-    cols[0].write(f"$\delta$: {greeks_dict['delta']}")
-    cols[1].write(f"$\gamma$: {greeks_dict['gamma']}")
-    cols[2].write(f"$v$: {greeks_dict['vega']}")
-    cols[3].write(f"ρ : {greeks_dict['rho']}")
-    cols[4].write(f"θ : {greeks_dict['theta']}") 
+    cols[0].write(f"$\delta$: {round(greeks_dict['delta'], 2)}")
+    cols[1].write(f"$\gamma$: {round(greeks_dict['gamma'], 2)}")
+    cols[2].write(f"$v$: {round(greeks_dict['vega'], 2)}")
+    cols[3].write(f"ρ : {round(greeks_dict['rho'], 2)}")
+    cols[4].write(f"θ : {round(greeks_dict['theta'], 2)}") 
     
     st.write(
         """
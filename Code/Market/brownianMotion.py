@@ -1,8 +1,10 @@
+import threading
 
 import numpy as np
 import pandas as pd
 
 from Market.maturity import Maturity
+from Market.volSurface import VolSurface
 from Products.optionalProducts import AbstractProduct
 
 SHARE_NO_DIV = "no dividend share"
@@ -11,6 +13,42 @@ FOREX = "forex rate"
 CAPITALIZED_INDEX = "capitalized index"
 NON_CAPITALIZED_INDEX = "non capitalized index"
 CALL, PUT = "call", "put"
+SEED = 272
+
+# Brownian increments shared by every process, keyed by (nb_simulations, nb_steps, maturity, seed)
+_INCREMENTS = {}
+MAX_CACHED_INCREMENTS = 8
+_INCREMENTS_LOCK = threading.Lock()
+# Persistent cache of the increments (e.g. Execution.diskCache.DiskCache), set with set_disk_cache
+_DISK_CACHE = None
+
+
+def set_disk_cache(cache) -> None:
+    """
+    Keep the Brownian increments in a persistent cache, so that they are not drawn again after a restart.
+
+    Args:
+        cache: The persistent cache (with key, get and put methods), None to disable it.
+    """
+    global _DISK_CACHE
+    _DISK_CACHE = cache
+
+
+# Store of memory-mapped simulations (Market.pathStore.PathStore), set with set_path_store
+_PATH_STORE = None
+
+
+def set_path_store(store) -> None:
+    """
+    Keep the Brownian increments and the simulated paths in memory-mapped files, shared by the products
+    and the processes using the same simulation.
+
+    Args:
+        store (PathStore): The path store, None to disable it.
+    """
+    global _PATH_STORE
+    _PATH_STORE = store
+
 
 class BrownianMotion:
     """
@@ -19,7 +57,10 @@ class BrownianMotion:
     Attributes:
         _inputs (dict): A dictionary containing input parameters required for the process.
         _z (pd.DataFrame): DataFrame containing the random component of the process.
+        _z_key (tuple): The simulation grid and seed of _z.
         _prices (np.array): Array containing simulated prices of the underlying asset.
+        _prices_volatility (float): Volatility used to simulate _prices.
+        _index (tuple): Simulated prices, with their sorted terminal values and prefix sums.
 
     """
     
@@ -33,8 +74,25 @@ class BrownianMotion:
     
         self._inputs = inputs
         self._z = None
+        self._z_key = None
         self._prices = None
+        self._prices_volatility = None
+        self._index = None
         self.paths_plot = None
+
+    def _arrays(self) -> list:
+        """
+        Arrays held by the process : simulated prices and their terminal index (e.g. to charge their memory
+        to a cache keeping the process). The random component, shared with the processes using the same
+        simulation grid (and bounded by MAX_CACHED_INCREMENTS), is left out.
+
+        Returns:
+            list: The arrays.
+        """
+        arrays = [self._prices, self.paths_plot]
+        if self._index is not None:
+            arrays.extend(self._index[1:])
+        return [array for array in arrays if array is not None]
         
     def input(self, code):
         """
@@ -55,7 +113,10 @@ class BrownianMotion:
         raise Exception("Missing inputs : " + code)
     
     
-    def _check_underlying(self, product:AbstractProduct, spot:float, rate:float) : 
+    def _check_underlying(self, product:AbstractProduct, spot:float, rate:float, maturity:float=None) : 
+        
+        if maturity is None :
+            maturity = self.input("maturity").maturity()
                 
         if product._option_type != CALL and product._option_type != PUT :
             return spot, rate
@@ -66,7 +127,7 @@ class BrownianMotion:
             if "dividend_date" in self._inputs :
                 spot -= dividend * np.exp(-rate * self.input("dividend_date"))
             else :
-                spot *= np.exp(-dividend * self.input("maturity").maturity())
+                spot *= np.exp(-dividend * maturity)
                 rate -= dividend
 
         elif product._underlying == SHARE_NO_DIV or product._underlying == NON_CAPITALIZED_INDEX :
@@ -76,64 +137,328 @@ class BrownianMotion:
         elif product._underlying == FOREX :
             # For options on exchange rates:
             forward_rate = self.input("forward_rate")
-            spot *= np.exp(-forward_rate * self.input("maturity").maturity())
+            spot *= np.exp(-forward_rate * maturity)
         
         else : 
             raise Exception("Unknown underlying.")
         
         return spot, rate
     
-    def _generate_z(self):
+    def _volatility(self, product:AbstractProduct=None) -> float:
+        """
+        Volatility used to simulate the prices of a product.
+        The "volatility" input is either a single value or a VolSurface, read at the product
+        strike (at the money if the product has no strike) and maturity.
+
+        Args:
+            product (AbstractProduct, optional): Financial product to price. Defaults to None.
+
+        Returns:
+            float: The volatility.
+        """
+        volatility = self.input("volatility")
+        if not isinstance(volatility, VolSurface):
+            return volatility
+        return float(volatility.volatility(self._strike(product), self.input("maturity")))
+    
+    def _strike(self, product:AbstractProduct=None) -> float:
+        """Strike at which a volatility surface is read (at the money if the product has no strike)."""
+        strike = None
+        if product is not None and product._inputs is not None:
+            strike = product._inputs.get("strike")
+        if strike is None:
+            strike = self.input("spot")
+        return strike
+    
+    def _simulation_inputs(self, product:AbstractProduct, monte_carlo:bool=False, maturity:Maturity=None):
+        """
+        Spot and drift rate actually used to simulate the prices of a product.
+
+        Args:
+            product (AbstractProduct): Financial product to price.
+            monte_carlo (bool, optional): If the product is priced on full paths. Defaults to False.
+            maturity (Maturity, optional): Maturity overriding the input one. Defaults to None.
+
+        Returns:
+            tuple: Adjusted spot and continuous drift rate.
+        """
+        spot = self.input("spot")
+        if maturity is None :
+            maturity = self.input("maturity")
+        discount_factor = self.input("rates").discount_factor(maturity)
+        rate = -np.log(discount_factor) / maturity.maturity()
+        if monte_carlo or product is None :
+            return spot, rate
+        return self._check_underlying(product, spot, rate, maturity.maturity())
+    
+    def _generate_z(self, dates:tuple=()):
         """
-        Generate random component of the process.
+        Generate random component of the process. The increments are cached across processes (and threads),
+        so that processes with the same simulation grid and seed share them.
 
+        Args:
+            dates (tuple, optional): Dates in years added to the regular grid of the simulation. Defaults to none.
         """
         if self._z is None:
             nb_simulations = self.input("nb_simulations")
             nb_steps = self.input("nb_steps")
             maturity : Maturity = self.input("maturity")
+            seed = self._inputs.get("seed", SEED)
             dt = maturity.maturity() / nb_steps
-            np.random.seed(272)
-            z = np.random.normal(0.0,1.0,[nb_simulations, nb_steps]) * dt ** 0.5
             col = np.arange(1, nb_steps+1)*dt
-            z = pd.DataFrame(z, columns=col)
-            z.insert(0, 0, 0)
+            dates = np.asarray(dates, dtype=float)
+            dates = np.unique(dates[(dates > 0) & ~np.isclose(dates[:, None], col).any(axis=1)])
+            key = (nb_simulations, nb_steps, maturity.maturity(), seed, tuple(dates))
+            with _INCREMENTS_LOCK:
+                z = _INCREMENTS.get(key)
+            
+            if z is None:
+                if len(dates):
+                    col = np.sort(np.concatenate((col, dates)))
+                store_key = None if _PATH_STORE is None else _PATH_STORE.key("increments", *key)
+                increments = None if store_key is None else _PATH_STORE.load(store_key)
+                if increments is None:
+                    disk_key = None if _DISK_CACHE is None else _DISK_CACHE.key("increments", *key)
+                    stored = None if disk_key is None else _DISK_CACHE.get(disk_key)
+                    if stored is not None:
+                        increments = stored["increments"]
+                    else:
+                        steps = np.diff(col, prepend=0.0) ** 0.5 if len(dates) else dt ** 0.5
+                        increments = np.zeros((nb_simulations, len(col) + 1))
+                        increments[:, 1:] = np.random.RandomState(seed).normal(0.0,1.0,[nb_simulations, len(col)]) * steps
+                        if disk_key is not None:
+                            _DISK_CACHE.put(disk_key, {"increments": increments, "times": np.concatenate(([0.0], col))})
+                    if store_key is not None:
+                        increments = _PATH_STORE.save(store_key, increments)
+                # No copy : a mapped simulation stays shared
+                z = pd.DataFrame(increments, columns=np.concatenate(([0.0], col)), copy=False)
+                # Drawn outside of the lock : the increments of another thread, drawn meanwhile, are kept
+                with _INCREMENTS_LOCK:
+                    if key in _INCREMENTS:
+                        z = _INCREMENTS[key]
+                    else:
+                        if len(_INCREMENTS) >= MAX_CACHED_INCREMENTS:
+                            del _INCREMENTS[next(iter(_INCREMENTS))]
+                        _INCREMENTS[key] = z
             self._z = z
+            self._z_key = key
+        return self._z
+    
+    def _view(self, **inputs):
+        """
+        Process sharing the random component of this one, with some inputs replaced.
+
+        Args:
+            **inputs: The inputs to replace.
+
+        Returns:
+            BrownianMotion: The new process.
+        """
+        process = BrownianMotion({**self._inputs, **inputs})
+        process._z, process._z_key = self._z, self._z_key
+        return process
+    
+    def with_spot(self, spot:float):
+        """
+        Process with a new spot, sharing the random component of this one. GBM prices are proportional
+        to the initial spot, so already simulated prices are rescaled rather than simulated again
+        (except with a discrete dividend, which is subtracted from the spot).
+
+        Args:
+            spot (float): The new spot.
+
+        Returns:
+            BrownianMotion: The new process.
+        """
+        process = self._view(spot=spot)
+        if self._prices is not None and "dividend_date" not in self._inputs:
+            scale = spot / self.input("spot")
+            process._prices = self._prices * scale
+            process._prices_volatility = self._prices_volatility
+            if self._index is not None and self._index[0] is self._prices and scale > 0:
+                # A positive scale keeps the order of the terminal prices : the index is rescaled, not sorted again
+                process._index = (process._prices, self._index[1] * scale, self._index[2] * scale)
+        return process
+    
+    def with_vol(self, volatility):
+        """
+        Process with a new volatility, sharing the random component of this one:
+        the prices are only exponentiated again.
+
+        Args:
+            volatility (float or VolSurface): The new volatility.
+
+        Returns:
+            BrownianMotion: The new process.
+        """
+        return self._view(volatility=volatility)
+    
+    def _rebuild_prices(self, spot, drifts, volatilities, monte_carlo:bool=False, maturity_scale:float=1.0):
+        """
+        Rebuild simulated prices from the cached Brownian increments (common random numbers), with the
+        step drifts and volatilities of _step_parameters (possibly bumped), as in _simulate.
+        Works on floats as well as on array-like objects supporting NumPy ufuncs.
+
+        Args:
+            spot: Initial spot.
+            drifts: Continuous drift rate of each step (or a single one).
+            volatilities: Volatility of each step (or a single one).
+            monte_carlo (bool, optional): If full paths are needed, or terminal values only. Defaults to False.
+            maturity_scale (float, optional): Ratio of the new maturity to the simulated one. Defaults to 1.0.
+
+        Returns:
+            Array of simulated prices (with the initial date for full paths).
+        """
+        z = self._generate_z()
+        increments = z.to_numpy()[:, 1:]
+        dt = np.diff(z.columns.to_numpy(dtype=float))
+        if maturity_scale != 1.0:
+            # Brownian scaling : W(a.t) has the law of sqrt(a).W(t)
+            increments, dt = increments * maturity_scale ** 0.5, dt * maturity_scale
+        log_increments = (drifts - 0.5 * volatilities ** 2) * dt + volatilities * increments
+        if not monte_carlo:
+            return spot * np.exp(log_increments.sum(axis=1))
+        # Log-prices of every date, the initial one being 0
+        log_prices = np.cumsum(log_increments, axis=1)
+        columns = np.concatenate([[0], np.arange(dt.shape[0])])
+        log_prices = np.where(np.arange(dt.shape[0] + 1) == 0, 0.0, log_prices[:, columns])
+        return spot * np.exp(log_prices)
+    
+    def _step_parameters(self, product:AbstractProduct=None, monte_carlo:bool=False, maturity_scale:float=1.0):
+        """
+        Spot, drift and volatility of each step of the simulation grid, computed once per simulation.
+        The drifts are the forward rates of the rate curve, shifted by the underlying adjustment
+        (e.g. dividend yield) of _simulation_inputs. With a VolSurface, the volatilities are the forward
+        volatilities of the total variance at the product strike.
+
+        Args:
+            product (AbstractProduct, optional): Financial product to price. Defaults to None.
+            monte_carlo (bool, optional): If the product is priced on full paths. Defaults to False.
+            maturity_scale (float, optional): Ratio of a new maturity to the simulated one, the grid being
+                scaled to it (e.g. for a theta). Defaults to 1.0.
+
+        Returns:
+            tuple: Adjusted spot, and arrays of the drift and volatility of each step.
+        """
+        times = self._generate_z().columns.to_numpy(dtype=float) * maturity_scale
+        dt = np.diff(times)
+        maturity = None
+        if maturity_scale != 1.0:
+            maturity = self.input("maturity").get_new_maturity(new_maturity_in_years=times[-1])
+
+        # Forward rates on each step :
+        log_df = np.log(self.input("rates").discount_factors(times))
+        drifts = - np.diff(log_df) / dt
+        spot, rate = self._simulation_inputs(product, monte_carlo, maturity)
+        drifts += rate + log_df[-1] / times[-1]
+        
+        volatility = self.input("volatility")
+        if isinstance(volatility, VolSurface):
+            # Forward volatilities on each step :
+            variance = volatility.volatility(self._strike(product), times) ** 2 * times
+            volatilities = np.sqrt(np.maximum(np.diff(variance), 0.0) / dt)
         else:
-            z = self._z
-        return z
+            volatilities = np.full(dt.shape, float(volatility))
+        return spot, drifts, volatilities
     
-    def __generate_price(self, product:AbstractProduct):
+    def _simulate(self, product:AbstractProduct=None, monte_carlo:bool=False):
         """
-        Generate simulated prices of the underlying asset.
+        Simulate the prices of the underlying asset on the time grid.
         
+        Args:
+            product (AbstractProduct, optional): Financial product to price. Defaults to None.
+            monte_carlo (bool, optional): If the product is priced on full paths. Defaults to False.
+        
+        Returns:
+            np.array: The simulated prices, with one column per date of the grid (including the initial date).
         """
-        self._generate_z()
-        if self._prices is None:
-            
-            spot = self.input("spot")
-            maturity = self.input("maturity")         
-            rates = self.input("rates")
-            volatility = self.input("volatility")
-            nb_steps = self.input("nb_steps")
-            discount_factor = rates.discount_factor(maturity)
-            rate = -np.log(discount_factor) / maturity.maturity()
-            
-            spot, rate = self._check_underlying(product, spot, rate)
-
-            dt = maturity.maturity()/nb_steps
-            z = self._z
-            drift_dt = (rate - 0.5 * volatility ** 2) * dt # Constante
-            
-            rdt = np.cumsum(drift_dt + z * volatility, axis=1)
-            rdt = np.hstack((np.zeros((rdt.shape[0], 1)), rdt)) # Insert initial value 
+        spot, drifts, volatilities = self._step_parameters(product, monte_carlo)
+        store_key = None
+        if _PATH_STORE is not None:
+            store_key = _PATH_STORE.key("paths", self._z_key, float(spot), drifts.tobytes(), volatilities.tobytes())
+        prices = None if store_key is None else _PATH_STORE.load(store_key)
         
-            log_spot = np.log(spot)
-            log_st = log_spot + rdt
-            st = np.exp(log_st)
+        if prices is None:
+            z = self._generate_z().to_numpy()[:, 1:]
+            dt = np.diff(self._z.columns.to_numpy(dtype=float))
             
-            self._prices = st
+            log_increments = (drifts - 0.5 * volatilities ** 2) * dt + volatilities * z
+            prices = np.zeros((z.shape[0], z.shape[1] + 1))
+            np.cumsum(log_increments, axis=1, out=prices[:, 1:])
+            np.exp(prices, out=prices)
+            prices *= spot
+            if store_key is not None:
+                prices = _PATH_STORE.save(store_key, prices)
         
+        self._prices = prices
+        self._prices_volatility = self._volatility(product)
+        return prices
+    
+    def __generate_price(self, product:AbstractProduct):
+        """
+        Generate simulated prices of the underlying asset.
+        
+        """
+        if self._prices is None or self._prices_volatility != self._volatility(product):
+            self._simulate(product)
+        
+    def _terminal_index(self) -> tuple:
+        """
+        Sorted terminal prices of the simulation and their prefix sums, built once per simulation.
+
+        Returns:
+            tuple: The sorted terminal prices and their prefix sums (starting at 0).
+        """
+        if self._index is None or self._index[0] is not self._prices:
+            terminals = np.sort(self._prices[:, -1])
+            self._index = (self._prices, terminals, np.concatenate(([0.0], np.cumsum(terminals))))
+        return self._index[1:]
+    
+    def _vanilla_payoffs(self, strikes, option_type:str) -> tuple:
+        """
+        Mean payoff and exercise probability of calls or puts on the simulated terminal prices,
+        from a binary search in the terminal index.
+
+        Args:
+            strikes (float or np.array): The strikes.
+            option_type (str): call or put.
+
+        Returns:
+            tuple: The (undiscounted) mean payoffs and the exercise probabilities.
+        """
+        terminals, sums = self._terminal_index()
+        nb_simulations = len(terminals)
+        strikes = np.asarray(strikes, dtype=float)
+        if option_type == CALL:
+            count = nb_simulations - np.searchsorted(terminals, strikes, side="right")
+            payoffs = sums[-1] - sums[nb_simulations - count] - strikes * count
+        elif option_type == PUT:
+            count = np.searchsorted(terminals, strikes, side="left")
+            payoffs = strikes * count - sums[count]
+        else:
+            raise ValueError("Choose an option type (call or put)")
+        return payoffs / nb_simulations, count / nb_simulations
+    
+    def strike_strip(self, strikes, option_type:str=CALL, product:AbstractProduct=None) -> dict:
+        """
+        Price calls or puts at many strikes from a single simulation.
+        The strikes are compared to the simulated prices as they are (for forex options,
+        use the adjusted strikes of the products).
+
+        Args:
+            strikes (array-like): The strikes.
+            option_type (str, optional): call or put. Defaults to call.
+            product (AbstractProduct, optional): Product giving the underlying adjustment, and the strike
+                at which a volatility surface is read. Defaults to None (no adjustment, at the money).
+
+        Returns:
+            dict: Dictionary containing the arrays of prices and probabilities.
+        """
+        self.__generate_price(product)
+        payoffs, probas = self._vanilla_payoffs(strikes, option_type.lower())
+        discount_factor = self.input("rates").discount_factor(self.input("maturity"))
+        return {"price": discount_factor * payoffs, "proba": probas}
+    
     def pricing(self, product:AbstractProduct, monte_carlo=False):
         """
         Calculate the price of a financial product based on the simulated prices.
@@ -146,7 +471,7 @@ class BrownianMotion:
         """
         
         if monte_carlo:
-            paths = self._generate_paths()
+            paths = self._generate_paths(product)
             payoffs = product.payoff(paths)
             maturity = self.input("maturity")
             discount_factor = self.input("rates").discount_factor(maturity)
@@ -156,52 +481,85 @@ class BrownianMotion:
             return {"price": price, "proba": proba}
         else:
             self.__generate_price(product)
+            rates = self.input("rates")
+            maturity = self.input("maturity")
+            payoff_function = product.piecewise_linear()
+            if payoff_function is not None:
+                # Closed form on the terminal index, shared by every product priced on this simulation
+                payoff, proba = payoff_function.expectation(*self._terminal_index())
+                return {"price":rates.discount_factor(maturity) * payoff, "proba":proba}
             st = self._prices
             last_values = st[:, -1]
             ct = product.payoff(last_values)
-            rates = self.input("rates")
-            maturity = self.input("maturity")
             c0 = rates.discount_factor(maturity) \
                 * np.sum(ct)/len(ct)
-            self._z = None
             return {"price":c0, "proba":(ct > 0).sum()/len(ct)}
                 
 
-    def _generate_paths(self):
+    def pricing_term_structure(self, products, maturities:list, monte_carlo=False) -> list:
+        """
+        Price a product at several maturities from a single simulation, up to the longest maturity
+        on a grid including every maturity : each payoff is computed on the prices at its maturity
+        (on the paths up to its maturity with monte_carlo) and discounted at that maturity.
+        With a VolSurface, the surface is read at the strike of the product of the longest maturity.
+
+        Args:
+            products (AbstractProduct or list): Financial product to price, or one product per maturity.
+            maturities (list): Maturities (Maturity objects) to price.
+            monte_carlo (bool, optional): If the products are priced on full paths. Defaults to False.
+
+        Returns:
+            list: Dictionaries containing the calculated price and probability, for each maturity.
+        """
+        
+        if isinstance(products, AbstractProduct):
+            products = [products] * len(maturities)
+        if len(products) != len(maturities):
+            raise Exception("One product per maturity is needed")
+        if not maturities:
+            return []
+        
+        times = np.array([maturity.maturity() for maturity in maturities])
+        longest = int(np.argmax(times))
+        process = BrownianMotion({**self._inputs, "maturity": maturities[longest]})
+        process._generate_z(tuple(times))
+        prices = process._simulate(products[longest], monte_carlo)
+        grid = process._z.columns.to_numpy(dtype=float)
+        
+        # Prices are proportional to the (adjusted) spot of each maturity
+        spot = process._simulation_inputs(products[longest], monte_carlo)[0]
+        rates = self.input("rates")
+        results = []
+        for product, maturity, t in zip(products, maturities, times):
+            step = int(np.abs(grid - t).argmin())
+            scale = process._simulation_inputs(product, monte_carlo, maturity)[0] / spot
+            if monte_carlo:
+                payoffs = np.asarray(product.payoff(prices[:, :step+1] * scale))
+            else:
+                payoffs = np.asarray(product.payoff(prices[:, step] * scale))
+            results.append({"price": rates.discount_factor(maturity) * np.mean(payoffs),
+                            "proba": np.mean(payoffs > 0)})
+        return results
+    
+    def _generate_paths(self, product:AbstractProduct=None):
         """
         Generates asset price paths using the Geometric Brownian Motion model.
         Parameters:
-            None - All necessary parameters are assumed to be available in `self._inputs`.
+            product (AbstractProduct, optional): Product to price, used to read a volatility surface.
+            All other necessary parameters are assumed to be available in `self._inputs`.
 
         Returns:
-            None - The generated price paths are stored directly in `self._prices`.
+            np.array: The generated price paths, also stored in `self._prices`.
     
         Raises:
             KeyError: If an expected key is missing from `self._inputs`.
             ValueError: If any of the numerical inputs are non-positive or otherwise invalid.
     
         Notes:
-            - The simulation assumes a constant risk-free rate over the time to maturity.
-            - Volatility is also assumed to be constant over the simulation period.
+            - The drift of each step is the forward rate of the rate curve on that step.
+            - The volatility of each step is the forward volatility of the volatility surface, if any.
             - The number of steps determines the granularity of the simulation; more steps
             result in finer granularity but require more computational resources.
     
         """
-        nb_simulations = self.input("nb_simulations")
-        nb_steps = self.input("nb_steps")
-        maturity = self.input("maturity").maturity()
-        dt = maturity / nb_steps
-        volatility = self.input("volatility")
-        initial_spot = self.input("spot")
-        rate = self.input("rates").rate(maturity)   # Assuming a constant rate
-
-        z = self._generate_z().to_numpy()
-        
-        price_paths = np.zeros((nb_simulations, nb_steps + 1))
-        price_paths[:, 0] = initial_spot
-        
-        for t in range(1, nb_steps + 1):
-            price_paths[:, t] = price_paths[:, t-1] * np.exp((rate - 0.5 * volatility**2) * dt + volatility * z[:, t-1])
-
-        self._prices = price_paths
-        return self._prices
\ No newline at end of file
+        return self._simulate(product, monte_carlo=True)
@@ -0,0 +1,263 @@
+import bisect
+import math
+
+from Market.maturity import Maturity
+from Market.rate import Rate
+
+DEPOSIT = "deposit"
+FRA = "fra"
+SWAP = "swap"
+
+
+class CurveBootstrap:
+    """
+    A class stripping a zero-rate curve from deposits, FRAs and par swaps.
+    The pillars (instrument maturities) are solved sequentially, with zero rates (of the curve rate type) linearly interpolated
+    between pillars and flat before the first one : a pillar is solved analytically when every other date
+    of its instrument falls before the previous pillar, by Newton iterations on its zero rate otherwise.
+    Solutions are cached on the quote snapshot, and when quotes change only the pillars from the first
+    changed instrument onwards are solved again.
+
+    Instruments are dictionaries with the keys :
+        type (str): deposit, fra or swap.
+        maturity (Maturity or float): The end date of the instrument.
+        rate (float): The quoted rate (simple rate for deposits and FRAs, par rate for swaps).
+        start (Maturity or float): The start date of a FRA.
+        frequency (int, optional): The number of fixed payments per year of a swap. Defaults to 1.
+
+    Attributes:
+        __rate_type (str): The type of rate of the built curve (continuous or compounded).
+        __interpol_type (str): The type of interpolation of the built curve.
+        __tolerance (float): The tolerance on the instrument repricing.
+        __max_iterations (int): The maximum number of Newton iterations per pillar.
+        __max_cache (int): The maximum number of cached snapshots.
+        __cache (dict): The solved zero rates, keyed on the quote snapshot.
+        __last_snapshot (tuple): The last bootstrapped snapshot.
+        __last_zero_rates (list): The zero rates of the last bootstrapped snapshot.
+    """
+
+    def __init__(
+            self,
+            rate_type: str = "continuous",
+            interpol_type: str = "linear",
+            tolerance: float = 1e-12,
+            max_iterations: int = 20,
+            max_cache: int = 128
+            ) -> None:
+        """
+        Initialize a CurveBootstrap object.
+
+        Args:
+            rate_type (str, optional): The type of rate of the built curve. Defaults to continuous.
+            interpol_type (str, optional): The type of interpolation of the built curve. Defaults to linear,
+                the interpolation the instruments are repriced with.
+            tolerance (float, optional): The tolerance on the instrument repricing. Defaults to 1e-12.
+            max_iterations (int, optional): The maximum number of Newton iterations per pillar. Defaults to 20.
+            max_cache (int, optional): The maximum number of cached snapshots. Defaults to 128.
+
+        Raises:
+            Exception: If rate_type is not 'continuous' or 'compounded'.
+        """
+
+        if rate_type not in ["continuous", "compounded"]:
+            raise Exception("Unknown rate type, should be continuous or compounded.")
+        self.__rate_type = rate_type
+        self.__interpol_type = interpol_type
+        self.__tolerance = tolerance
+        self.__max_iterations = max_iterations
+        self.__max_cache = max_cache
+        self.__cache = {}
+        self.__last_snapshot = ()
+        self.__last_zero_rates = []
+
+    @staticmethod
+    def _snapshot(instruments: list) -> tuple:
+        """
+        Build the hashable snapshot of the instruments, sorted by maturity.
+
+        Args:
+            instruments (list): The instruments (dictionaries).
+
+        Returns:
+            tuple: One (type, start, maturity, frequency, rate) tuple per instrument.
+        """
+
+        years = lambda date: date.maturity() if isinstance(date, Maturity) else float(date)
+        snapshot = []
+        for instrument in instruments:
+            for key in ["type", "maturity", "rate"]:
+                if key not in instrument:
+                    raise Exception("Missing inputs : " + key)
+            kind = instrument["type"].lower()
+            if kind not in [DEPOSIT, FRA, SWAP]:
+                raise Exception("Unknown instrument type, should be deposit, fra or swap.")
+            if kind == FRA and "start" not in instrument:
+                raise Exception("Missing inputs : start")
+
+            start = years(instrument["start"]) if kind == FRA else 0.0
+            frequency = int(instrument.get("frequency", 1)) if kind == SWAP else 0
+            snapshot.append((kind, start, years(instrument["maturity"]), frequency, float(instrument["rate"])))
+
+        snapshot.sort(key=lambda instrument: instrument[2])
+        maturities = [instrument[2] for instrument in snapshot]
+        if maturities and (maturities[0] <= 0 or any(a >= b for a, b in zip(maturities, maturities[1:]))):
+            raise Exception("Instrument maturities should be positive and distinct")
+        return tuple(snapshot)
+
+    def _to_rate(self, df: float, t: float) -> float:
+        """ Zero rate of the curve rate type from a discount factor. """
+        if self.__rate_type == "continuous":
+            return - math.log(df) / t
+        return df ** (- 1.0 / t) - 1
+
+    def _discount(self, t: float, pillars: list, zero_rates: list, maturity: float, zero_rate: float) -> tuple:
+        """
+        Discount factor at a date, and its derivative with respect to the zero rate of the pillar being solved.
+
+        Args:
+            t (float): The date in years.
+            pillars (list): The maturities of the solved pillars.
+            zero_rates (list): The zero rates of the solved pillars.
+            maturity (float): The maturity of the pillar being solved.
+            zero_rate (float): The current zero rate of the pillar being solved.
+
+        Returns:
+            tuple: The discount factor and its derivative.
+        """
+
+        if t <= 0:
+            return 1.0, 0.0
+        last = pillars[-1] if pillars else 0.0
+        if t <= last:
+            # Known part of the curve :
+            weight = 0.0
+            if t <= pillars[0]:
+                rate = zero_rates[0]
+            else:
+                i = bisect.bisect_left(pillars, t)
+                rate = zero_rates[i - 1] + (t - pillars[i - 1]) / (pillars[i] - pillars[i - 1]) * (zero_rates[i] - zero_rates[i - 1])
+        else:
+            weight = 1.0 if not pillars else (t - last) / (maturity - last)
+            rate = zero_rate if not pillars else zero_rates[-1] + weight * (zero_rate - zero_rates[-1])
+
+        if self.__rate_type == "continuous":
+            df = math.exp(- rate * t)
+            return df, - df * t * weight
+        df = (1 + rate) ** (- t)
+        return df, - df * t * weight / (1 + rate)
+
+    def _solve_pillar(self, instrument: tuple, pillars: list, zero_rates: list, known: dict) -> float:
+        """
+        Solve the zero rate of the pillar of an instrument.
+
+        Args:
+            instrument (tuple): The instrument, as in the snapshot.
+            pillars (list): The maturities of the solved pillars.
+            zero_rates (list): The zero rates of the solved pillars.
+            known (dict): Discount factors (and their running sums) already computed on the solved part of the curve,
+                for each swap schedule.
+
+        Returns:
+            float: The zero rate at the instrument maturity.
+        """
+
+        kind, start, maturity, frequency, quote = instrument
+        last = pillars[-1] if pillars else 0.0
+
+        annuity, coupon_dates, last_period = 0.0, [], maturity - start
+        if kind == SWAP:
+            # Fixed leg dates (phase + j) / frequency, the first period being a stub from today
+            nb_dates = int(math.ceil(maturity * frequency - 1e-9))
+            phase = maturity * frequency - (nb_dates - 1)
+            nb_known = 0 if last * frequency < phase else min(nb_dates - 1, int(math.floor(last * frequency - phase + 1e-9)) + 1)
+            dfs, sums = known.setdefault((frequency, round(phase, 10)), ([], [0.0]))
+            while len(dfs) < nb_known:
+                dfs.append(self._discount((phase + len(dfs)) / frequency, pillars, zero_rates, maturity, 0.0)[0])
+                sums.append(sums[-1] + dfs[-1])
+            if nb_known:
+                annuity = phase / frequency * dfs[0] + (sums[nb_known] - sums[1]) / frequency
+            coupon_dates = [((phase + j) / frequency, (phase if j == 0 else 1.0) / frequency) for j in range(nb_known, nb_dates - 1)]
+            last_period = (phase if nb_dates == 1 else 1.0) / frequency
+
+        # Analytic pillar : every date but the maturity is on the known part of the curve
+        if kind == DEPOSIT:
+            return self._to_rate(1.0 / (1 + quote * maturity), maturity)
+        if kind == FRA and start <= last:
+            df = self._discount(start, pillars, zero_rates, maturity, 0.0)[0] / (1 + quote * last_period)
+            return self._to_rate(df, maturity)
+        if kind == SWAP and not coupon_dates:
+            df = (1 - quote * annuity) / (1 + quote * last_period)
+            if df <= 0:
+                raise Exception("Unable to bootstrap the swap of maturity " + str(maturity))
+            return self._to_rate(df, maturity)
+
+        # Newton iterations on the pillar zero rate
+        zero_rate = zero_rates[-1] if zero_rates else quote
+        for _ in range(self.__max_iterations):
+            df, d_df = self._discount(maturity, pillars, zero_rates, maturity, zero_rate)
+            if kind == FRA:
+                df_start, d_df_start = self._discount(start, pillars, zero_rates, maturity, zero_rate)
+                error = df * (1 + quote * last_period) - df_start
+                derivative = d_df * (1 + quote * last_period) - d_df_start
+            else:
+                error = df * (1 + quote * last_period) - 1 + quote * annuity
+                derivative = d_df * (1 + quote * last_period)
+                for t, period in coupon_dates:
+                    df_t, d_df_t = self._discount(t, pillars, zero_rates, maturity, zero_rate)
+                    error += quote * period * df_t
+                    derivative += quote * period * d_df_t
+            if abs(error) <= self.__tolerance:
+                return zero_rate
+            zero_rate -= error / derivative
+        raise Exception("Unable to bootstrap the pillar of maturity " + str(maturity))
+
+    def zero_rates(self, instruments: list) -> tuple:
+        """
+        Bootstrap the zero rates of the curve.
+
+        Args:
+            instruments (list): The instruments (dictionaries).
+
+        Returns:
+            tuple: The pillar maturities in years and the zero rates.
+        """
+
+        snapshot = self._snapshot(instruments)
+        if snapshot not in self.__cache:
+            # Re-use the pillars before the first changed instrument
+            first = 0
+            for old, new in zip(self.__last_snapshot, snapshot):
+                if old != new:
+                    break
+                first += 1
+
+            pillars = [instrument[2] for instrument in snapshot[:first]]
+            zero_rates = self.__last_zero_rates[:first]
+            known = {}
+            for instrument in snapshot[first:]:
+                zero_rates.append(self._solve_pillar(instrument, pillars, zero_rates, known))
+                pillars.append(instrument[2])
+
+            if len(self.__cache) >= self.__max_cache:
+                del self.__cache[next(iter(self.__cache))]
+            self.__cache[snapshot] = tuple(zero_rates)
+
+        self.__last_snapshot = snapshot
+        self.__last_zero_rates = list(self.__cache[snapshot])
+        return tuple(instrument[2] for instrument in snapshot), self.__cache[snapshot]
+
+    def bootstrap(self, instruments: list) -> Rate:
+        """
+        Bootstrap the rate curve.
+
+        Args:
+            instruments (list): The instruments (dictionaries).
+
+        Returns:
+            Rate: The rate object of the built curve.
+        """
+
+        pillars, zero_rates = self.zero_rates(instruments)
+        # A knot today keeps the curve flat before the first pillar
+        rate_curve = {Maturity(maturity_in_years=t): rate for t, rate in zip((0.0,) + pillars, zero_rates[:1] + zero_rates)}
+        return Rate(rate_type=self.__rate_type, rate_curve=rate_curve, interpol_type=self.__interpol_type)
@@ -0,0 +1,248 @@
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from Market.maturity import Maturity
+from Market.rate import Rate
+
+SHARE_NO_DIV = "no dividend share"
+SHARE_DIV = "dividend share"
+FOREX = "forex rate"
+CAPITALIZED_INDEX = "capitalized index"
+NON_CAPITALIZED_INDEX = "non capitalized index"
+CALL, PUT = "call", "put"
+
+MIN_VOLATILITY, MAX_VOLATILITY = 1e-4, 5.0
+
+
+class ImpliedVolatility:
+    """
+    A class computing Black-Scholes implied volatilities for arrays of option quotes at once.
+    Each quote starts from a rational (Corrado-Miller) initial guess, refined by Halley steps
+    safeguarded by a bisection bracket.
+
+    Attributes:
+        __spot (float): The spot price of the underlying asset.
+        __rates (Rate): The rate object used for discounting.
+        __underlying (str): The type of underlying asset.
+        __dividend (float): The dividend (continuous yield, or discrete amount if dividend_date is given).
+        __dividend_date (float): The date of the discrete dividend in years.
+        __forward_rate (float): The forward rate for options on exchange rates.
+        __domestic_rate (float): The domestic rate for options on exchange rates.
+        __tolerance (float): The relative tolerance on the price (and on the volatility).
+        __max_iterations (int): The maximum number of iterations.
+    """
+
+    def __init__(
+            self,
+            spot: float,
+            rates: Rate,
+            underlying: str = SHARE_NO_DIV,
+            dividend: float = None,
+            dividend_date: float = None,
+            forward_rate: float = None,
+            domestic_rate: float = None,
+            tolerance: float = 1e-8,
+            max_iterations: int = 50
+            ) -> None:
+        """
+        Initialize an ImpliedVolatility object.
+
+        Args:
+            spot (float): The spot price of the underlying asset.
+            rates (Rate): The rate object used for discounting.
+            underlying (str, optional): The type of underlying asset. Defaults to no dividend share.
+            dividend (float, optional): The dividend of the underlying. Defaults to None.
+            dividend_date (float, optional): The date of a discrete dividend in years. Defaults to None.
+            forward_rate (float, optional): The forward rate for exchange rates. Defaults to None.
+            domestic_rate (float, optional): The domestic rate for exchange rates. Defaults to None.
+            tolerance (float, optional): The relative tolerance on the price (and on the volatility). Defaults to 1e-8.
+            max_iterations (int, optional): The maximum number of iterations. Defaults to 50.
+
+        Raises:
+            Exception: If the underlying is unknown or an input is missing.
+        """
+
+        self.__spot = spot
+        self.__rates = rates
+        self.__underlying = underlying.lower()
+        self.__dividend = dividend
+        self.__dividend_date = dividend_date
+        self.__forward_rate = forward_rate
+        self.__domestic_rate = domestic_rate
+        self.__tolerance = tolerance
+        self.__max_iterations = max_iterations
+
+        if self.__underlying not in [SHARE_NO_DIV, SHARE_DIV, FOREX, CAPITALIZED_INDEX, NON_CAPITALIZED_INDEX]:
+            raise Exception("Unknown underlying.")
+        if self.__underlying in [SHARE_DIV, CAPITALIZED_INDEX] and dividend is None:
+            raise Exception("Missing inputs : dividend")
+        if self.__underlying == FOREX and (forward_rate is None or domestic_rate is None):
+            raise Exception("Missing inputs : forward_rate and domestic_rate")
+
+    def _market(self, strikes: np.ndarray, maturities: np.ndarray) -> tuple:
+        """
+        Adjusted spot, adjusted strike and continuous rate for each quote, with the conventions
+        of BrownianMotion._check_underlying and VanillaOption._get_strike.
+
+        Args:
+            strikes (np.ndarray): The strikes of the options.
+            maturities (np.ndarray): The maturities of the options in years.
+
+        Returns:
+            tuple: Arrays of adjusted spots, adjusted strikes and continuous rates.
+        """
+        unique_maturities, positions = np.unique(maturities, return_inverse=True)
+        discount_factors = np.array([self.__rates.discount_factor(Maturity(t)) for t in unique_maturities])
+        rates = (-np.log(discount_factors) / unique_maturities)[positions]
+
+        spots = np.full(maturities.shape, float(self.__spot))
+        if self.__underlying in [SHARE_DIV, CAPITALIZED_INDEX]:
+            if self.__dividend_date is not None:
+                spots -= self.__dividend * np.exp(-rates * self.__dividend_date)
+            else:
+                spots *= np.exp(-self.__dividend * maturities)
+        elif self.__underlying == FOREX:
+            spots *= np.exp(-self.__forward_rate * maturities)
+            strikes = strikes * np.exp(self.__domestic_rate * maturities)
+        return spots, strikes, rates
+
+    @staticmethod
+    def _black_scholes(volatility, spots, strikes, maturities, rates, sign) -> tuple:
+        """
+        Vectorized Black-Scholes price, vega and volga.
+
+        Args:
+            volatility (np.ndarray): The volatilities.
+            spots (np.ndarray): The (adjusted) spots.
+            strikes (np.ndarray): The (adjusted) strikes.
+            maturities (np.ndarray): The maturities in years.
+            rates (np.ndarray): The continuous rates.
+            sign (np.ndarray): 1 for calls, -1 for puts.
+
+        Returns:
+            tuple: Arrays of prices, vegas and volgas.
+        """
+        sqrt_t = np.sqrt(maturities)
+        discounted_strikes = strikes * np.exp(-rates * maturities)
+        d1 = (np.log(spots / discounted_strikes) + 0.5 * volatility ** 2 * maturities) / (volatility * sqrt_t)
+        d2 = d1 - volatility * sqrt_t
+        price = sign * (spots * ndtr(sign * d1) - discounted_strikes * ndtr(sign * d2))
+        vega = spots * sqrt_t * np.exp(-0.5 * d1 ** 2) / np.sqrt(2 * np.pi)
+        volga = vega * d1 * d2 / volatility
+        return price, vega, volga
+
+    def price(self, volatility, strikes, maturities, option_types) -> np.ndarray:
+        """
+        Calculate Black-Scholes prices for arrays of options.
+
+        Args:
+            volatility (array-like): The volatilities.
+            strikes (array-like): The strikes of the options.
+            maturities (array-like): The maturities of the options in years.
+            option_types (array-like): The option types (call or put).
+
+        Returns:
+            np.ndarray: The prices of the options.
+        """
+        volatility, strikes, maturities, sign = self._arrays(volatility, strikes, maturities, option_types)
+        spots, strikes, rates = self._market(strikes, maturities)
+        return self._black_scholes(volatility, spots, strikes, maturities, rates, sign)[0]
+
+    @staticmethod
+    def _arrays(values, strikes, maturities, option_types) -> tuple:
+        """ Broadcast the quote inputs to float arrays and option types to signs. """
+        option_types = np.char.lower(np.asarray(option_types, dtype=str))
+        if not np.all(np.isin(option_types, [CALL, PUT])):
+            raise ValueError("Choose an option type (call or put)")
+        sign = np.where(option_types == CALL, 1.0, -1.0)
+        return np.broadcast_arrays(np.asarray(values, dtype=float), np.asarray(strikes, dtype=float),
+                                   np.asarray(maturities, dtype=float), sign)
+
+    def solve(self, prices, strikes, maturities, option_types) -> np.ndarray:
+        """
+        Calculate implied volatilities for arrays of option prices.
+
+        Args:
+            prices (array-like): The option prices.
+            strikes (array-like): The strikes of the options.
+            maturities (array-like): The maturities of the options in years.
+            option_types (array-like): The option types (call or put).
+
+        Returns:
+            np.ndarray: The implied volatilities (NaN for prices outside the no-arbitrage bounds), with the
+                broadcast shape of the inputs (a float for scalar inputs).
+        """
+        prices, strikes, maturities, sign = self._arrays(prices, strikes, maturities, option_types)
+        # Solved on flat copies (scalars and grids alike), reshaped on return
+        shape = prices.shape
+        prices, strikes, maturities, sign = [np.array(x, dtype=float).ravel() for x in (prices, strikes, maturities, sign)]
+        spots, strikes, rates = self._market(strikes, maturities)
+        discounted_strikes = strikes * np.exp(-rates * maturities)
+
+        # No-arbitrage bounds
+        lower = np.maximum(sign * (spots - discounted_strikes), 0.0)
+        upper = np.where(sign > 0, spots, discounted_strikes)
+        valid = (prices > lower) & (prices < upper)
+
+        # Rational initial guess (Corrado-Miller), on the call price given by the put-call parity
+        calls = np.where(sign > 0, prices, prices + spots - discounted_strikes)
+        moneyness = spots - discounted_strikes
+        centered = calls - moneyness / 2
+        root = np.sqrt(np.maximum(centered ** 2 - moneyness ** 2 / np.pi, 0.0))
+        volatility = np.sqrt(2 * np.pi / maturities) / (spots + discounted_strikes) * (centered + root)
+        volatility = np.clip(np.nan_to_num(volatility, nan=0.2), 0.01, 2.0)
+
+        low = np.full(prices.shape, MIN_VOLATILITY)
+        high = np.full(prices.shape, MAX_VOLATILITY)
+        active = valid.copy()
+        for _ in range(self.__max_iterations):
+            if not active.any():
+                break
+            idx = np.nonzero(active)[0]
+            vol = volatility[idx]
+            price, vega, volga = self._black_scholes(vol, spots[idx], strikes[idx], maturities[idx], rates[idx], sign[idx])
+            error = price - prices[idx]
+
+            # Price is increasing in volatility : keep a bracket
+            low[idx] = np.where(error < 0, vol, low[idx])
+            high[idx] = np.where(error > 0, vol, high[idx])
+
+            # Halley step, falling back on bisection when leaving the bracket. Far from the quote (out of the money
+            # prices being extremely convex in the volatility), Newton step on the log of the price instead
+            newton = error / np.maximum(vega, 1e-300)
+            step = newton / np.maximum(1 - 0.5 * newton * volga / np.maximum(vega, 1e-300), 0.5)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                log_error = np.log(price / prices[idx])
+                step = np.where(np.abs(log_error) > 1, log_error * price / np.maximum(vega, 1e-300), step)
+            new_vol = vol - step
+            outside = ~np.isfinite(new_vol) | (new_vol < low[idx]) | (new_vol > high[idx])
+            new_vol = np.where(outside, 0.5 * (low[idx] + high[idx]), new_vol)
+
+            # Relative to the price and to the vega : far out of the money quotes, worth less than the tolerance,
+            # are solved on the volatility rather than accepted at the initial guess
+            converged = np.abs(error) <= self.__tolerance * np.minimum(prices[idx], vega)
+            volatility[idx] = np.where(converged, vol, new_vol)
+            active[idx] = ~converged & (np.abs(new_vol - vol) > self.__tolerance)
+
+        return np.where(valid, volatility, np.nan).reshape(shape)[()]
+
+    def surface(self, quotes: pd.DataFrame) -> pd.DataFrame:
+        """
+        Build a strike x maturity implied volatility grid from a quote table in one call.
+
+        Args:
+            quotes (pd.DataFrame): Quotes with columns strike, maturity (in years), option_type and price.
+
+        Returns:
+            pd.DataFrame: Implied volatilities indexed by strike, with one column per maturity.
+        """
+        for column in ["strike", "maturity", "option_type", "price"]:
+            if column not in quotes.columns:
+                raise Exception("Missing inputs : " + column)
+
+        volatility = self.solve(quotes["price"].to_numpy(), quotes["strike"].to_numpy(),
+                                quotes["maturity"].to_numpy(), quotes["option_type"].to_numpy())
+        grid = pd.DataFrame({"strike": quotes["strike"].to_numpy(), "maturity": quotes["maturity"].to_numpy(),
+                             "volatility": volatility})
+        return grid.pivot_table(index="strike", columns="maturity", values="volatility", aggfunc="mean")
@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from Market.schedule import year_fractions
+
 class Maturity:
     """
     A class representing the maturity of a financial instrument.
@@ -32,29 +34,11 @@ class Maturity:
         if maturity_in_years is not None:
             self.__maturity_in_years = maturity_in_years
         elif begin_date is not None and end_date is not None:
-            self.__maturity_in_years = (end_date - begin_date).days / self._denom()
+            self.__maturity_in_years = float(year_fractions(begin_date, end_date, self.__day_count_convention))
         else:
             raise ValueError("Either maturity_in_years or both begin_date and end_date must be provided")
     
 
-    def _denom(self) -> float:
-        """
-        Determine the denominator value based on the day count convention.
-
-        Returns:
-            float: The denominator value determined by the day count convention.
-
-        Raises:
-            Exception: If the day count convention is not recognized.
-        """
-        
-        if self.__day_count_convention == "ACT/360":
-            return 360.0
-        elif self.__day_count_convention == "ACT/365":
-            return 365.0
-        raise Exception("day_count_convention " + self.__day_count_convention + " error")
-    
-    
     def maturity(self) -> float:
         """
         Retrieve the maturity value in years.
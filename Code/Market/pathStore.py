@@ -0,0 +1,83 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+
+class PathStore:
+    """
+    A store of simulations (Brownian increments, simulated paths) in .npy files, keyed by the simulation
+    parameters and seed and mapped read-only in memory : the products, stress runs and processes
+    using the same simulation share one physical copy of it instead of simulating it again.
+
+    Attributes:
+        __directory (str): The directory of the files.
+    """
+
+    def __init__(self, directory: str) -> None:
+        """
+        Initialize a PathStore object.
+
+        Args:
+            directory (str): The directory of the files, created if needed.
+        """
+
+        self.__directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Key of a simulation, stable across processes.
+
+        Args:
+            *parts: The simulation parameters (strings, numbers, bytes, tuples of them).
+
+        Returns:
+            str: The key.
+        """
+        return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """ Path of the file of a simulation. """
+        return os.path.join(self.__directory, key + ".npy")
+
+    def load(self, key: str) -> np.ndarray:
+        """
+        Map a stored simulation read-only.
+
+        Args:
+            key (str): The key of the simulation.
+
+        Returns:
+            np.ndarray: The memory-mapped array (None if the simulation is not stored).
+        """
+        try:
+            return np.load(self._path(key), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, array: np.ndarray) -> np.ndarray:
+        """
+        Store a simulation, and map it read-only.
+
+        Args:
+            key (str): The key of the simulation.
+            array (np.ndarray): The simulation.
+
+        Returns:
+            np.ndarray: The memory-mapped array.
+        """
+        # Write then rename, so that another process never maps a partial file
+        temporary = self._path(key) + "." + str(os.getpid()) + "_" + str(threading.get_ident()) + ".tmp"
+        with open(temporary, "wb") as file:
+            np.save(file, np.ascontiguousarray(array))
+        os.replace(temporary, self._path(key))
+        return self.load(key)
+
+    def clear(self) -> None:
+        """ Remove every stored simulation (mapped arrays stay readable until released). """
+        for name in os.listdir(self.__directory):
+            if name.endswith(".npy"):
+                os.remove(os.path.join(self.__directory, name))
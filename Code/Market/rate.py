@@ -1,7 +1,7 @@
-from scipy import interpolate
-import math
+import numpy as np
 
 from Market.maturity import Maturity
+from Market.yieldCurve import YieldCurve
 
 
 class Rate:
@@ -13,7 +13,7 @@ class Rate:
         __rate_curve (dict): The rate curve.
         __interpol_type (str): The type of interpolation used.
         __rate_type (str): The type of rate (continuous or compounded).
-        __interpol (callable): The interpolation function.
+        __curve (YieldCurve): The array-native curve used for interpolation and discounting.
     """
     
     def __init__(
@@ -46,31 +46,17 @@ class Rate:
         if interpol_type is not None : 
             self.__interpol_type = interpol_type.lower()
         
-        if self.__rate_curve is not None:            
-            if self.__interpol_type in ["linear", "cubic"]:
-                if self.__interpol_type == "cubic" and len(rate_curve) < 4:
-                    raise Exception("Not enought information in rate curve")
-                self.__interpol = interpolate.interp1d(
-                    x=[mat.maturity()for mat in rate_curve.keys()], 
-                    y=list(rate_curve.values()),
-                    fill_value="extrapolate",
-                    kind=self.__interpol_type
-                )
-                
-            elif self.__interpol_type == "barycentric":
-                self.__interpol = interpolate.BarycentricInterpolator(
-                    xi=[mat.maturity() for mat in rate_curve.keys()], 
-                    yi=list(rate_curve.values())
-                )
-            
-            elif self.__interpol_type == "krogh":
-                self.__interpol = interpolate.KroghInterpolator(
-                    xi=[mat.maturity() for mat in rate_curve.keys()], 
-                    yi=list(rate_curve.values())
-                )
-                
-            else:
-                raise Exception("Unknown interpolation type, should be linear, cubic, barycentric, or krogh.")
+        if self.__rate_curve is not None and self.__rate is None:
+            self.__curve = YieldCurve(
+                knots=[mat.maturity() for mat in rate_curve.keys()],
+                rates=list(rate_curve.values()),
+                rate_type=self.__rate_type,
+                interpol_type=self.__interpol_type
+            )
+        elif self.__rate is not None:
+            self.__curve = YieldCurve(rate=rate, rate_type=self.__rate_type)
+        else:
+            self.__curve = None
 
 
     def rate(self, maturity: Maturity) -> float:
@@ -86,7 +72,104 @@ class Rate:
 
         if self.__rate!=None:
             return self.__rate
-        return float(self.__interpol(maturity.maturity()))
+        return float(self.__curve.zero_rates(maturity.maturity()))
+    
+
+    def zero_rates(self, times) -> np.ndarray:
+        """
+        Determine the rates for an array of maturities in a single call.
+
+        Inputs:
+            times (float or array-like): The maturities in years.
+
+        Returns:
+            float or np.ndarray: The determined rates.
+        """
+
+        return self.__curve.zero_rates(times)
+    
+
+    def curve(self) -> YieldCurve:
+        """
+        Retrieve the array-native curve.
+
+        Returns:
+            YieldCurve: The curve used for interpolation and discounting.
+        """
+
+        return self.__curve
+    
+
+    def rate_type(self) -> str:
+        """
+        Retrieve the type of rate.
+
+        Returns:
+            str: The type of rate (continuous or compounded).
+        """
+
+        return self.__rate_type
+    
+
+    def curve_points(self) -> tuple:
+        """
+        Retrieve the points of the rate curve.
+
+        Returns:
+            tuple: Arrays of the curve maturities (in years) and rates, or None for a single rate.
+        """
+
+        if self.__rate_curve is None:
+            return None
+        return (np.array([mat.maturity() for mat in self.__rate_curve.keys()]), 
+                np.array(list(self.__rate_curve.values()), dtype=float))
+    
+
+    def key(self) -> tuple:
+        """
+        Values identifying the rate object, e.g. to cache results computed on it.
+
+        Returns:
+            tuple: The type of rate, and the single rate or the interpolation type and the curve points.
+        """
+
+        if self.__rate is not None or self.__rate_curve is None:
+            return (self.__rate_type, self.__rate)
+        knots, rates = self.curve_points()
+        return (self.__rate_type, self.__interpol_type, tuple(knots.tolist()), tuple(rates.tolist()))
+    
+
+    def rate_weights(self, maturity: Maturity) -> np.ndarray:
+        """
+        Determine the sensitivity of the interpolated rate to each point of the rate curve.
+
+        Inputs:
+            maturity (Maturity): The maturity of the financial instrument.
+
+        Returns:
+            np.ndarray: The derivative of the rate with respect to each curve rate, or None for a single rate.
+        """
+
+        if self.__rate!=None or self.__rate_curve is None:
+            return None
+        
+        return self.__curve.knot_weights(maturity.maturity())
+    
+
+    def knot_weights(self, times) -> np.ndarray:
+        """
+        Determine the sensitivity of the interpolated rates to each point of the rate curve, for an array of maturities.
+
+        Inputs:
+            times (float or array-like): The maturities in years.
+
+        Returns:
+            np.ndarray: The derivative of each rate with respect to each curve rate (on the last axis), or None for a single rate.
+        """
+
+        if self.__rate!=None or self.__rate_curve is None:
+            return None
+        return self.__curve.knot_weights(times)
     
 
     def discount_factor(self, maturity: Maturity, force_rate: float = None) -> float:
@@ -102,12 +185,20 @@ class Rate:
             float: The calculated discount factor.
         """
 
-        if force_rate != None:
-            rate = force_rate
-        else:
-            rate = self.rate(maturity)
-            
-        if self.__rate_type == "continuous":
-            return math.exp(- rate * maturity.maturity())
-        elif self.__rate_type == "compounded":
-            return 1.0 / (1 + rate) ** maturity.maturity()
+        return float(self.__curve.discount_factors(maturity.maturity(), force_rate=force_rate))
+    
+
+    def discount_factors(self, times, force_rate = None) -> np.ndarray:
+        """
+        Calculate the discount factors for an array of maturities in a single call.
+
+        Inputs:
+            times (float or array-like): The maturities in years.
+            force_rate (float, optional): An optional parameter to specify a specific rate for discount factor calculation. 
+                If not provided, the rates will be determined based on an interpolation of the rate curve.
+
+        Returns:
+            float or np.ndarray: The calculated discount factors.
+        """
+
+        return self.__curve.discount_factors(times, force_rate=force_rate)
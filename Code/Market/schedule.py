@@ -0,0 +1,177 @@
+from functools import lru_cache
+
+import numpy as np
+
+ACT_360, ACT_365, THIRTY_360 = "ACT/360", "ACT/365", "30/360"
+FOLLOWING, MODIFIED_FOLLOWING, PRECEDING = "following", "modified following", "preceding"
+WEEKMASK = "1111100"
+FREQUENCIES = (1, 2, 3, 4, 6, 12)
+
+
+def to_dates(dates) -> np.ndarray:
+    """
+    Convert dates (datetime, date, string or datetime64, single or array-like) to a datetime64[D] array.
+
+    Args:
+        dates: The dates.
+
+    Returns:
+        np.ndarray: The dates as datetime64[D].
+    """
+    return np.asarray(dates, dtype="datetime64[D]")
+
+
+def year_fractions(begin_dates, end_dates, day_count_convention: str = ACT_360) -> np.ndarray:
+    """
+    Calculate the year fractions between arrays of dates.
+
+    Args:
+        begin_dates: The start dates.
+        end_dates: The end dates.
+        day_count_convention (str, optional): ACT/360, ACT/365 or 30/360 (bond basis). Defaults to ACT/360.
+
+    Returns:
+        float or np.ndarray: The year fractions.
+
+    Raises:
+        Exception: If the day count convention is not recognized.
+    """
+    begin_dates, end_dates = to_dates(begin_dates), to_dates(end_dates)
+    if day_count_convention == ACT_360:
+        return ((end_dates - begin_dates).astype(float) / 360.0)[()]
+    if day_count_convention == ACT_365:
+        return ((end_dates - begin_dates).astype(float) / 365.0)[()]
+    if day_count_convention == THIRTY_360:
+        y1, m1, d1 = _split(begin_dates)
+        y2, m2, d2 = _split(end_dates)
+        d1 = np.minimum(d1, 30)
+        d2 = np.where(d1 == 30, np.minimum(d2, 30), d2)
+        return ((360 * (y2 - y1) + 30 * (m2 - m1) + (d2 - d1)) / 360.0)[()]
+    raise Exception("day_count_convention " + day_count_convention + " error")
+
+
+def _split(dates: np.ndarray) -> tuple:
+    """ Years, months and days of a datetime64[D] array. """
+    months = dates.astype("datetime64[M]")
+    years = dates.astype("datetime64[Y]").astype(int) + 1970
+    return years, months.astype(int) % 12 + 1, (dates - months.astype("datetime64[D]")).astype(int) + 1
+
+
+@lru_cache(maxsize=32)
+def business_calendar(holidays: tuple = (), weekmask: str = WEEKMASK) -> np.busdaycalendar:
+    """
+    Build (once for each holiday list) the business day calendar.
+
+    Args:
+        holidays (tuple, optional): The holidays, as hashable dates (string, date or datetime64). Defaults to none.
+        weekmask (str, optional): The business days of the week, from Monday. Defaults to Monday to Friday.
+
+    Returns:
+        np.busdaycalendar: The business day calendar.
+    """
+    return np.busdaycalendar(weekmask=weekmask, holidays=to_dates(list(holidays)))
+
+
+def adjust(dates, calendar: np.busdaycalendar = None, convention: str = MODIFIED_FOLLOWING) -> np.ndarray:
+    """
+    Move dates falling on non-business days to a business day.
+
+    Args:
+        dates: The dates.
+        calendar (np.busdaycalendar, optional): The business day calendar. Defaults to weekends only.
+        convention (str, optional): following, modified following or preceding. Defaults to modified following.
+
+    Returns:
+        np.ndarray: The adjusted dates.
+
+    Raises:
+        Exception: If the convention is not recognized.
+    """
+    dates = to_dates(dates)
+    calendar = business_calendar() if calendar is None else calendar
+    if convention == PRECEDING:
+        return np.busday_offset(dates, 0, roll="backward", busdaycal=calendar)
+    following = np.busday_offset(dates, 0, roll="forward", busdaycal=calendar)
+    if convention == FOLLOWING:
+        return following
+    if convention == MODIFIED_FOLLOWING:
+        # Stay in the month of the date
+        preceding = np.busday_offset(dates, 0, roll="backward", busdaycal=calendar)
+        next_month = following.astype("datetime64[M]") != dates.astype("datetime64[M]")
+        return np.where(next_month, preceding, following)
+    raise Exception("Unknown convention, should be following, modified following or preceding.")
+
+
+def coupon_schedules(start_dates, end_dates, frequency, calendar: np.busdaycalendar = None,
+                     convention: str = MODIFIED_FOLLOWING) -> tuple:
+    """
+    Generate the coupon dates of many instruments at once, rolled backward from the end dates
+    (short first period), stacked in a compressed sparse row layout.
+
+    Args:
+        start_dates: The start date of each instrument (excluded from its schedule).
+        end_dates: The end date of each instrument.
+        frequency (int or array-like): The number of coupons per year (1, 2, 3, 4, 6 or 12).
+        calendar (np.busdaycalendar, optional): The business day calendar used to adjust the dates. Defaults to None (unadjusted).
+        convention (str, optional): The business day convention. Defaults to modified following.
+
+    Returns:
+        tuple: The position of the first date of each instrument (and the total number of dates), and the dates.
+
+    Raises:
+        Exception: If a frequency does not divide the year in whole months.
+    """
+    start_dates, end_dates, frequency = np.broadcast_arrays(to_dates(start_dates), to_dates(end_dates), np.asarray(frequency))
+    start_dates, end_dates = np.atleast_1d(start_dates), np.atleast_1d(end_dates)
+    if not np.all(np.isin(frequency, FREQUENCIES)):
+        raise Exception("Unknown frequency, should be 1, 2, 3, 4, 6 or 12 coupons per year.")
+    step = np.atleast_1d(12 // frequency.astype(int))
+
+    end_months = end_dates.astype("datetime64[M]")
+    end_days = (end_dates - end_months.astype("datetime64[D]")).astype(int)
+    counts = np.maximum((end_months - start_dates.astype("datetime64[M]")).astype(int) // step + 1, 0)
+
+    # Candidate dates, in increasing order for each instrument
+    instrument = np.repeat(np.arange(len(counts)), counts)
+    position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    months = end_months.astype(int)[instrument] - (counts[instrument] - 1 - position) * step[instrument]
+
+    # First day of each month, looked up in a table covering the schedules
+    lowest, highest = (months.min(), months.max()) if len(months) else (0, 0)
+    first_days = np.arange(lowest, highest + 2).astype("datetime64[M]").astype("datetime64[D]").astype(int)
+    days_in_month = np.diff(first_days)[months - lowest]
+    dates = (first_days[months - lowest] + np.minimum(end_days[instrument], days_in_month - 1)).astype("datetime64[D]")
+
+    keep = dates > start_dates[instrument]
+    dates, instrument = dates[keep], instrument[keep]
+    if calendar is not None:
+        dates = adjust(dates, calendar, convention)
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(instrument, minlength=len(counts)))))
+    return indptr, dates
+
+
+def monitoring_schedules(start_dates, end_dates, calendar: np.busdaycalendar = None) -> tuple:
+    """
+    Generate the business days after the start date, up to the end date, of many instruments at once
+    (e.g. daily barrier monitoring), stacked in a compressed sparse row layout.
+
+    Args:
+        start_dates: The start date of each instrument (excluded).
+        end_dates: The end date of each instrument (included).
+        calendar (np.busdaycalendar, optional): The business day calendar. Defaults to weekends only.
+
+    Returns:
+        tuple: The position of the first date of each instrument (and the total number of dates), and the dates.
+    """
+    calendar = business_calendar() if calendar is None else calendar
+    start_dates, end_dates = [np.atleast_1d(x) for x in np.broadcast_arrays(to_dates(start_dates), to_dates(end_dates))]
+
+    first = np.busday_offset(start_dates, 1, roll="forward", busdaycal=calendar)
+    first = np.where(np.is_busday(start_dates, busdaycal=calendar), first,
+                     np.busday_offset(start_dates, 0, roll="forward", busdaycal=calendar))
+    counts = np.maximum(np.busday_count(first, end_dates + 1, busdaycal=calendar), 0)
+
+    instrument = np.repeat(np.arange(len(counts)), counts)
+    position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    dates = np.busday_offset(first[instrument], position, roll="forward", busdaycal=calendar)
+    return np.concatenate(([0], np.cumsum(counts))), dates
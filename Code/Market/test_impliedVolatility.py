@@ -0,0 +1,29 @@
+import numpy as np
+
+from Market.impliedVolatility import ImpliedVolatility
+from Market.rate import Rate
+
+SOLVER = ImpliedVolatility(spot=100, rates=Rate(0.03, rate_type="continuous"))
+
+
+def test_solve_recovers_the_volatility_of_far_out_of_the_money_quotes():
+    generator = np.random.default_rng(0)
+    strikes = generator.uniform(40, 250, 5000)
+    maturities = generator.uniform(0.005, 2, 5000)
+    volatilities = generator.uniform(0.05, 1.5, 5000)
+    option_types = np.where(strikes > 100, "call", "put")
+    prices = SOLVER.price(volatilities, strikes, maturities, option_types)
+
+    # Quotes down to 1e-100, far below the tolerance of the solver
+    quoted = prices > 1e-100
+    solved = SOLVER.solve(prices[quoted], strikes[quoted], maturities[quoted], option_types[quoted])
+    assert np.nanmax(np.abs(solved - volatilities[quoted])) < 1e-6
+    assert np.isnan(solved).sum() <= 0.001 * quoted.sum()
+
+
+def test_solve_keeps_the_shape_of_the_quotes():
+    price = SOLVER.price(0.2, 100, 1.0, "call")
+    assert np.isclose(SOLVER.solve(price, 100, 1.0, "call"), 0.2)
+    grid = SOLVER.solve(np.full((2, 3), price), 100, 1.0, "call")
+    assert grid.shape == (2, 3) and np.allclose(grid, 0.2)
+    assert np.isnan(SOLVER.solve(200.0, 100, 1.0, "call"))
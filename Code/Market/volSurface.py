@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from Market.maturity import Maturity
+
+
+class VolSurface:
+    """
+    A class representing a volatility surface for financial calculations.
+    The surface is interpolated linearly in total variance (volatility² x maturity): along the strikes
+    on each maturity pillar, then between pillars. The interpolation coefficients are computed once,
+    so that any array of (strike, maturity) is looked up with a binary search.
+
+    Attributes:
+        __volatility (float): A single volatility, used for every strike and maturity.
+        __strikes (np.ndarray): The strikes of the surface, sorted.
+        __maturities (np.ndarray): The maturities of the surface in years, sorted.
+        __total_variance (np.ndarray): The total variance on each (strike, maturity) pillar.
+        __slopes (np.ndarray): The total variance slopes between two consecutive strikes.
+    """
+
+    def __init__(
+            self,
+            volatility: float = None,
+            vol_surface: pd.DataFrame = None
+            ) -> None:
+        """
+        Initialize a VolSurface object.
+
+        Args:
+            volatility (float, optional): A single volatility. Defaults to None.
+            vol_surface (pd.DataFrame, optional): Volatilities indexed by strike, with one column per maturity
+                (Maturity or maturity in years), such as returned by ImpliedVolatility.surface. Defaults to None.
+
+        Raises:
+            Exception: If neither a volatility nor a surface is provided, or if the surface is empty.
+        """
+
+        self.__volatility = volatility
+        if volatility is not None:
+            return
+        if vol_surface is None:
+            raise Exception("Either volatility or vol_surface must be provided")
+
+        maturities = np.array([mat.maturity() if isinstance(mat, Maturity) else float(mat) for mat in vol_surface.columns])
+        surface = vol_surface.copy()
+        surface.columns = maturities
+        surface = surface.sort_index().sort_index(axis=1)
+        surface.index = surface.index.astype(float)
+
+        # Fill missing quotes along the strikes of each maturity
+        surface = surface.interpolate(method="index", limit_direction="both")
+        if surface.isna().to_numpy().any() or len(surface.index) == 0:
+            raise Exception("Not enought information in volatility surface")
+
+        self.__strikes = surface.index.to_numpy(dtype=float)
+        self.__maturities = surface.columns.to_numpy(dtype=float)
+        self.__total_variance = surface.to_numpy(dtype=float) ** 2 * self.__maturities
+        if len(self.__strikes) > 1:
+            self.__slopes = np.diff(self.__total_variance, axis=0) / np.diff(self.__strikes)[:, None]
+        else:
+            self.__slopes = np.zeros((0, len(self.__maturities)))
+
+    def key(self) -> tuple:
+        """
+        Values identifying the surface, e.g. to cache results computed on it.
+
+        Returns:
+            tuple: The single volatility, or the strikes, maturities and total variances of the surface.
+        """
+        if self.__volatility is not None:
+            return (self.__volatility,)
+        return (tuple(self.__strikes.tolist()), tuple(self.__maturities.tolist()), self.__total_variance.tobytes())
+
+    def _pillar_variance(self, strikes: np.ndarray) -> np.ndarray:
+        """
+        Interpolate the total variance of each maturity pillar at the given strikes (flat outside the grid).
+
+        Args:
+            strikes (np.ndarray): The strikes.
+
+        Returns:
+            np.ndarray: The total variance, with one column per maturity pillar.
+        """
+        strikes = np.clip(strikes, self.__strikes[0], self.__strikes[-1])
+        idx = np.clip(np.searchsorted(self.__strikes, strikes, side="right") - 1, 0, len(self.__strikes) - 1)
+        variance = self.__total_variance[idx]
+        if len(self.__slopes):
+            slope_idx = np.minimum(idx, len(self.__slopes) - 1)
+            variance = variance + self.__slopes[slope_idx] * (strikes - self.__strikes[idx])[..., None]
+        return variance
+
+    def volatility(self, strike, maturity) -> np.ndarray:
+        """
+        Determine the volatility for the given strikes and maturities.
+
+        Inputs:
+            strike (float or array-like): The strikes.
+            maturity (Maturity, float or array-like): The maturities (Maturity or years).
+
+        Returns:
+            float or np.ndarray: The interpolated volatilities, broadcast over strikes and maturities.
+        """
+
+        if isinstance(maturity, Maturity):
+            maturity = maturity.maturity()
+        strike, maturity = np.broadcast_arrays(np.asarray(strike, dtype=float), np.asarray(maturity, dtype=float))
+        if self.__volatility is not None:
+            return np.full(strike.shape, float(self.__volatility))[()]
+
+        variance = self._pillar_variance(strike)
+        pillars = self.__maturities
+        # Constant volatility before the first pillar
+        short_volatility = np.sqrt(np.maximum(variance[..., 0], 0.0) / pillars[0])
+        if len(pillars) == 1:
+            return short_volatility[()]
+
+        idx = np.clip(np.searchsorted(pillars, maturity, side="right") - 1, 0, len(pillars) - 2)
+        left = np.take_along_axis(variance, idx[..., None], axis=-1)[..., 0]
+        right = np.take_along_axis(variance, idx[..., None] + 1, axis=-1)[..., 0]
+        weight = np.minimum((maturity - pillars[idx]) / (pillars[idx + 1] - pillars[idx]), 1.0)
+        total_variance = left + weight * (right - left)
+        # Constant volatility after the last pillar
+        total_variance = np.where(maturity > pillars[-1], variance[..., -1] * maturity / pillars[-1], total_variance)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            volatility = np.sqrt(np.maximum(total_variance, 0.0) / maturity)
+        return np.where(maturity < pillars[0], short_volatility, volatility)[()]
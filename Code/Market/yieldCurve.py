@@ -0,0 +1,168 @@
+import numpy as np
+from scipy import interpolate
+
+
+class YieldCurve:
+    """
+    A class representing a zero-rate curve stored as contiguous arrays.
+    The interpolation coefficients are computed once, so that rates and discount factors
+    for any array of times are obtained in a single vectorized call.
+
+    Attributes:
+        __rate (float): A single rate, used for every maturity.
+        __rate_type (str): The type of rate (continuous or compounded).
+        __interpol_type (str): The type of interpolation used.
+        __order (np.ndarray): The positions of the sorted knots in the input.
+        __knots (np.ndarray): The maturities of the curve points in years, sorted.
+        __rates (np.ndarray): The rates of the curve points.
+        __coefficients (np.ndarray): The piecewise polynomial coefficients (linear and cubic),
+            highest degree first, one column per interval.
+        __weights (np.ndarray): The barycentric weights (barycentric and krogh).
+        __knot_coefficients (np.ndarray): The coefficients interpolating the unit vector of each knot (computed on demand).
+    """
+
+    def __init__(
+            self,
+            knots: np.ndarray = None,
+            rates: np.ndarray = None,
+            rate: float = None,
+            rate_type: str = "continuous",
+            interpol_type: str = "linear"
+            ) -> None:
+        """
+        Initialize a YieldCurve object.
+
+        Args:
+            knots (np.ndarray, optional): The maturities of the curve points in years. Defaults to None.
+            rates (np.ndarray, optional): The rates of the curve points. Defaults to None.
+            rate (float, optional): A single rate, used instead of the curve. Defaults to None.
+            rate_type (str, optional): The type of rate (continuous or compounded). Defaults to continuous.
+            interpol_type (str, optional): The type of interpolation used. Defaults to linear.
+
+        Raises:
+            Exception: If neither a rate nor curve points are provided.
+            Exception: If rate_type is not 'continuous' or 'compounded'.
+            Exception: If interpol_type is not 'linear', 'cubic', 'barycentric', or 'krogh'.
+        """
+
+        if rate_type not in ["continuous", "compounded"]:
+            raise Exception("Unknown rate type, should be continuous or compounded.")
+        self.__rate_type = rate_type
+        self.__rate = rate
+        if rate is not None:
+            return
+        if knots is None or rates is None:
+            raise Exception("Either rate or knots and rates must be provided")
+
+        self.__order = np.argsort(np.asarray(knots, dtype=float))
+        self.__knots = np.ascontiguousarray(np.asarray(knots, dtype=float)[self.__order])
+        self.__rates = np.ascontiguousarray(np.asarray(rates, dtype=float)[self.__order])
+        self.__interpol_type = interpol_type.lower()
+        self.__knot_coefficients = None
+
+        if self.__interpol_type == "cubic" and len(self.__knots) < 4:
+            raise Exception("Not enought information in rate curve")
+        if self.__interpol_type in ["barycentric", "krogh"]:
+            # Both are the polynomial going through every point
+            differences = self.__knots[:, None] - self.__knots[None, :]
+            np.fill_diagonal(differences, 1.0)
+            self.__weights = 1.0 / differences.prod(axis=1)
+        elif self.__interpol_type not in ["linear", "cubic"]:
+            raise Exception("Unknown interpolation type, should be linear, cubic, barycentric, or krogh.")
+        self.__coefficients = self._coefficients(self.__rates)
+
+    def _coefficients(self, values: np.ndarray) -> np.ndarray:
+        """
+        Compute the interpolation coefficients of values given on the knots.
+
+        Args:
+            values (np.ndarray): The values on the (sorted) knots, with the knots on the first axis.
+
+        Returns:
+            np.ndarray: The piecewise polynomial coefficients (linear and cubic), or the values (barycentric and krogh).
+        """
+        if self.__interpol_type == "linear":
+            steps = np.diff(self.__knots).reshape((-1,) + (1,) * (values.ndim - 1))
+            return np.stack((np.diff(values, axis=0) / steps, values[:-1]))
+        if self.__interpol_type == "cubic":
+            # Same not-a-knot spline as interpolate.interp1d(kind="cubic")
+            return interpolate.CubicSpline(self.__knots, values, bc_type="not-a-knot", axis=0).c
+        return values
+
+    def _evaluate(self, times: np.ndarray, coefficients: np.ndarray) -> np.ndarray:
+        """
+        Interpolate at the given times, with coefficients computed by _coefficients.
+
+        Args:
+            times (np.ndarray): The maturities in years.
+            coefficients (np.ndarray): The interpolation coefficients.
+
+        Returns:
+            np.ndarray: The interpolated values, with the value axes after the time axes.
+        """
+        if self.__interpol_type in ["linear", "cubic"]:
+            idx = np.clip(np.searchsorted(self.__knots, times, side="right") - 1, 0, len(self.__knots) - 2)
+            dx = (times - self.__knots[idx]).reshape(times.shape + (1,) * (coefficients.ndim - 2))
+            values = coefficients[0, idx]
+            for coefficient in coefficients[1:]:
+                values = values * dx + coefficient[idx]
+            return values
+
+        # Barycentric formula
+        differences = times[..., None] - self.__knots
+        on_knot = differences == 0
+        differences = np.where(on_knot, 1.0, differences)
+        terms = self.__weights / differences
+        terms = np.where(on_knot.any(axis=-1, keepdims=True), on_knot, terms / terms.sum(axis=-1, keepdims=True))
+        return np.tensordot(terms, coefficients, axes=([-1], [0]))
+
+    def zero_rates(self, times) -> np.ndarray:
+        """
+        Determine the rates for an array of times.
+
+        Args:
+            times (float or array-like): The maturities in years.
+
+        Returns:
+            float or np.ndarray: The interpolated rates (extrapolated outside the curve).
+        """
+        times = np.asarray(times, dtype=float)
+        if self.__rate is not None:
+            return np.full(times.shape, float(self.__rate))[()]
+        return self._evaluate(times, self.__coefficients)[()]
+
+    def knot_weights(self, times) -> np.ndarray:
+        """
+        Determine the sensitivity of the rates to each knot of the curve, for an array of times.
+        Every supported interpolation is linear in the knot rates, so the weights are
+        obtained by interpolating the unit vectors of the knots.
+
+        Args:
+            times (float or array-like): The maturities in years.
+
+        Returns:
+            np.ndarray: The derivative of each rate with respect to each knot rate (knots in the input order,
+                on the last axis), or None for a single rate.
+        """
+        if self.__rate is not None:
+            return None
+        if self.__knot_coefficients is None:
+            self.__knot_coefficients = self._coefficients(np.eye(len(self.__knots))[self.__order])
+        return self._evaluate(np.asarray(times, dtype=float), self.__knot_coefficients)
+
+    def discount_factors(self, times, force_rate=None) -> np.ndarray:
+        """
+        Calculate the discount factors for an array of times.
+
+        Args:
+            times (float or array-like): The maturities in years.
+            force_rate (float or array-like, optional): Rates used instead of the curve. Defaults to None.
+
+        Returns:
+            float or np.ndarray: The discount factors.
+        """
+        times = np.asarray(times, dtype=float)
+        rates = self.zero_rates(times) if force_rate is None else np.asarray(force_rate, dtype=float)
+        if self.__rate_type == "continuous":
+            return np.exp(- rates * times)[()]
+        return (1.0 / (1 + rates) ** times)[()]
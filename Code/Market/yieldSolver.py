@@ -0,0 +1,139 @@
+import numpy as np
+
+
+def segment_sums(values: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """
+    Sum stacked values by segment (e.g. the cash flows of each bond), empty segments summing to zero.
+
+    Args:
+        values (np.ndarray): The stacked values, on the last axis.
+        indptr (np.ndarray): The position of the first value of each segment (and the total number of values).
+
+    Returns:
+        np.ndarray: The sum of each segment, on the last axis.
+    """
+    # reduceat takes one value for an empty segment : only the non-empty ones are reduced
+    filled = np.diff(indptr) > 0
+    sums = np.zeros(values.shape[:-1] + (len(filled),), dtype=np.result_type(values, float))
+    if filled.any():
+        sums[..., filled] = np.add.reduceat(values, indptr[:-1][filled], axis=-1)
+    return sums
+
+
+class YieldSolver:
+    """
+    A class solving bond yields to maturity with Newton steps on the analytic price-yield derivative,
+    safeguarded by a bisection bracket. Cash flows of several bonds are stacked in a compressed sparse row
+    layout, so that the yields of a whole book are solved at once.
+
+    Attributes:
+        __rate_type (str): The type of yield (continuous or compounded).
+        __tolerance (float): The tolerance on the yield.
+        __max_iterations (int): The maximum number of iterations.
+        __lower (float): The lower bound of the yield bracket.
+        __upper (float): The upper bound of the yield bracket.
+    """
+
+    def __init__(
+            self,
+            rate_type: str = "continuous",
+            tolerance: float = 1e-10,
+            max_iterations: int = 50,
+            lower: float = -0.5,
+            upper: float = 2.0
+            ) -> None:
+        """
+        Initialize a YieldSolver object.
+
+        Args:
+            rate_type (str, optional): The type of yield (continuous or compounded). Defaults to continuous.
+            tolerance (float, optional): The tolerance on the yield. Defaults to 1e-10.
+            max_iterations (int, optional): The maximum number of iterations. Defaults to 50.
+            lower (float, optional): The lower bound of the yield bracket. Defaults to -0.5.
+            upper (float, optional): The upper bound of the yield bracket. Defaults to 2.0.
+
+        Raises:
+            Exception: If rate_type is not 'continuous' or 'compounded'.
+        """
+
+        if rate_type not in ["continuous", "compounded"]:
+            raise Exception("Unknown rate type, should be continuous or compounded.")
+        self.__rate_type = rate_type
+        self.__tolerance = tolerance
+        self.__max_iterations = max_iterations
+        self.__lower = lower
+        self.__upper = upper
+
+    def _price(self, yields: np.ndarray, times: np.ndarray, amounts: np.ndarray, indptr: np.ndarray) -> tuple:
+        """
+        Price the bonds at the given yields, with the derivative of the prices with respect to the yields.
+
+        Args:
+            yields (np.ndarray): The yield of each bond.
+            times (np.ndarray): The payment dates of the stacked cash flows in years.
+            amounts (np.ndarray): The amounts of the stacked cash flows.
+            indptr (np.ndarray): The position of the first cash flow of each bond (and the total number of cash flows).
+
+        Returns:
+            tuple: Arrays of the prices and their derivatives.
+        """
+        rates = np.repeat(yields, np.diff(indptr))
+        if self.__rate_type == "continuous":
+            values = amounts * np.exp(- rates * times)
+            sensitivities = - values * times
+        else:
+            values = amounts * np.exp(- times * np.log1p(rates))
+            sensitivities = - values * times / (1 + rates)
+        return segment_sums(values, indptr), segment_sums(sensitivities, indptr)
+
+    def solve(self, prices, times, amounts, indptr=None, init_value=None) -> np.ndarray:
+        """
+        Solve the yields to maturity.
+
+        Args:
+            prices (float or array-like): The price of each bond.
+            times (np.ndarray): The payment dates of the (stacked) cash flows in years.
+            amounts (np.ndarray): The amounts of the (stacked) cash flows.
+            indptr (np.ndarray, optional): The position of the first cash flow of each bond. Defaults to a single bond.
+            init_value (float or array-like, optional): Initial yields, such as the previous solutions
+                when prices moved slightly. Defaults to 0.01.
+
+        Returns:
+            np.ndarray: The yield of each bond (NaN if no yield in the bracket reprices the bond).
+        """
+        times, amounts = np.asarray(times, dtype=float), np.asarray(amounts, dtype=float)
+        if indptr is None:
+            indptr = np.array([0, len(times)])
+        nb_bonds = len(indptr) - 1
+        prices = np.broadcast_to(np.asarray(prices, dtype=float), (nb_bonds,))
+        init_value = 0.01 if init_value is None else init_value
+        yields = np.array(np.broadcast_to(np.asarray(init_value, dtype=float), (nb_bonds,)))
+
+        # Prices decrease with the yield : keep a bracket
+        low, high = np.full(nb_bonds, self.__lower), np.full(nb_bonds, self.__upper)
+        yields = np.where((yields > low) & (yields < high), yields, 0.5 * (low + high))
+
+        active = np.ones(nb_bonds, dtype=bool)
+        for _ in range(self.__max_iterations):
+            if not active.any():
+                break
+            price, derivative = self._price(yields, times, amounts, indptr)
+            error = price - prices
+            low = np.where(error < 0, low, yields)
+            high = np.where(error > 0, high, yields)
+
+            # Newton step, falling back on bisection when leaving the bracket
+            with np.errstate(divide="ignore", invalid="ignore"):
+                new_yields = yields - error / derivative
+            outside = ~np.isfinite(new_yields) | (new_yields <= low) | (new_yields >= high)
+            new_yields = np.where(outside, 0.5 * (low + high), new_yields)
+
+            converged = np.abs(new_yields - yields) <= self.__tolerance
+            yields = np.where(active, new_yields, yields)
+            active &= ~converged
+
+        # Without a root in the bracket, the iterations end on one of its bounds (bonds without cash flows
+        # have no yield)
+        margin = 10 * self.__tolerance
+        valid = ~active & (np.diff(indptr) > 0) & (yields > self.__lower + margin) & (yields < self.__upper - margin)
+        return np.where(valid, yields, np.nan)
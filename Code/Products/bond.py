@@ -1,6 +1,44 @@
+import numpy as np
+
 from Market.maturity import Maturity
 from Market.rate import Rate
-from Market.optim import Optim
+from Market.yieldSolver import YieldSolver, segment_sums
+from Market.schedule import coupon_schedules, year_fractions
+
+
+def cash_flow_schedule(coupon_rate, maturity, nominal, nb_coupon) -> tuple:
+    """
+    Generate the cash flow schedules of fixed-rate bonds, stacked in a compressed sparse row layout.
+
+    Args:
+        coupon_rate (float or array-like): The coupon rate of each bond.
+        maturity (float or array-like): The maturity of each bond in years.
+        nominal (float or array-like): The nominal value of each bond.
+        nb_coupon (int or array-like): The number of coupon payments of each bond.
+
+    Returns:
+        tuple: Arrays of the position of the first cash flow of each bond (and the total number of cash flows),
+            the payment dates (in years) and the amounts of the cash flows.
+    """
+
+    coupon_rate, maturity, nominal, nb_coupon = [np.atleast_1d(np.asarray(x, dtype=float))
+                                                 for x in np.broadcast_arrays(coupon_rate, maturity, nominal, nb_coupon)]
+    nb_coupon = nb_coupon.astype(int)
+    indptr = np.concatenate(([0], np.cumsum(nb_coupon + 1)))
+    bond_index = np.repeat(np.arange(len(nb_coupon)), nb_coupon + 1)
+    position = np.arange(indptr[-1]) - indptr[bond_index]
+    t = maturity[bond_index] # Get maturity in year
+    step = t / nb_coupon[bond_index] # Step size for each coupon payment
+
+    # Get the period of each coupon payment, the last cash flow of each bond being paid today
+    times = np.where(position < nb_coupon[bond_index], np.abs(t - position * step), 0.0)
+
+    # Coupon Frequency
+    freq_coupon = (coupon_rate / nb_coupon * nominal)[bond_index]
+
+    # Get the coupon payment for each term, the nominal being paid at maturity
+    amounts = np.where(times < t, freq_coupon, freq_coupon + nominal[bond_index])
+    return indptr, times, amounts
 
 
 class FixedBond:
@@ -13,9 +51,12 @@ class FixedBond:
        nominal (float): The nominal value of the bond.
        coupon_rate (float): The coupon rate of the bond.
        nb_coupon (int): The number of coupon payments.
-       coupon (list): List of coupon payments as zero-coupon bonds.
+       cf_times (np.ndarray): The payment dates of the cash flows in years.
+       cf_amounts (np.ndarray): The amounts of the cash flows.
        price (float): The price of the bond.
        ytm (float): The yield to maturity of the bond.
+       last_ytm (float): The last yield found, used as a warm start.
+       solver (YieldSolver): The yield to maturity solver.
     """
 
     def __init__(
@@ -44,10 +85,12 @@ class FixedBond:
         self.nb_coupon = nb_coupon
         
         # # Generate coupon payments :
-        self.coupon = self.run_coupon()
+        self.cf_times, self.cf_amounts = self.schedule()
         
         self.__price = None
         self.__ytm = None
+        self.__last_ytm = None
+        self.__solver = YieldSolver(rate_type=rate.rate_type())
         
     
     def price(self, force_rate:float = None):
@@ -62,7 +105,7 @@ class FixedBond:
         """
         
         if self.__price is None or force_rate is not None:
-            price = sum([zc_bond["zc_bond"].price(force_rate=force_rate) for zc_bond in self.coupon])
+            price = float(self.present_values(force_rate=force_rate).sum())
             
             if force_rate is not None:
                 return price
@@ -72,58 +115,233 @@ class FixedBond:
         return self.__price
 
 
-    def ytm (self):
+    def ytm (self, price:float = None):
         """
         Calculate the yield to maturity of the bond.
 
+        Args:
+            price (float, optional): A market price of the bond. Defaults to the price on the rate curve.
+
         Returns:
             float: The yield to maturity of the bond.
         """
 
-        
-        if self.__ytm == None:
-            # Define an optimization function to find the yield to maturity :
-            fct_obj = lambda rate: self.price(force_rate=rate)
-            obj = Optim(fct_pricing=fct_obj, target_value=self.__price, init_value=0.01)
-            opt_res = obj.run()
-            if not opt_res["success"]:
+        if self.__ytm is None or price is not None:
+            target = self.price() if price is None else price
+            # Newton steps on the price-yield derivative, warm-started from the last yield found :
+            ytm = self.__solver.solve(target, self.cf_times, self.cf_amounts, init_value=self.__last_ytm)[0]
+            if np.isnan(ytm):
                 raise Exception("Not found YTM")
-            self.__ytm = opt_res["x"][0]
+            self.__last_ytm = float(ytm)
+            
+            if price is not None:
+                return self.__last_ytm
+            self.__ytm = self.__last_ytm
             
         return self.__ytm    
 
 
-    def  run_coupon(self):
+    def schedule(self) -> tuple:
         """
-        Generate coupon payments represented as zero-coupon bonds.
+        Generate the cash flow schedule of the bond.
 
         Returns:
-            list: List of dictionaries containing coupon payments.
+            tuple: Arrays of the payment dates (in years) and the amounts of the cash flows.
+        """
+
+        _, times, amounts = cash_flow_schedule(self.coupon_rate, self.maturity.maturity(), self.nominal, self.nb_coupon)
+        return times, amounts
+
+
+    def present_values(self, force_rate:float = None) -> np.ndarray:
+        """
+        Calculate the present value of each cash flow, discounted in a single call on the curve.
+
+        Args:
+            force_rate (float, optional): An optional parameter to specify a specific rate for discounting. Defaults to None.
+
+        Returns:
+            np.ndarray: The present values of the cash flows.
         """
 
-        t = self.maturity.maturity() # Get maturity in year
-        step = t / self.nb_coupon # Step size for each coupon payment
+        return self.cf_amounts * self.rate.discount_factors(self.cf_times, force_rate=force_rate)
+
 
-        # Get the period of each coupon payment
-        terms = sorted([abs(t - i * step) for i in range(self.nb_coupon)], reverse=True) + [0.0]
+    def  run_coupon(self):
+        """
+        Generate coupon payments represented as zero-coupon bonds.
 
-        # Coupon Frequency
-        freq_coupon = float(self.coupon_rate) / self.nb_coupon * self.nominal
+        Returns:
+            list: List of dictionaries containing coupon payments.
+        """
 
-        # Get the coupon payment for each term
-        coupons= [
+        return [
             {
                 "maturity" : term,
                 "cf_type" : "coupon",
-                "zc_bond" : ZcBond(
-                    self.rate, 
-                    Maturity(maturity_in_years=term), 
-                    freq_coupon + (0.0 if term < self.maturity.maturity() else self.nominal))
+                "amount" : amount,
+                "zc_bond" : ZcBond(self.rate, Maturity(maturity_in_years=term), amount)
             }
-            for term in terms
+            for term, amount in zip(self.cf_times.tolist(), self.cf_amounts.tolist())
         ]
-        
-        return coupons
+
+
+class BondCashFlows:
+    """
+    A class stacking the cash flows of several bonds in a compressed sparse row layout,
+    so that the whole book is discounted with one call on the curve.
+
+    Attributes:
+        bonds (list): The bonds (None when built from columns).
+        rate (Rate): The rate object used for discounting.
+        indptr (np.ndarray): The position of the first cash flow of each bond (and the total number of cash flows).
+        bond_index (np.ndarray): The bond of each cash flow.
+        times (np.ndarray): The payment dates of the cash flows in years.
+        amounts (np.ndarray): The amounts of the cash flows.
+        periods (np.ndarray): The time between two coupons of the bond of each cash flow.
+    """
+
+    def __init__(self, bonds: list, rate: Rate = None) -> None:
+        """
+        Initialize a BondCashFlows object.
+
+        Args:
+            bonds (list): The bonds (FixedBond).
+            rate (Rate, optional): The rate object used for discounting. Defaults to the rate of the first bond.
+        """
+
+        if not bonds:
+            raise Exception("Missing inputs : bonds")
+        self.bonds = bonds
+        self.rate = rate if rate is not None else bonds[0].rate
+
+        sizes = np.array([len(bond.cf_times) for bond in bonds])
+        self._stack(np.concatenate(([0], np.cumsum(sizes))),
+                    np.concatenate([bond.cf_times for bond in bonds]),
+                    np.concatenate([bond.cf_amounts for bond in bonds]),
+                    np.array([bond.maturity.maturity() / bond.nb_coupon for bond in bonds]))
+
+    @classmethod
+    def from_columns(cls, coupon_rate, maturity, nominal, nb_coupon, rate: Rate):
+        """
+        Build the stacked cash flows directly from bond definition columns, without FixedBond objects.
+
+        Args:
+            coupon_rate (array-like): The coupon rate of each bond.
+            maturity (array-like): The maturity of each bond in years.
+            nominal (array-like): The nominal value of each bond.
+            nb_coupon (array-like): The number of coupon payments of each bond.
+            rate (Rate): The rate object used for discounting.
+
+        Returns:
+            BondCashFlows: The stacked cash flows.
+        """
+
+        cash_flows = cls.__new__(cls)
+        cash_flows.bonds = None
+        cash_flows.rate = rate
+        indptr, times, amounts = cash_flow_schedule(coupon_rate, maturity, nominal, nb_coupon)
+        cash_flows._stack(indptr, times, amounts, np.asarray(maturity, dtype=float) / np.asarray(nb_coupon, dtype=float))
+        return cash_flows
+
+    @classmethod
+    def from_dates(cls, valuation_date, maturity_dates, coupon_rate, nominal, frequency, rate: Rate,
+                   day_count_convention: str = "ACT/365", calendar: np.busdaycalendar = None):
+        """
+        Build the stacked cash flows from dated bond definitions : the coupon dates after the valuation date
+        are rolled backward from each maturity date, and converted to year fractions with the day count convention.
+
+        Args:
+            valuation_date: The valuation date.
+            maturity_dates (array-like): The maturity date of each bond.
+            coupon_rate (array-like): The annual coupon rate of each bond.
+            nominal (array-like): The nominal value of each bond.
+            frequency (array-like): The number of coupon payments per year of each bond.
+            rate (Rate): The rate object used for discounting.
+            day_count_convention (str, optional): The day count convention. Defaults to ACT/365.
+            calendar (np.busdaycalendar, optional): The business day calendar used to adjust the dates. Defaults to None.
+
+        Returns:
+            BondCashFlows: The stacked cash flows.
+        """
+
+        indptr, dates = coupon_schedules(valuation_date, maturity_dates, frequency, calendar=calendar)
+        coupon_rate, nominal, frequency = [np.broadcast_to(np.asarray(x, dtype=float), (len(indptr) - 1,))
+                                           for x in (coupon_rate, nominal, frequency)]
+        bond_index = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+        # Coupon on each date, the nominal being paid on the last one
+        amounts = (coupon_rate / frequency * nominal)[bond_index]
+        amounts[indptr[1:][np.diff(indptr) > 0] - 1] += nominal[np.diff(indptr) > 0]
+
+        cash_flows = cls.__new__(cls)
+        cash_flows.bonds = None
+        cash_flows.rate = rate
+        cash_flows._stack(indptr, year_fractions(valuation_date, dates, day_count_convention), amounts, 1.0 / frequency)
+        return cash_flows
+
+    def _stack(self, indptr: np.ndarray, times: np.ndarray, amounts: np.ndarray, periods: np.ndarray) -> None:
+        """ Store the stacked cash flows, with the time between two coupons of each bond. """
+        if len(indptr) < 2:
+            raise Exception("Missing inputs : bonds")
+        self.indptr = indptr
+        self.bond_index = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        self.times = times
+        self.amounts = amounts
+        self.periods = np.broadcast_to(periods, (len(indptr) - 1,))[self.bond_index]
+
+    def _sum(self, values: np.ndarray) -> np.ndarray:
+        """ Sum the values of the cash flows by bond (the last axis holds the cash flows), zero for matured bonds. """
+        return segment_sums(values, self.indptr)
+
+    def present_values(self, force_rate = None) -> np.ndarray:
+        """
+        Calculate the present value of every cash flow.
+
+        Args:
+            force_rate (float or np.ndarray, optional): A rate for all bonds, or one rate per bond. Defaults to None.
+
+        Returns:
+            np.ndarray: The present values of the cash flows.
+        """
+
+        if force_rate is not None and np.ndim(force_rate) > 0:
+            force_rate = np.asarray(force_rate, dtype=float)[self.bond_index]
+        return self.amounts * self.rate.discount_factors(self.times, force_rate=force_rate)
+
+    def prices(self, force_rate = None) -> np.ndarray:
+        """
+        Calculate the price of every bond.
+
+        Args:
+            force_rate (float or np.ndarray, optional): A rate for all bonds, or one rate per bond. Defaults to None.
+
+        Returns:
+            np.ndarray: The prices of the bonds.
+        """
+
+        return self._sum(self.present_values(force_rate=force_rate))
+
+    def ytms(self, prices = None, init_value = None) -> np.ndarray:
+        """
+        Solve the yield to maturity of every bond at once.
+
+        Args:
+            prices (np.ndarray, optional): Market prices of the bonds. Defaults to the prices on the rate curve.
+            init_value (np.ndarray, optional): Initial yields, such as the previous solutions.
+                Defaults to the zero rate at the maturity of each bond.
+
+        Returns:
+            np.ndarray: The yields to maturity of the bonds (NaN when not found, or for matured bonds).
+        """
+
+        prices = self.prices() if prices is None else prices
+        if init_value is None:
+            filled = np.diff(self.indptr) > 0
+            init_value = np.full(len(filled), 0.01)
+            init_value[filled] = self.rate.zero_rates(self.times[self.indptr[:-1][filled]])
+        solver = YieldSolver(rate_type=self.rate.rate_type())
+        return solver.solve(prices, self.times, self.amounts, indptr=self.indptr, init_value=init_value)
 
 
 class ZcBond:
@@ -1,5 +1,7 @@
 import numpy as np
 
+from Products.piecewiseLinear import PiecewiseLinearPayoff
+
 FOREX = "forex rate"
 CALL, PUT = "call", "put"
 
@@ -8,6 +10,8 @@ class AbstractProduct:
     """ Abstract class representing a financial product. """
     _product_name = "product"
     _inputs = None
+    _lipschitz_payoff = False
+    _compiled_payoff = None
 
     def __init__(self, inputs: dict) -> None: 
         """ 
@@ -31,6 +35,35 @@ class AbstractProduct:
         
         raise Exception("Not implemented")
 
+    def payoff_derivative(self, spot: float) -> float:
+        """
+        Method to calculate the derivative of the payoff with respect to the final spot.
+        Only available for products with a Lipschitz payoff (see _lipschitz_payoff).
+
+        Args:
+            spot (float): Final spot price.
+
+        Returns:
+            float: Derivative of the payoff.
+        """
+        
+        raise Exception("Not implemented")
+
+    def piecewise_linear(self) -> PiecewiseLinearPayoff:
+        """
+        Canonical piecewise-linear form of the payoff, compiled once.
+
+        Returns:
+            PiecewiseLinearPayoff: The payoff (None if it is not piecewise linear in the final spot).
+        """
+        if self._compiled_payoff is None:
+            self._compiled_payoff = self._compile_payoff()
+        return self._compiled_payoff
+
+    def _compile_payoff(self) -> PiecewiseLinearPayoff:
+        """ Build the canonical piecewise-linear form of the payoff (None if the payoff is not piecewise linear). """
+        return None
+
 
 class VanillaOption(AbstractProduct):
     """ A class representing a Vanilla Option (Call/Put) option financial product.
@@ -39,6 +72,7 @@ class VanillaOption(AbstractProduct):
         _strike (float): strike of the option.
         _optio_type (str): type of option (call or put).
     """
+    _lipschitz_payoff = True
     
     def __init__(self, underlying: str, inputs: dict) -> None :
         """ 
@@ -72,6 +106,24 @@ class VanillaOption(AbstractProduct):
         else : 
             raise ValueError("Choose an option type (call or put)")
 
+    def payoff_derivative(self, spot: float) -> float:
+        """ Calculate and returns the derivative of the payoff with respect to the spot. """
+        if self._option_type == CALL : 
+            return np.where(spot > self._strike, 1.0, 0.0)
+        elif self._option_type == PUT :
+            return np.where(spot < self._strike, -1.0, 0.0)
+        else : 
+            raise ValueError("Choose an option type (call or put)")
+
+    def _compile_payoff(self) -> PiecewiseLinearPayoff:
+        """ Build the canonical piecewise-linear form of the payoff. """
+        if self._option_type == CALL : 
+            return PiecewiseLinearPayoff.call(self._strike)
+        elif self._option_type == PUT :
+            return PiecewiseLinearPayoff.put(self._strike)
+        else : 
+            raise ValueError("Choose an option type (call or put)")
+
 
 class OptionProducts(AbstractProduct):
     """ A class representing a Straddle or a Strangle financial product.
@@ -83,6 +135,7 @@ class OptionProducts(AbstractProduct):
         _type (str): type of option strategy (straddle, strangle, strip, strap).
         _long_short (str) : if the product is long or short.
     """
+    _lipschitz_payoff = True
 
     def __init__(self, type: str, long_short: str, inputs: dict) -> None:
         """ 
@@ -124,20 +177,29 @@ class OptionProducts(AbstractProduct):
             if self._call._strike <= self._put._strike:
                 raise Exception("Input Error : For a strangle, the call strike should be higher than the put strike.")
 
-    def payoff(self, spot: float) -> float:
-        """ Calculate and returns the payoff of an option product. """
+    def _compile_payoff(self) -> PiecewiseLinearPayoff:
+        """ Build the canonical piecewise-linear form of the payoff of an option product. """
+        call, put = self._call.piecewise_linear(), self._put.piecewise_linear()
         if self._type == "straddle" or self._type == "strangle":
-            payoff = self._call.payoff(spot) + self._put.payoff(spot)
+            payoff = call + put
         elif self._type == "strip":
-            payoff = self._call.payoff(spot) + self._put.payoff(spot) * 2
+            payoff = call + put * 2
         elif self._type == "strap":
-            payoff = self._call.payoff(spot) * 2 + self._put.payoff(spot)
+            payoff = call * 2 + put
             
         if self._longshort == "long":
             return payoff
         else:
             return -payoff
 
+    def payoff(self, spot: float) -> float:
+        """ Calculate and returns the payoff of an option product. """
+        return self.piecewise_linear().payoff(spot)
+
+    def payoff_derivative(self, spot: float) -> float:
+        """ Calculate and returns the derivative of the payoff of an option product with respect to the spot. """
+        return self.piecewise_linear().derivative(spot)
+
     def price(self) -> float:
         """ Calculate and returns the price of an option product. """
         if self._type == "straddle" or self._type == "strangle":
@@ -224,6 +286,7 @@ class Spread(AbstractProduct):
         _short_leg_price (float) : price of the short leg of the spread.
         _type : if the spread is a call or a put spread.
     """
+    _lipschitz_payoff = True
     
     def __init__(self, type: str, inputs: dict) -> None:
         """ 
@@ -262,9 +325,17 @@ class Spread(AbstractProduct):
         else:
             raise Exception("Input error : Please enter 'put spread' or 'call spread'.")
 
+    def _compile_payoff(self) -> PiecewiseLinearPayoff:
+        """ Build the canonical piecewise-linear form of the payoff of the spread. """
+        return self._long_leg.piecewise_linear() - self._short_leg.piecewise_linear()
+
     def payoff(self, spot: float) -> float:
         """ Calculate and returns the payoff of the spread. """
-        return self._long_leg.payoff(spot) - self._short_leg.payoff(spot)
+        return self.piecewise_linear().payoff(spot)
+
+    def payoff_derivative(self, spot: float) -> float:
+        """ Calculate and returns the derivative of the payoff of the spread with respect to the spot. """
+        return self.piecewise_linear().derivative(spot)
 
     def price(self) -> float:
         """ Calculate and returns the price of the spread. """
@@ -277,6 +348,7 @@ class ButterflySpread(AbstractProduct):
         _put_spread (Spread): Put spread part of the butterfly.
         _call_spread(Spread): Call spread part of the butterfly.
     """
+    _lipschitz_payoff = True
 
     def __init__(self, inputs: dict) -> None:
         """ 
@@ -300,9 +372,17 @@ class ButterflySpread(AbstractProduct):
         if self._put_spread._short_leg._strike != self._call_spread._short_leg._strike:
             raise Exception("Input error : The strike of the put spread short leg should be equal to the strike of the call spread short leg.")
 
+    def _compile_payoff(self) -> PiecewiseLinearPayoff:
+        """ Build the canonical piecewise-linear form of the payoff of the butterfly spread (short legs merged). """
+        return self._put_spread.piecewise_linear() + self._call_spread.piecewise_linear()
+
     def payoff(self, spot: float) -> float:
         """ Calculate and returns the payoff of the butterfly spread. """
-        return self._put_spread.payoff(spot) + self._call_spread.payoff(spot)
+        return self.piecewise_linear().payoff(spot)
+
+    def payoff_derivative(self, spot: float) -> float:
+        """ Calculate and returns the derivative of the payoff of the butterfly spread with respect to the spot. """
+        return self.piecewise_linear().derivative(spot)
 
     def price(self)  -> float:
         """ Calculate and returns the price of the butterfly spread. """
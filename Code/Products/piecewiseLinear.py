@@ -0,0 +1,121 @@
+import numpy as np
+
+
+class PiecewiseLinearPayoff:
+    """
+    A class representing a payoff piecewise linear in the final spot, in the canonical form
+    constant + slope * spot + sum of weight * max(spot - breakpoint, 0).
+    Payoffs combine with +, - and scalar *, legs at the same breakpoint being merged.
+
+    Attributes:
+        breakpoints (np.array): The sorted distinct breakpoints (strikes).
+        weights (np.array): The change of slope at each breakpoint.
+        constant (float): The payoff at a zero spot.
+        slope (float): The slope below the first breakpoint.
+        __intercepts (np.array): The intercept of the payoff on each interval between breakpoints.
+        __slopes (np.array): The slope of the payoff on each interval between breakpoints.
+    """
+
+    def __init__(self, breakpoints=(), weights=(), constant: float = 0.0, slope: float = 0.0) -> None:
+        """
+        Initialize a PiecewiseLinearPayoff object.
+
+        Args:
+            breakpoints (array-like, optional): The breakpoints, in any order and possibly repeated. Defaults to none.
+            weights (array-like, optional): The change of slope at each breakpoint. Defaults to none.
+            constant (float, optional): The payoff at a zero spot. Defaults to 0.
+            slope (float, optional): The slope below the first breakpoint. Defaults to 0.
+        """
+
+        breakpoints, positions = np.unique(np.asarray(breakpoints, dtype=float), return_inverse=True)
+        merged = np.zeros(len(breakpoints))
+        np.add.at(merged, positions, np.asarray(weights, dtype=float))
+        kept = merged != 0
+        self.breakpoints, self.weights = breakpoints[kept], merged[kept]
+        self.constant, self.slope = float(constant), float(slope)
+
+        self.__slopes = self.slope + np.concatenate(([0.0], np.cumsum(self.weights)))
+        self.__intercepts = self.constant - np.concatenate(([0.0], np.cumsum(self.weights * self.breakpoints)))
+
+    @classmethod
+    def call(cls, strike: float, quantity: float = 1.0):
+        """ Payoff of a quantity of calls. """
+        return cls([strike], [quantity])
+
+    @classmethod
+    def put(cls, strike: float, quantity: float = 1.0):
+        """ Payoff of a quantity of puts : max(K - S, 0) = max(S - K, 0) - S + K. """
+        return cls([strike], [quantity], constant=quantity * strike, slope=-quantity)
+
+    def __add__(self, other):
+        if not isinstance(other, PiecewiseLinearPayoff):
+            return PiecewiseLinearPayoff(self.breakpoints, self.weights, self.constant + other, self.slope)
+        return PiecewiseLinearPayoff(np.concatenate((self.breakpoints, other.breakpoints)),
+                                     np.concatenate((self.weights, other.weights)),
+                                     self.constant + other.constant, self.slope + other.slope)
+
+    __radd__ = __add__
+
+    def __mul__(self, factor: float):
+        return PiecewiseLinearPayoff(self.breakpoints, self.weights * factor, self.constant * factor, self.slope * factor)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return self * -1.0
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def payoff(self, spot):
+        """
+        Evaluate the payoff in one pass : the affine payoff of the interval of each spot.
+
+        Args:
+            spot (float or np.array): Final spot prices.
+
+        Returns:
+            float or np.array: The payoffs.
+        """
+        interval = np.searchsorted(self.breakpoints, spot)
+        return self.__intercepts[interval] + self.__slopes[interval] * spot
+
+    def derivative(self, spot):
+        """
+        Evaluate the derivative of the payoff with respect to the spot (left derivative at the breakpoints).
+
+        Args:
+            spot (float or np.array): Final spot prices.
+
+        Returns:
+            float or np.array: The derivatives.
+        """
+        return self.__slopes[np.searchsorted(self.breakpoints, spot)]
+
+    def expectation(self, terminals: np.ndarray, sums: np.ndarray) -> tuple:
+        """
+        Mean payoff and probability of a positive payoff over sorted spots, in closed form.
+
+        Args:
+            terminals (np.array): The sorted final spot prices.
+            sums (np.array): Their prefix sums (starting at 0).
+
+        Returns:
+            tuple: The mean payoff and the probability of a positive payoff.
+        """
+        nb_spots = len(terminals)
+        bounds = np.concatenate(([0], np.searchsorted(terminals, self.breakpoints), [nb_spots]))
+        low, high = bounds[:-1], bounds[1:]
+        mean = np.sum(self.__intercepts * (high - low) + self.__slopes * (sums[high] - sums[low])) / nb_spots
+
+        # The payoff is affine on each interval : the positive spots are contiguous
+        with np.errstate(divide="ignore", invalid="ignore"):
+            root = - self.__intercepts / self.__slopes
+        above = np.clip(np.searchsorted(terminals, root, side="right"), low, high)
+        below = np.clip(np.searchsorted(terminals, root, side="left"), low, high)
+        counts = np.where(self.__slopes > 0, high - above,
+                          np.where(self.__slopes < 0, below - low, np.where(self.__intercepts > 0, high - low, 0)))
+        return mean, counts.sum() / nb_spots
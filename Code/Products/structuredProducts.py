@@ -1,4 +1,5 @@
 from Products.optionalProducts import AbstractProduct
+from Products.piecewiseLinear import PiecewiseLinearPayoff
 
 class ReverseConvertible(AbstractProduct):
     """ A class representing a Structured Product.
@@ -9,6 +10,7 @@ class ReverseConvertible(AbstractProduct):
         _bond_price (float): Bond price.
         _coupon (float) : additional coupon provided.
      """
+    _lipschitz_payoff = True
 
     def __init__(self, inputs: dict):
         """ 
@@ -29,9 +31,17 @@ class ReverseConvertible(AbstractProduct):
         self._bond = self._inputs.get("bond")
         self._bond_price = self._inputs.get("bond price")
 
+    def _compile_payoff(self) -> PiecewiseLinearPayoff:
+        """ Build the canonical piecewise-linear form of the payoff of the reverse convertible. """
+        return - self._short_put.piecewise_linear() + self._bond.nominal
+
     def payoff(self, spot: float) -> float:
         """ Calculate and returns the payoff of the reverse convertible. """
-        return - self._short_put.payoff(spot) + self._bond.nominal
+        return self.piecewise_linear().payoff(spot)
+
+    def payoff_derivative(self, spot: float) -> float:
+        """ Calculate and returns the derivative of the payoff of the reverse convertible with respect to the spot. """
+        return self.piecewise_linear().derivative(spot)
 
     def price(self) -> float:
         """ Calculate and returns the price of the reverse convertible. """
@@ -46,6 +56,7 @@ class CertificatOutperformance(AbstractProduct):
         _call (VanillaOption): call object.
         _call_price (float): price of the call.
     """
+    _lipschitz_payoff = True
 
     def __init__(self, inputs: dict) -> None:
         """ 
@@ -74,9 +85,17 @@ class CertificatOutperformance(AbstractProduct):
         """ Calculate and returns the participation level of the certificat outperformance. """
         return self._zs_call_price / self._call_price
 
+    def _compile_payoff(self) -> PiecewiseLinearPayoff:
+        """ Build the canonical piecewise-linear form of the payoff of the certificat outperformance. """
+        return self._zs_call.piecewise_linear() + (self.participation_level() - 1) * self._call.piecewise_linear()
+
     def payoff(self, spot: float) -> float:
         """ Calculate and returns the payoff of the certificat outperformance. """
-        return self._zs_call.payoff(spot) + (self.participation_level() - 1) * self._call.payoff(spot)
+        return self.piecewise_linear().payoff(spot)
+
+    def payoff_derivative(self, spot: float) -> float:
+        """ Calculate and returns the derivative of the payoff of the certificat outperformance with respect to the spot. """
+        return self.piecewise_linear().derivative(spot)
 
     def price(self) -> float:
         """ Calculate and returns the price of the certificat outperformance. """
@@ -0,0 +1,38 @@
+import numpy as np
+
+from Market.rate import Rate
+from Market.schedule import coupon_schedules
+from Products.bond import BondCashFlows
+from RisksAnalysis.risks import BondBookRisk
+
+RATE = Rate(0.03, rate_type="compounded")
+
+
+def _price(maturity_date: str) -> float:
+    """ Price of one bond, built alone. """
+    return BondCashFlows.from_dates("2026-10-19", [maturity_date], 0.05, 100, 2, RATE).prices()[0]
+
+
+def test_schedules_of_matured_instruments_are_empty():
+    indptr, dates = coupon_schedules("2026-10-19", ["2026-10-05", "2025-03-01", "2027-06-30"], 2)
+    assert list(np.diff(indptr)) == [0, 0, 2]
+    assert list(dates) == list(np.array(["2026-12-30", "2027-06-30"], dtype="datetime64[D]"))
+
+
+def test_matured_bonds_are_worth_nothing():
+    maturity_dates = ["2027-06-30", "2026-10-05", "2026-10-31", "2030-06-30", "2025-03-01"]
+    cash_flows = BondCashFlows.from_dates("2026-10-19", maturity_dates, 0.05, 100, 2, RATE)
+    prices = cash_flows.prices()
+    assert prices[1] == 0 and prices[4] == 0
+    for position in [0, 2, 3]:
+        assert np.isclose(prices[position], _price(maturity_dates[position]))
+
+    ytms = cash_flows.ytms()
+    assert np.isnan(ytms[1]) and np.isnan(ytms[4])
+    assert np.allclose(ytms[[0, 2, 3]], 0.03)
+
+
+def test_book_of_matured_bonds():
+    risk = BondBookRisk(BondCashFlows.from_dates("2026-10-19", ["2026-10-05", "2020-01-01"], 0.05, 100, 2, RATE))
+    assert list(risk.prices()) == [0, 0]
+    assert np.all(np.isnan(risk.ytms())) and list(risk.convexity()) == [0, 0]
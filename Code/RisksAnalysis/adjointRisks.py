@@ -0,0 +1,379 @@
+import numpy as np
+
+from Products.optionalProducts import AbstractProduct
+from Market.brownianMotion import BrownianMotion
+
+
+SHARE_DIV = "dividend share"
+FOREX = "forex rate"
+CAPITALIZED_INDEX = "capitalized index"
+CALL, PUT = "call", "put"
+
+
+def _unbroadcast(grad, shape:tuple):
+    """ Sum an adjoint over the dimensions that were broadcast to reach it. """
+    grad = np.asarray(grad, dtype=float)
+    while grad.ndim > len(shape):
+        grad = grad.sum(axis=0)
+    for axis, size in enumerate(shape):
+        if size == 1 and grad.shape[axis] != 1:
+            grad = grad.sum(axis=axis, keepdims=True)
+    return grad.reshape(shape)
+
+
+class Tape:
+    """
+    A class representing a reverse-mode automatic differentiation tape.
+    Operations on TapeVariable objects are recorded in order, and one backward sweep
+    propagates the adjoints of an output to every recorded input.
+
+    Attributes:
+        _nodes (list): The recorded variables, in creation order.
+    """
+
+    def __init__(self) -> None:
+        """ Initialize an empty Tape object. """
+        self._nodes = []
+
+    def variable(self, value, parents: list = None):
+        """
+        Record a new variable on the tape.
+
+        Args:
+            value: The value of the variable (float or np.ndarray).
+            parents (list, optional): List of (parent variable, adjoint function) pairs. Defaults to None.
+
+        Returns:
+            TapeVariable: The recorded variable.
+        """
+        node = TapeVariable(self, value, parents or [])
+        self._nodes.append(node)
+        return node
+
+    def gradient(self, output, inputs: list) -> list:
+        """
+        Propagate the adjoint of an output backward through the tape.
+
+        Args:
+            output (TapeVariable): The scalar output to differentiate.
+            inputs (list): The variables to differentiate with respect to.
+
+        Returns:
+            list: The derivative of the output with respect to each input.
+        """
+        keep = {id(node) for node in inputs}
+        adjoints = {id(output): np.ones_like(output.value, dtype=float)}
+        for node in reversed(self._nodes[:output._index + 1]):
+            adjoint = adjoints.get(id(node)) if id(node) in keep else adjoints.pop(id(node), None)
+            if adjoint is None:
+                continue
+            for parent, backward in node._parents:
+                grad = _unbroadcast(backward(adjoint), np.shape(parent.value))
+                adjoints[id(parent)] = adjoints.get(id(parent), 0.0) + grad
+        return [adjoints.get(id(node), np.zeros_like(node.value, dtype=float)) for node in inputs]
+
+
+class TapeVariable:
+    """
+    A class representing a value recorded on a Tape.
+    Supports the arithmetic operators and the NumPy ufuncs used by the pricing pipeline and the
+    product payoffs; comparisons return plain boolean arrays (they carry no derivative).
+
+    Attributes:
+        value: The value of the variable.
+        _tape (Tape): The tape the variable is recorded on.
+        _parents (list): List of (parent variable, adjoint function) pairs.
+        _index (int): Position of the variable on the tape.
+    """
+
+    __array_priority__ = 1000
+
+    def __init__(self, tape: Tape, value, parents: list) -> None:
+        """
+        Initialize a TapeVariable object. Use Tape.variable to record it.
+
+        Args:
+            tape (Tape): The tape the variable is recorded on.
+            value: The value of the variable.
+            parents (list): List of (parent variable, adjoint function) pairs.
+        """
+        self._tape = tape
+        self.value = value
+        self._parents = parents
+        self._index = len(tape._nodes)
+
+    def _lift(self, other):
+        """ Record a constant on the tape if needed. """
+        if isinstance(other, TapeVariable):
+            return other
+        return self._tape.variable(np.asarray(other, dtype=float))
+
+    @property
+    def shape(self) -> tuple:
+        return np.shape(self.value)
+
+    @property
+    def ndim(self) -> int:
+        return np.ndim(self.value)
+
+    def __len__(self) -> int:
+        return len(self.value)
+
+    def __array__(self, dtype=None, copy=None):
+        # Leaving the tape : the derivative is lost (e.g. discontinuous payoffs)
+        return np.asarray(self.value, dtype=dtype)
+
+    # Arithmetic operators
+    def __add__(self, other): return np.add(self, other)
+    def __radd__(self, other): return np.add(other, self)
+    def __sub__(self, other): return np.subtract(self, other)
+    def __rsub__(self, other): return np.subtract(other, self)
+    def __mul__(self, other): return np.multiply(self, other)
+    def __rmul__(self, other): return np.multiply(other, self)
+    def __truediv__(self, other): return np.true_divide(self, other)
+    def __rtruediv__(self, other): return np.true_divide(other, self)
+    def __pow__(self, other): return np.power(self, other)
+    def __neg__(self): return np.negative(self)
+
+    # Comparisons carry no derivative
+    def __gt__(self, other): return np.asarray(self.value) > np.asarray(other)
+    def __ge__(self, other): return np.asarray(self.value) >= np.asarray(other)
+    def __lt__(self, other): return np.asarray(self.value) < np.asarray(other)
+    def __le__(self, other): return np.asarray(self.value) <= np.asarray(other)
+
+    def __getitem__(self, key):
+        shape = self.shape
+        def backward(g):
+            grad = np.zeros(shape)
+            np.add.at(grad, key, g)
+            return grad
+        return self._tape.variable(np.asarray(self.value)[key], [(self, backward)])
+
+    def __setitem__(self, key, other):
+        # The previous state is kept as a parent and this variable becomes the updated one.
+        other = self._lift(other)
+        previous = self._tape.variable(self.value, self._parents)
+        previous._index, self._index = self._index, len(self._tape._nodes)
+        self._tape._nodes[previous._index] = previous
+        self._tape._nodes.append(self)
+
+        value = np.array(self.value, dtype=float)
+        value[key] = other.value
+        mask = np.zeros(value.shape, dtype=bool)
+        mask[key] = True
+        self.value = value
+        self._parents = [(previous, lambda g: np.where(mask, 0.0, g)),
+                         (other, lambda g: g[key])]
+
+    def sum(self, axis=None):
+        shape = self.shape
+        def backward(g):
+            if axis is not None:
+                g = np.expand_dims(g, axis)
+            return np.broadcast_to(g, shape)
+        return self._tape.variable(np.sum(self.value, axis=axis), [(self, backward)])
+
+    def mean(self, axis=None):
+        count = np.size(self.value) if axis is None else np.shape(self.value)[axis]
+        return self.sum(axis=axis) / count
+
+    def cumsum(self, axis=None):
+        def backward(g):
+            return np.flip(np.cumsum(np.flip(g, axis=axis), axis=axis), axis=axis)
+        return self._tape.variable(np.cumsum(self.value, axis=axis), [(self, backward)])
+
+    def __array_function__(self, func, types, args, kwargs):
+        if func is np.sum:
+            return args[0].sum(**kwargs)
+        if func is np.mean:
+            return args[0].mean(**kwargs)
+        if func is np.cumsum:
+            return args[0].cumsum(**kwargs)
+        if func is np.where and len(args) == 3:
+            condition = np.asarray(args[0])
+            a, b = self._lift(args[1]), self._lift(args[2])
+            return self._tape.variable(np.where(condition, a.value, b.value),
+                                       [(a, lambda g: np.where(condition, g, 0.0)),
+                                        (b, lambda g: np.where(condition, 0.0, g))])
+        # Any other function leaves the tape
+        values = [np.asarray(arg) if isinstance(arg, TapeVariable) else arg for arg in args]
+        return func(*values, **kwargs)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != "__call__" or kwargs:
+            return NotImplemented
+        if ufunc in (np.greater, np.greater_equal, np.less, np.less_equal, np.equal, np.not_equal):
+            return ufunc(*[np.asarray(x) for x in inputs])
+
+        args = [self._lift(x) for x in inputs]
+        values = [arg.value for arg in args]
+        out = ufunc(*values)
+
+        if ufunc is np.add:
+            backwards = [lambda g: g, lambda g: g]
+        elif ufunc is np.subtract:
+            backwards = [lambda g: g, lambda g: -g]
+        elif ufunc is np.multiply:
+            backwards = [lambda g: g * values[1], lambda g: g * values[0]]
+        elif ufunc is np.true_divide:
+            backwards = [lambda g: g / values[1], lambda g: -g * values[0] / values[1] ** 2]
+        elif ufunc is np.negative:
+            backwards = [lambda g: -g]
+        elif ufunc is np.exp:
+            backwards = [lambda g: g * out]
+        elif ufunc is np.log:
+            backwards = [lambda g: g / values[0]]
+        elif ufunc is np.sqrt:
+            backwards = [lambda g: g * 0.5 / out]
+        elif ufunc is np.power:
+            backwards = [lambda g: g * values[1] * values[0] ** (values[1] - 1),
+                         lambda g: g * out * np.log(np.where(values[0] > 0, values[0], 1.0))]
+        elif ufunc is np.maximum:
+            backwards = [lambda g: g * (values[0] >= values[1]), lambda g: g * (values[0] < values[1])]
+        elif ufunc is np.minimum:
+            backwards = [lambda g: g * (values[0] <= values[1]), lambda g: g * (values[0] > values[1])]
+        else:
+            return NotImplemented
+        return self._tape.variable(out, list(zip(args, backwards)))
+
+
+class AdjointRisk:
+    """
+    A class representing adjoint (AAD) risk analysis.
+    The discount factor, the simulated prices and the product payoff are recorded on a tape, and a
+    single backward sweep returns the sensitivity of the price to every market input at once.
+    Discontinuous payoffs (binary options, barrier indicators) carry no pathwise derivative : they are
+    rejected, their greeks being given by the likelihood-ratio weights of MonteCarloRisk or by BumpRisk.
+
+    The rates sensitivities are taken with respect to the quoted rates (one per curve point), while rho is,
+    as in MonteCarloRisk and BumpRisk, the sensitivity to a parallel shift of the continuously
+    compounded rate.
+
+    Attributes:
+        __product (AbstractProduct): The product to analyze.
+        __process (BrownianMotion): The Brownian motion process.
+        __monte_carlo (bool): If the product is priced on full paths or on terminal values only.
+        __price (float): The price of the product.
+        __gradient (dict): The sensitivity of the price to each market input.
+    """
+
+    def __init__(self, product: AbstractProduct, process: BrownianMotion, monte_carlo: bool = False) -> None:
+        """
+        Initialize AdjointRisk object.
+
+        Args:
+            product (AbstractProduct): The product to analyze.
+            process (BrownianMotion): The Brownian motion process the product is priced with.
+            monte_carlo (bool, optional): If the product is priced on full paths. Defaults to False.
+
+        Raises:
+            Exception: If the payoff of the product is discontinuous.
+        """
+        if not product._lipschitz_payoff:
+            raise Exception("No pathwise derivative for a discontinuous payoff : use MonteCarloRisk or BumpRisk")
+        self.__product = product
+        self.__process = process
+        self.__monte_carlo = monte_carlo
+        self.__price = None
+        self.__gradient = None
+
+    def _run(self) -> None:
+        """ Record the pricing on a tape and run the backward sweep. """
+        process = self.__process
+        product = self.__product
+        maturity = process.input("maturity")
+        t = maturity.maturity()
+        rates = process.input("rates")
+        tape = Tape()
+
+        inputs = {"spot": tape.variable(float(process.input("spot"))),
+                  "volatility": tape.variable(float(process._volatility(product))),
+                  "rate_shift": tape.variable(0.0)}
+
+        # Discount factors of the maturity and of the simulation dates
+        times = process._generate_z().columns.to_numpy(dtype=float)
+        curve = rates.curve_points()
+        if curve is None:
+            inputs["rates"] = tape.variable(float(rates.rate(maturity)))
+            rate = zero_rates = inputs["rates"]
+        else:
+            inputs["rates"] = tape.variable(curve[1])
+            rate = (inputs["rates"] * rates.rate_weights(maturity)).sum()
+            zero_rates = (inputs["rates"] * rates.knot_weights(times)).sum(axis=1)
+        if rates.rate_type() == "continuous":
+            discount_factor = np.exp(- rate * t)
+            log_discount_factors = - zero_rates * times
+        else:
+            discount_factor = np.exp(- np.log(1 + rate) * t)
+            log_discount_factors = - np.log(1 + zero_rates) * times
+        # Parallel shift of the continuously compounded rate (rho), on the discounting and the drift
+        discount_factor = discount_factor * np.exp(- inputs["rate_shift"] * t)
+        log_discount_factors = log_discount_factors - inputs["rate_shift"] * times
+
+        # Simulation inputs (see BrownianMotion._step_parameters, _simulation_inputs and _check_underlying) :
+        # forward rates on each step, shifted by the underlying adjustment
+        drifts = - (log_discount_factors[1:] - log_discount_factors[:-1]) / np.diff(times)
+        spot = inputs["spot"]
+        if not self.__monte_carlo:
+            drift = - np.log(discount_factor) / t
+            underlying = getattr(product, "_underlying", None)
+            if getattr(product, "_option_type", None) in [CALL, PUT]:
+                if underlying in [SHARE_DIV, CAPITALIZED_INDEX]:
+                    inputs["dividend"] = tape.variable(float(process.input("dividend")))
+                    if "dividend_date" in process._inputs:
+                        spot = spot - inputs["dividend"] * np.exp(- drift * process.input("dividend_date"))
+                    else:
+                        spot = spot * np.exp(- inputs["dividend"] * t)
+                        drifts = drifts - inputs["dividend"]
+                elif underlying == FOREX:
+                    inputs["forward_rate"] = tape.variable(float(process.input("forward_rate")))
+                    spot = spot * np.exp(- inputs["forward_rate"] * t)
+
+        # Step volatilities (forward volatilities of a VolSurface), shifted in parallel by the volatility
+        step_volatilities = process._step_parameters(product, self.__monte_carlo)[2]
+        volatilities = inputs["volatility"] + (step_volatilities - inputs["volatility"].value)
+
+        prices = process._rebuild_prices(spot, drifts, volatilities, self.__monte_carlo)
+        payoffs = product.payoff(prices)
+        if not isinstance(payoffs, TapeVariable):
+            payoffs = tape.variable(np.asarray(payoffs, dtype=float))
+        if payoffs.ndim > 1:
+            payoffs = payoffs.mean(axis=1)
+        price = discount_factor * payoffs.mean()
+
+        names = list(inputs.keys())
+        adjoints = tape.gradient(price, [inputs[name] for name in names])
+        self.__price = float(price.value)
+        self.__gradient = {name: (float(adjoint) if np.ndim(adjoint) == 0 else adjoint)
+                           for name, adjoint in zip(names, adjoints)}
+
+    def price(self) -> float:
+        """Calculate product price."""
+        if self.__price is None:
+            self._run()
+        return self.__price
+
+    def gradient(self) -> dict:
+        """
+        Calculate the sensitivity of the price to every market input.
+
+        Returns:
+            dict: Derivatives with respect to spot, volatility, rates (the quoted rates, one per curve point
+                  for a rate curve), rate_shift (parallel shift of the continuously compounded rate),
+                  and dividend or forward_rate when relevant.
+        """
+        if self.__gradient is None:
+            self._run()
+        return self.__gradient
+
+    def delta(self) -> float:
+        """Calculate product delta."""
+        return self.gradient()["spot"]
+
+    def vega(self) -> float:
+        """Calculate product vega."""
+        return self.gradient()["volatility"]
+
+    def rho(self) -> float:
+        """Calculate product rho (parallel shift of the continuously compounded rate)."""
+        return self.gradient()["rate_shift"]
@@ -0,0 +1,265 @@
+import numpy as np
+
+from Products.optionalProducts import AbstractProduct
+from Market.brownianMotion import BrownianMotion
+
+
+CAPITALIZED_INDEX = "capitalized index"
+SHARE_DIV = "dividend share"
+
+# Default rate and time bumps, for products with a Lipschitz payoff and with a discontinuous payoff
+# (with common random numbers, a small bump moves only a few paths across a discontinuity)
+RATE_BUMP, DISCONTINUOUS_RATE_BUMP = 0.0001, 0.001
+TIME_BUMP, DISCONTINUOUS_TIME_BUMP = 1/365, 7/365
+
+
+def _start_sensitivity(product:AbstractProduct, process:BrownianMotion, start:float, monte_carlo:bool) -> float :
+    """
+    Derivative of the simulated initial spot with respect to the input spot.
+
+    Args:
+        product (AbstractProduct): The product priced with the process.
+        process (BrownianMotion): The Brownian motion process.
+        start (float): The simulated initial spot (after underlying adjustment).
+        monte_carlo (bool): If the product is priced on full paths.
+
+    Returns:
+        float: The sensitivity of the simulated initial spot.
+    """
+    underlying = getattr(product, "_underlying", None)
+    if not monte_carlo and "dividend_date" in process._inputs and underlying in [SHARE_DIV, CAPITALIZED_INDEX] :
+        # A discrete dividend is subtracted from the spot :
+        return 1.0
+    return start / process.input("spot")
+
+
+class MonteCarloRisk:
+    """
+    A class representing Monte Carlo risk analysis computed from the paths already simulated by a process.
+    Pathwise derivatives are used for products with a Lipschitz payoff, likelihood-ratio weights otherwise
+    (binary and barrier options).
+
+    Attributes:
+        __product (AbstractProduct): The product to analyze.
+        __monte_carlo (bool): If the product was priced on full paths or on terminal values only.
+        __maturity (float): The maturity of the product.
+        __volatility (float): The volatility of the underlying asset.
+        __df (float): The discount factor.
+        __start (float): The simulated initial spot (after underlying adjustment).
+        __start_sensitivity (float): Derivative of the simulated initial spot with respect to the input spot.
+        __paths (np.array): The simulated prices.
+        __dw (np.array): The Brownian increments used for the simulation.
+        __w_t (np.array): The terminal value of the Brownian motion.
+        __payoffs (np.array): The payoffs of the product on each path.
+    """
+
+    def __init__(self, product:AbstractProduct, process:BrownianMotion, monte_carlo:bool=False) -> None :
+        """
+        Initialize MonteCarloRisk object.
+
+        Args:
+            product (AbstractProduct): The product to analyze.
+            process (BrownianMotion): The Brownian motion process the product was priced with.
+            monte_carlo (bool, optional): If the product is priced on full paths. Defaults to False.
+        """
+
+        self.__product = product
+        self.__monte_carlo = monte_carlo
+        self.__maturity = process.input("maturity").maturity()
+        self.__volatility = process._volatility(product)
+        self.__df = process.input("rates").discount_factor(process.input("maturity"))
+
+        if process._prices is None or process._prices_volatility != self.__volatility :
+            process.pricing(product, monte_carlo=monte_carlo)
+        self.__paths = process._prices
+        self.__dw = process._generate_z().to_numpy()[:, 1:]
+        self.__w_t = self.__dw.sum(axis=1)
+
+        self.__start = self.__paths[0, 0]
+        self.__start_sensitivity = _start_sensitivity(product, process, self.__start, monte_carlo)
+
+        if monte_carlo :
+            payoffs = np.asarray(product.payoff(self.__paths), dtype=float)
+        else :
+            payoffs = np.asarray(product.payoff(self.__paths[:, -1]), dtype=float)
+        if payoffs.ndim > 1 :
+            payoffs = payoffs.mean(axis=1)
+        self.__payoffs = payoffs
+
+    def _pathwise(self) -> bool :
+        """Check if the greeks can be computed with pathwise derivatives."""
+        return self.__product._lipschitz_payoff and not self.__monte_carlo
+
+    def price(self) -> float :
+        """Calculate product price from the simulated payoffs."""
+        return self.__df * np.mean(self.__payoffs)
+
+    def delta(self) -> float :
+        """Calculate product delta."""
+        if self._pathwise() :
+            st = self.__paths[:, -1]
+            derivative = self.__product.payoff_derivative(st) * st / self.__start
+            return self.__df * np.mean(derivative) * self.__start_sensitivity
+
+        if self.__monte_carlo :
+            # Only the first step of the path depends on the initial spot :
+            dt = self.__maturity / self.__dw.shape[1]
+            weight = self.__dw[:, 0] / (self.__start * self.__volatility * dt)
+        else :
+            weight = self.__w_t / (self.__start * self.__volatility * self.__maturity)
+        return self.__df * np.mean(self.__payoffs * weight) * self.__start_sensitivity
+
+    def vega(self) -> float :
+        """Calculate product vega."""
+        if self._pathwise() :
+            st = self.__paths[:, -1]
+            derivative = self.__product.payoff_derivative(st) * st * (self.__w_t - self.__volatility * self.__maturity)
+            return self.__df * np.mean(derivative)
+
+        if self.__monte_carlo :
+            dt = self.__maturity / self.__dw.shape[1]
+            weight = ((self.__dw ** 2).sum(axis=1) / dt - self.__dw.shape[1]) / self.__volatility - self.__w_t
+        else :
+            weight = (self.__w_t ** 2 / self.__maturity - 1) / self.__volatility - self.__w_t
+        return self.__df * np.mean(self.__payoffs * weight)
+
+    def rho(self) -> float :
+        """Calculate product rho."""
+        if self._pathwise() :
+            st = self.__paths[:, -1]
+            derivative = self.__product.payoff_derivative(st) * st * self.__maturity
+        else :
+            derivative = self.__payoffs * self.__w_t / self.__volatility
+        return self.__df * np.mean(derivative) - self.__maturity * self.price()
+
+
+class BumpRisk:
+    """
+    A class representing bump-and-revalue risk analysis with common random numbers.
+    The bumped prices are not simulated again: since GBM prices are explicit functions of the
+    Brownian motion, they are rebuilt from the cached Brownian increments of the process, with its step
+    drifts and volatilities (rate curve forwards, VolSurface forward volatilities) shifted by the bumps.
+
+    Attributes:
+        __product (AbstractProduct): The product to analyze.
+        __process (BrownianMotion): The Brownian motion process.
+        __monte_carlo (bool): If the product is priced on full paths or on terminal values only.
+        __maturity (Maturity): The maturity of the product.
+        __rates (Rate): The rate object used for discounting.
+        __start (float): The simulated initial spot (after underlying adjustment).
+        __drifts (np.array): The simulated drift rate of each step.
+        __volatilities (np.array): The simulated volatility of each step.
+        __df (float): The discount factor.
+        __spot_bump (float): The absolute bump of the input spot.
+        __start_bump (float): The matching bump of the simulated initial spot.
+        __vol_bump (float): The absolute volatility bump.
+        __rate_bump (float): The absolute rate bump.
+        __time_bump (float): The time bump in years.
+        __prices (dict): Cache of the bumped prices.
+    """
+
+    def __init__(self, product:AbstractProduct, process:BrownianMotion, monte_carlo:bool=False,
+                 spot_bump:float=0.01, vol_bump:float=0.01, rate_bump:float=None, time_bump:float=None) -> None :
+        """
+        Initialize BumpRisk object.
+
+        Args:
+            product (AbstractProduct): The product to analyze.
+            process (BrownianMotion): The Brownian motion process the product is priced with.
+            monte_carlo (bool, optional): If the product is priced on full paths. Defaults to False.
+            spot_bump (float, optional): The spot bump, as a fraction of the spot. Defaults to 0.01.
+            vol_bump (float, optional): The absolute volatility bump. Defaults to 0.01.
+            rate_bump (float, optional): The absolute rate bump. Defaults to 0.0001 (1bp), 0.001 (10bp)
+                for products with a discontinuous payoff.
+            time_bump (float, optional): The time bump in years. Defaults to 1/365 (one day), 7/365 (one week)
+                for products with a discontinuous payoff.
+        """
+
+        self.__product = product
+        self.__process = process
+        self.__monte_carlo = monte_carlo
+        self.__maturity = process.input("maturity")
+        self.__rates = process.input("rates")
+        self.__df = self.__rates.discount_factor(self.__maturity)
+        self.__start, self.__drifts, self.__volatilities = process._step_parameters(product, monte_carlo)
+        self.__spot_bump = spot_bump * process.input("spot")
+        self.__start_bump = self.__spot_bump * _start_sensitivity(product, process, self.__start, monte_carlo)
+        self.__vol_bump = vol_bump
+        if rate_bump is None :
+            rate_bump = RATE_BUMP if product._lipschitz_payoff else DISCONTINUOUS_RATE_BUMP
+        if time_bump is None :
+            time_bump = TIME_BUMP if product._lipschitz_payoff else DISCONTINUOUS_TIME_BUMP
+        self.__rate_bump = rate_bump
+        self.__time_bump = time_bump
+        self.__prices = {}
+
+    def _price(self, spot_shift:int=0, vol_shift:int=0, rate_shift:int=0, time_shift:int=0) -> float :
+        """
+        Price the product with the given number of bumps on each input.
+
+        Args:
+            spot_shift (int, optional): Number of spot bumps. Defaults to 0.
+            vol_shift (int, optional): Number of volatility bumps. Defaults to 0.
+            rate_shift (int, optional): Number of rate bumps. Defaults to 0.
+            time_shift (int, optional): Number of time bumps (shortening the maturity). Defaults to 0.
+
+        Returns:
+            float: The price of the product in the bumped scenario.
+        """
+        key = (spot_shift, vol_shift, rate_shift, time_shift)
+        if key not in self.__prices :
+            start, drifts, volatilities, df, scale = self.__start, self.__drifts, self.__volatilities, self.__df, 1.0
+
+            if time_shift != 0 :
+                maturity = self.__maturity.get_new_maturity(
+                    new_maturity_in_years=self.__maturity.maturity() - time_shift * self.__time_bump)
+                scale = maturity.maturity() / self.__maturity.maturity()
+                df = self.__rates.discount_factor(maturity)
+                start, drifts, volatilities = self.__process._step_parameters(self.__product, self.__monte_carlo, scale)
+
+            volatilities = volatilities + vol_shift * self.__vol_bump
+            drifts = drifts + rate_shift * self.__rate_bump
+            df *= np.exp(- rate_shift * self.__rate_bump * self.__maturity.maturity())
+            start += spot_shift * self.__start_bump
+
+            # Common random numbers, shared by every bumped scenario :
+            prices = self.__process._rebuild_prices(start, drifts, volatilities, self.__monte_carlo, scale)
+            payoffs = np.asarray(self.__product.payoff(prices), dtype=float)
+            if payoffs.ndim > 1 :
+                payoffs = payoffs.mean(axis=1)
+            self.__prices[key] = df * np.mean(payoffs)
+        return self.__prices[key]
+
+    def price(self) -> float :
+        """Calculate product price."""
+        return self._price()
+
+    def delta(self) -> float :
+        """Calculate product delta."""
+        return (self._price(spot_shift=1) - self._price(spot_shift=-1)) / (2 * self.__spot_bump)
+
+    def gamma(self) -> float :
+        """Calculate product gamma."""
+        return (self._price(spot_shift=1) - 2 * self._price() + self._price(spot_shift=-1)) / self.__spot_bump ** 2
+
+    def vega(self) -> float :
+        """Calculate product vega."""
+        return (self._price(vol_shift=1) - self._price(vol_shift=-1)) / (2 * self.__vol_bump)
+
+    def volga(self) -> float :
+        """Calculate product volga (vega convexity)."""
+        return (self._price(vol_shift=1) - 2 * self._price() + self._price(vol_shift=-1)) / self.__vol_bump ** 2
+
+    def vanna(self) -> float :
+        """Calculate product vanna (delta sensitivity to volatility)."""
+        return (self._price(spot_shift=1, vol_shift=1) - self._price(spot_shift=1, vol_shift=-1)
+                - self._price(spot_shift=-1, vol_shift=1) + self._price(spot_shift=-1, vol_shift=-1)) \
+            / (4 * self.__spot_bump * self.__vol_bump)
+
+    def theta(self) -> float :
+        """Calculate product theta."""
+        return (self._price(time_shift=1) - self._price()) / self.__time_bump
+
+    def rho(self) -> float :
+        """Calculate product rho."""
+        return (self._price(rate_shift=1) - self._price(rate_shift=-1)) / (2 * self.__rate_bump)
@@ -1,7 +1,8 @@
 from math import exp, log, sqrt, pi
+import numpy as np
 from scipy.stats import norm
 
-from Products.bond import FixedBond
+from Products.bond import FixedBond, BondCashFlows
 from Products.optionalProducts import VanillaOption, Spread, ButterflySpread, OptionProducts
 from Products.structuredProducts import CertificatOutperformance, ReverseConvertible
 from Market.brownianMotion import BrownianMotion
@@ -11,6 +12,32 @@ CAPITALIZED_INDEX = "capitalized index"
 SHARE_DIV = "dividend share"
 
 
+def _key_rate_durations(cash_flows:BondCashFlows, prices:np.ndarray, bump:float) -> np.ndarray :
+    """
+    Key rate durations of stacked bonds, re-discounting every cash flow for every curve bump at once.
+
+    Args:
+        cash_flows (BondCashFlows): The stacked cash flows of the bonds.
+        prices (np.ndarray): The price of each bond.
+        bump (float): The absolute bump of each curve rate.
+
+    Returns:
+        np.ndarray: The key rate durations, with one row per bond and one column per curve point.
+    """
+    rate = cash_flows.rate
+    weights = rate.knot_weights(cash_flows.times)
+    if weights is None :
+        raise Exception("Key rate durations need a rate curve")
+    
+    # Bumping a curve point moves each zero rate by its interpolation weight :
+    times = cash_flows.times[:, None]
+    rates = rate.zero_rates(cash_flows.times)[:, None]
+    up = rate.discount_factors(times, force_rate=rates + bump * weights)
+    down = rate.discount_factors(times, force_rate=rates - bump * weights)
+    difference = cash_flows._sum((cash_flows.amounts[:, None] * (up - down)).T).T
+    return - difference / (2 * bump * np.asarray(prices)[:, None])
+
+
 class BondRisk:
     """
     A class representing risk analysis for fixed-income securities.
@@ -18,7 +45,7 @@ class BondRisk:
     Attributes:
         __m (float): Time to next coupon payment.
         __r_ytm (float): Yield to maturity.
-        __coupon_list (list): List of coupon payments.
+        __bond (FixedBond): The bond, holding its cash flow schedule as arrays.
         __price (float): Bond price.
     """
     
@@ -31,34 +58,102 @@ class BondRisk:
         """
         self.__m = bond.maturity.maturity() / bond.nb_coupon 
         self.__r_ytm = bond.ytm()
-        self.__coupon_list = bond.run_coupon()
+        self.__bond = bond
         self.__price = bond.price()
         
+    def _weights(self, force_rate:float=None) -> np.ndarray :
+        """Discounted cash flows weighted by the yield discount of each payment date."""
+        return self.__bond.present_values(force_rate=force_rate) * np.exp(-self.__r_ytm / self.__m * self.__bond.cf_times)
         
     def duration(self, force_rate:float=None) -> float :     
         """
         Calculate and returns the duration of the bond.
         Args: force_rate (float, optional): An optional parameter to specify a specific rate for duration calculation.
         """ 
-        numerator = 0
-        for coupon_t in self.__coupon_list :
-            t = coupon_t["maturity"]
-            coupon = coupon_t["zc_bond"].price(force_rate=force_rate)
-            numerator += coupon * exp(-self.__r_ytm / self.__m * t) * t 
-        return numerator / self.__price
+        return float(np.dot(self._weights(force_rate), self.__bond.cf_times)) / self.__price
     
     def convexity(self, force_rate:float=None) -> float :  
         """
         Calculate and returns the convexity of the bond.
         Args: force_rate (float, optional): An optional parameter to specify a specific rate for duration calculation.
         """       
-        numerator = 0
-        for coupon_t in self.__coupon_list :
-            t = coupon_t["maturity"]
-            coupon = coupon_t["zc_bond"].price(force_rate=force_rate)
-            numerator += coupon * exp(-self.__r_ytm / self.__m * t) * t**2
+        return float(np.dot(self._weights(force_rate), self.__bond.cf_times ** 2))
+    
+    def key_rate_durations(self, bump:float=0.0001) -> np.ndarray :
+        """
+        Calculate and returns the sensitivity of the bond price to each point of the rate curve.
+        Args: bump (float, optional): The absolute bump of each curve rate. Defaults to 0.0001.
+        Returns: np.ndarray: One duration per curve point, in the order of Rate.curve_points.
+        """
+        return _key_rate_durations(BondCashFlows([self.__bond]), np.array([self.__price]), bump)[0]
+
+
+class BondBookRisk:
+    """
+    A class representing risk analysis for many bonds at once, on their stacked cash flows.
+    The results match BondRisk for each bond.
+    
+    Attributes:
+        __cash_flows (BondCashFlows): The stacked cash flows of the bonds.
+        __r_ytm (np.ndarray): Yield to maturity of each bond.
+        __price (np.ndarray): Price of each bond.
+        __weights (np.ndarray): Weighted discounted cash flows, shared by duration and convexity.
+    """
+    
+    def __init__ (self, cash_flows:BondCashFlows) :
+        """
+        Initialize BondBookRisk object.
+
+        Args:
+            cash_flows (BondCashFlows): The stacked cash flows of the bonds to analyze.
+        """
+        self.__cash_flows = cash_flows
+        self.__price = cash_flows.prices()
+        self.__r_ytm = cash_flows.ytms(prices=self.__price)
+        self.__weights = None
+        
+    def prices(self) -> np.ndarray :
+        """Returns the price of each bond."""
+        return self.__price
+        
+    def ytms(self) -> np.ndarray :
+        """Returns the yield to maturity of each bond."""
+        return self.__r_ytm
+        
+    def _weights(self, force_rate=None) -> np.ndarray :
+        """Discounted cash flows weighted by the yield discount of each payment date."""
+        if force_rate is None and self.__weights is not None :
+            return self.__weights
+        cash_flows = self.__cash_flows
+        weights = cash_flows.present_values(force_rate=force_rate) \
+            * np.exp(-self.__r_ytm[cash_flows.bond_index] / cash_flows.periods * cash_flows.times)
+        if force_rate is None :
+            self.__weights = weights
+        return weights
         
-        return numerator
+    def duration(self, force_rate=None) -> np.ndarray :     
+        """
+        Calculate and returns the duration of each bond.
+        Args: force_rate (float or np.ndarray, optional): A rate for all bonds, or one rate per bond.
+        Returns: np.ndarray: The durations (NaN for matured bonds, without cash flows).
+        """ 
+        with np.errstate(invalid="ignore"):
+            return self.__cash_flows._sum(self._weights(force_rate) * self.__cash_flows.times) / self.__price
+    
+    def convexity(self, force_rate=None) -> np.ndarray :  
+        """
+        Calculate and returns the convexity of each bond.
+        Args: force_rate (float or np.ndarray, optional): A rate for all bonds, or one rate per bond.
+        """       
+        return self.__cash_flows._sum(self._weights(force_rate) * self.__cash_flows.times ** 2)
+    
+    def key_rate_durations(self, bump:float=0.0001) -> np.ndarray :
+        """
+        Calculate and returns the sensitivity of each bond price to each point of the rate curve.
+        Args: bump (float, optional): The absolute bump of each curve rate. Defaults to 0.0001.
+        Returns: np.ndarray: One row per bond and one column per curve point, in the order of Rate.curve_points.
+        """
+        return _key_rate_durations(self.__cash_flows, self.__price, bump)
 
 
 class OptionRisk:
@@ -91,7 +186,7 @@ class OptionRisk:
         self.__spot = process.input("spot")
         self.__maturity = process.input("maturity").maturity()
         self.__rate = process.input("rates").rate(self.__maturity) 
-        self.__volatility = process.input("volatility")
+        self.__volatility = process._volatility(option)
         self.__spot, self.__rate = process._check_underlying(option, self.__spot, self.__rate)
         self.__df = process.input("rates").discount_factor(maturity=process.input("maturity"), force_rate=self.__rate)
         
@@ -44,7 +44,7 @@ else:
     begin_date = col1.date_input("Begin Date", value=datetime(2024, 3, 7))
     end_date = col2.date_input("End Date", value=datetime(2025, 3, 7))
     day_count_convention = st.radio("Day Count Convention", 
-                                    ["ACT/360", "ACT/365"])
+                                    ["ACT/360", "ACT/365", "30/360"])
     maturity = Maturity(begin_date=begin_date, 
                         end_date=end_date, 
                         day_count_convention=day_count_convention)